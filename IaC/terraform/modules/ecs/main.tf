@@ -69,7 +69,7 @@ resource "aws_ecs_task_definition" "app" {
         }
       }
       healthCheck = {
-        command     = ["CMD-SHELL", "curl -f http://localhost:${var.container_port}/health/ || exit 1"]
+        command     = ["CMD-SHELL", "curl -f http://localhost:${var.container_port}/health/live/ || exit 1"]
         interval    = 30
         timeout     = 5
         retries     = 3
@@ -150,7 +150,7 @@ resource "aws_alb_target_group" "app" {
     unhealthy_threshold = 3
     timeout             = 5
     interval            = 30
-    path                = "/health/"
+    path                = "/health/ready/"
     protocol            = "HTTP"
     matcher             = "200"
   }
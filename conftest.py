@@ -12,6 +12,30 @@ def django_ready():
     return True
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Clear the Django cache so cached pages and settings never leak between tests."""
+    from django.core.cache import cache
+
+    from home.cache import forget_seo_settings
+
+    cache.clear()
+    forget_seo_settings()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def no_index_queue_exit_flush():
+    """Drop the index queue's exit flush, which would run after the test database is gone."""
+    yield
+    import atexit
+
+    from search.indexing import index_queue
+
+    atexit.unregister(index_queue._flush_safely)
+
+
 # Move imports inside fixtures to avoid AppRegistryNotReady errors
 
 
@@ -40,6 +64,16 @@ def django_db_setup(django_db_setup, django_db_blocker):
                 except Exception:
                     pass  # Ignore errors if table already exists or can't be created
 
+        # PostgreSQL runs the migrations, whose initial site and home page
+        # would stand in for the fixtures' own.
+        if connection.vendor == "postgresql":
+            from django.test import override_settings
+            from wagtail.models import Page, Site
+
+            with override_settings(SEARCH_INDEX_ASYNC=False):
+                Site.objects.all().delete()
+                Page.objects.filter(depth__gt=1).delete()
+
 
 @pytest.fixture
 def default_locale():
@@ -211,10 +245,28 @@ def image_collection():
         return collection
     except Collection.DoesNotExist:
         root_collection = Collection.get_first_root_node()
+        if root_collection is None:
+            # Migrations are disabled in tests, so the root collection that
+            # Wagtail's migrations normally create may not exist yet
+            root_collection = Collection.add_root(name="Root")
         collection = root_collection.add_child(name="Test Images")
         return collection
 
 
+@pytest.fixture
+def image(image_collection):
+    """Create and return a small PNG image."""
+    # Import here to ensure Django is fully initialized
+    from wagtail.images.models import Image
+    from wagtail.images.tests.utils import get_test_image_file
+
+    return Image.objects.create(
+        title="Test Image",
+        file=get_test_image_file(),
+        collection=image_collection,
+    )
+
+
 @pytest.fixture
 def mock_search(monkeypatch):
     """Mock the Wagtail search backend to avoid SQLite FTS issues."""
@@ -11,5 +11,17 @@ python manage.py migrate --noinput
 echo "Creating cache tables..."
 python manage.py createcachetable
 
+echo "Refreshing SEO snapshots..."
+python manage.py refresh_seo_snapshots
+
+echo "Computing missing image placeholders..."
+python manage.py backfill_image_metadata
+
+echo "Generating missing image renditions..."
+python manage.py generate_renditions
+
+echo "Building the typeahead snapshot..."
+python manage.py build_typeahead
+
 echo "Starting application server..."
 exec "$@" 
\ No newline at end of file
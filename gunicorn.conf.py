@@ -0,0 +1,26 @@
+"""
+Gunicorn configuration, read from the working directory by default.
+
+The application is preloaded in the master and warmed up there (templates
+compiled, URLconf resolved, static URLs primed, garbage collector frozen)
+before the workers are forked, so every worker starts warm and shares that
+memory with the master.
+
+Set ``GUNICORN_WORKER_CLASS=uvicorn_worker.UvicornWorker`` and serve
+``myproject.asgi:application`` to run the ASGI stack (see docs/deployment.md).
+"""
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "3"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "sync")
+preload_app = os.getenv("GUNICORN_PRELOAD", "True") == "True"
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded app is imported, before any fork.
+    if preload_app:
+        from myproject.warmup import warm_up
+
+        warm_up()
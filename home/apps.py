@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class HomeConfig(AppConfig):
+    default_auto_field = "django.db.models.AutoField"
+    name = "home"
+    verbose_name = "Home"
+
+    def ready(self):
+        from home import checks  # noqa: F401 (registers the system checks)
+        from home.signals import register_signal_handlers
+
+        register_signal_handlers()
@@ -0,0 +1,335 @@
+"""
+Caches for the home app: version stamps, full-page responses, conditional GET
+validators and the SEO settings snippet.
+
+Everything a page is rendered from (the page itself, the SEO settings, each
+referenced image) has a version token kept in the shared cache. Bumping a
+token is how a change is announced: cached responses and ETags embed the
+tokens they were built from, so they go stale without having to be found and
+deleted.
+
+``SEOSettings`` is held in a per-process cache stamped with its version token.
+The token itself is read again at most every ``SEO_SETTINGS_RECHECK_INTERVAL``
+seconds, so rendering costs no cache round trip (which is a database query
+with ``DatabaseCache``); other workers pick up an edit within that interval.
+Pages read the token with their other versions before rendering for the page
+cache or an ETag, and reload the snippet straight away if it has changed.
+"""
+import hashlib
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from home.images import referenced_image_ids
+
+PAGE_CACHE_PREFIX = "home:page"
+SEO_SETTINGS_VERSION_KEY = "home:seo:version"
+
+# Response headers that must never be replayed from the cache.
+UNCACHEABLE_HEADERS = {"set-cookie"}
+
+
+def get_page_cache():
+    """Return the cache backend used for full-page responses and version stamps."""
+    return caches[getattr(settings, "PAGE_CACHE_ALIAS", "default")]
+
+
+def page_cache_enabled():
+    return getattr(settings, "PAGE_CACHE_ENABLED", False)
+
+
+# Version stamps
+
+
+def page_version_key(page_id):
+    return f"{PAGE_CACHE_PREFIX}:gen:{page_id}"
+
+
+def image_version_key(image_id):
+    return f"home:image:version:{image_id}"
+
+
+def _new_token():
+    # Tokens start with their creation time so that a Last-Modified date can
+    # be derived from the versions a page depends on.
+    return f"{time.time():.6f}-{uuid.uuid4().hex[:12]}"
+
+
+def token_timestamp(token):
+    return float(token.split("-", 1)[0])
+
+
+def get_versions(keys):
+    """Return ``{key: token}`` for the given version keys, creating missing ones."""
+    cache = get_page_cache()
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            cache.add(key, _new_token(), timeout=None)
+        versions.update(cache.get_many(missing))
+    return versions
+
+
+def get_version(key):
+    return get_versions([key])[key]
+
+
+def bump_versions(keys):
+    """Give each key a fresh token, invalidating everything built from the old one."""
+    keys = set(keys)
+    if keys:
+        get_page_cache().set_many({key: _new_token() for key in keys}, timeout=None)
+
+
+def page_dependency_keys(page):
+    """Return the version keys a page's rendered output depends on."""
+    keys = [page_version_key(page.pk), SEO_SETTINGS_VERSION_KEY]
+    keys.extend(image_version_key(pk) for pk in sorted(referenced_image_ids(page)))
+    return keys
+
+
+# Requests
+
+
+def is_anonymous_request(request):
+    """
+    Return whether a GET/HEAD request can be answered with shared content.
+
+    Anonymity is decided from the session cookie alone so that a cache hit
+    never has to load the session or the user from the database.
+    """
+    if request.method not in ("GET", "HEAD"):
+        return False
+    if getattr(request, "is_preview", False):
+        return False
+    return settings.SESSION_COOKIE_NAME not in request.COOKIES
+
+
+def is_cacheable_request(request):
+    """Only anonymous, non-preview GET/HEAD requests are cacheable."""
+    return page_cache_enabled() and is_anonymous_request(request)
+
+
+# Conditional GET
+
+
+def page_validators(page):
+    """
+    Return ``(etag, last_modified)`` for the page's current rendered output.
+
+    Both are derived from the live revision, publish time and the versions of
+    everything the page depends on, so they are computed without rendering.
+    """
+    versions = get_versions(page_dependency_keys(page))
+    _note_seo_settings_version(versions[SEO_SETTINGS_VERSION_KEY])
+    parts = [
+        getattr(settings, "CONDITIONAL_GET_SALT", ""),
+        str(page.pk),
+        str(page.live_revision_id),
+        page.last_published_at.isoformat() if page.last_published_at else "",
+    ]
+    parts.extend(f"{key}={versions[key]}" for key in sorted(versions))
+    etag = '"%s"' % hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+    timestamps = [token_timestamp(token) for token in versions.values()]
+    if page.last_published_at:
+        timestamps.append(page.last_published_at.timestamp())
+    return etag, int(max(timestamps))
+
+
+def conditional_response(request, etag, last_modified=None, response=None):
+    """
+    Return a 304 if the request's validators match.
+
+    Otherwise return ``response``, which is ``None`` when checking before
+    anything has been rendered.
+    """
+    return get_conditional_response(
+        request, etag=etag, last_modified=last_modified, response=response
+    )
+
+
+def set_validators(response, etag, last_modified=None):
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+
+
+# Full-page cache
+
+
+def _response_key(request):
+    variance = "|".join(
+        [
+            getattr(settings, "CONDITIONAL_GET_SALT", ""),
+            request.scheme,
+            request.get_host(),
+            request.path,
+            request.META.get("QUERY_STRING", ""),
+        ]
+    )
+    digest = hashlib.sha256(variance.encode("utf-8")).hexdigest()
+    return f"{PAGE_CACHE_PREFIX}:response:{digest}"
+
+
+def get_cached_response(request):
+    """
+    Return a cached ``HttpResponse`` for the request, or ``None`` on a miss.
+
+    An entry is only a hit if every version token it was stored with (page,
+    SEO settings and referenced images) is still current. If the client
+    already holds the cached representation, a 304 is returned instead.
+    """
+    if not is_cacheable_request(request):
+        return None
+
+    cache = get_page_cache()
+    entry = cache.get(_response_key(request))
+    if entry is None:
+        return None
+    if cache.get_many(list(entry["versions"])) != entry["versions"]:
+        return None
+
+    response = HttpResponse(entry["content"], status=entry["status"])
+    for header, value in entry["headers"]:
+        response[header] = value
+    if response.has_header("ETag"):
+        return conditional_response(request, response["ETag"], response=response)
+    return response
+
+
+def mark_cacheable(page, request):
+    """
+    Record on the request that its response, rendered from ``page``, may be
+    stored once the middleware below ``PageCacheMiddleware`` has finished
+    with it (see ``store_response``).
+    """
+    if not is_cacheable_request(request) or request.method != "GET":
+        return
+    if page.get_view_restrictions().exists():
+        return
+    request.page_cache_versions = get_versions(page_dependency_keys(page))
+
+
+def store_response(request, response):
+    """
+    Store the final response to a request marked by ``mark_cacheable``.
+
+    Called by ``PageCacheMiddleware`` on the way out, so the stored headers
+    include those added by the security, clickjacking and session middleware
+    and a hit replays exactly what a miss sent.
+    """
+    versions = getattr(request, "page_cache_versions", None)
+    if versions is None:
+        return
+    if response.status_code != 200 or response.cookies or response.streaming:
+        return
+    if "private" in response.get("Cache-Control", ""):
+        return
+
+    if hasattr(response, "render") and not response.is_rendered:
+        response.render()
+
+    get_page_cache().set(
+        _response_key(request),
+        {
+            "versions": versions,
+            "status": response.status_code,
+            "content": response.content,
+            "headers": [
+                (header, value)
+                for header, value in response.items()
+                if header.lower() not in UNCACHEABLE_HEADERS
+            ],
+        },
+        timeout=getattr(settings, "PAGE_CACHE_TIMEOUT", 600),
+    )
+
+
+def invalidate_pages(page_ids):
+    """Invalidate every cached response rendered from any of the given pages."""
+    bump_versions(page_version_key(page_id) for page_id in page_ids)
+
+
+def page_lineage_ids(page):
+    """
+    Return the ids of a page, its ancestors and its descendants.
+
+    Ancestors may summarise their children, and descendants show the page in
+    their breadcrumbs (and their URLs change when it is moved or its slug is
+    edited), so the whole lineage is affected by a change to the page.
+    """
+    page_ids = {page.pk}
+    page_ids.update(page.get_ancestors().values_list("pk", flat=True))
+    page_ids.update(page.get_descendants().values_list("pk", flat=True))
+    return page_ids
+
+
+def invalidate_page_lineage(page):
+    """Invalidate a page together with its ancestors and descendants."""
+    invalidate_pages(page_lineage_ids(page))
+
+
+def invalidate_image(image_id):
+    """Invalidate cached responses and validators of pages using an image."""
+    bump_versions([image_version_key(image_id)])
+
+
+# SEO settings
+
+_seo_settings = {"version": None, "instance": None, "checked_at": None}
+_seo_settings_lock = threading.Lock()
+
+
+def forget_seo_settings():
+    """Make the next ``get_seo_settings()`` check the version token again."""
+    _seo_settings["checked_at"] = None
+
+
+def _note_seo_settings_version(version):
+    if _seo_settings["version"] != version:
+        forget_seo_settings()
+
+
+def get_seo_settings_version():
+    """Return the current SEO settings version token."""
+    return get_version(SEO_SETTINGS_VERSION_KEY)
+
+
+def get_seo_settings():
+    """
+    Return the site's ``SEOSettings`` instance (or ``None``), loading it at most
+    once per process per settings version.
+    """
+    checked_at = _seo_settings["checked_at"]
+    interval = getattr(settings, "SEO_SETTINGS_RECHECK_INTERVAL", 5)
+    if checked_at is not None and time.monotonic() - checked_at < interval:
+        return _seo_settings["instance"]
+
+    version = get_seo_settings_version()
+    from home.models import SEOSettings
+
+    with _seo_settings_lock:
+        if _seo_settings["version"] != version:
+            _seo_settings["instance"] = SEOSettings.objects.order_by("pk").first()
+            _seo_settings["version"] = version
+        _seo_settings["checked_at"] = time.monotonic()
+        return _seo_settings["instance"]
+
+
+def invalidate_seo_settings():
+    """
+    Bump the SEO settings version.
+
+    Every worker reloads the snippet on its next read, and every cached page
+    response (which embeds the site name and description) becomes stale.
+    """
+    bump_versions([SEO_SETTINGS_VERSION_KEY])
+    forget_seo_settings()
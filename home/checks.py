@@ -0,0 +1,41 @@
+"""
+System checks for the home app.
+"""
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Backends whose entries live in one process only.
+PER_PROCESS_CACHE_BACKENDS = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Warn when version stamps and cached pages would be private to a process.
+
+    Other workers would then never see a bump: they would keep serving the
+    SEO settings, pages and search results they cached before an edit.
+    """
+    if settings.DEBUG:
+        return []
+    aliases = {
+        getattr(settings, "PAGE_CACHE_ALIAS", "default"),
+        getattr(settings, "FRAGMENT_CACHE_ALIAS", "default"),
+    }
+    warnings = []
+    for alias in sorted(aliases):
+        backend = settings.CACHES.get(alias, {}).get("BACKEND", "")
+        if backend in PER_PROCESS_CACHE_BACKENDS:
+            warnings.append(
+                Warning(
+                    f"The {alias!r} cache uses {backend.rsplit('.', 1)[-1]}, which "
+                    "is private to each process.",
+                    hint="Set REDIS_URL, or use the database cache, so that every "
+                    "worker sees invalidations.",
+                    id="home.W001",
+                )
+            )
+    return warnings
@@ -0,0 +1,115 @@
+"""
+Content-addressed HTML fragment cache for StreamField blocks.
+
+A block's fragment is keyed by a hash of its stored value plus the file hash,
+title, focal point (and placeholder state) of every image it references.
+Unchanged blocks therefore keep their cache entry across revisions, and
+identical blocks on different pages share one.
+"""
+import hashlib
+import json
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.safestring import mark_safe
+from wagtail.images.blocks import ImageChooserBlock
+
+from home.placeholders import get_image_metadata
+
+FRAGMENT_CACHE_PREFIX = "home:fragment"
+
+_stats = {"hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
+
+
+def get_fragment_cache():
+    return caches[getattr(settings, "FRAGMENT_CACHE_ALIAS", "default")]
+
+
+def fragment_cache_enabled():
+    return getattr(settings, "FRAGMENT_CACHE_ENABLED", True)
+
+
+def _record(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def get_fragment_cache_stats():
+    """Return this process's hit/miss counters and hit ratio."""
+    with _stats_lock:
+        hits, misses = _stats["hits"], _stats["misses"]
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / total, 4) if total else 0.0,
+    }
+
+
+def reset_fragment_cache_stats():
+    with _stats_lock:
+        _stats["hits"] = 0
+        _stats["misses"] = 0
+
+
+def _image_signature(image):
+    # Templates read the title (alt text) and the focal point (crops) too.
+    metadata = get_image_metadata(image)
+    return [
+        image.pk,
+        image.file_hash or image.file.name,
+        metadata.file_hash if metadata else None,
+        image.title,
+        image.focal_point_x,
+        image.focal_point_y,
+        image.focal_point_width,
+        image.focal_point_height,
+    ]
+
+
+def fragment_key(block, value):
+    """Return the cache key for rendering ``value`` with a StructBlock."""
+    images = {
+        name: _image_signature(value[name])
+        for name, child_block in block.child_blocks.items()
+        if isinstance(child_block, ImageChooserBlock) and value.get(name)
+    }
+    payload = json.dumps(
+        [
+            # The release version, so template changes invalidate fragments.
+            getattr(settings, "CONDITIONAL_GET_SALT", ""),
+            block.meta.template,
+            block.get_prep_value(value),
+            images,
+        ],
+        sort_keys=True,
+        cls=DjangoJSONEncoder,
+    )
+    digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    return f"{FRAGMENT_CACHE_PREFIX}:{block.name or type(block).__name__}:{digest}"
+
+
+def render_cached(block, value, render):
+    """
+    Return the cached fragment for ``value``, calling ``render()`` on a miss.
+
+    Blocks using this must render from ``value`` alone; the parent template
+    context is not part of the key.
+    """
+    if not fragment_cache_enabled():
+        return render()
+
+    cache = get_fragment_cache()
+    key = fragment_key(block, value)
+    html = cache.get(key)
+    if html is not None:
+        _record("hits")
+        return mark_safe(html)
+
+    _record("misses")
+    html = render()
+    cache.set(key, str(html), timeout=getattr(settings, "FRAGMENT_CACHE_TIMEOUT", None))
+    return html
@@ -0,0 +1,166 @@
+"""
+Helpers for finding and bulk-loading the images a page depends on.
+
+The ``*_image_ids`` helpers work on the stored (prep) representation of
+StreamFields, so they never load image objects or renditions just to find out
+which images are used. ``prefetch_page_images`` loads them for rendering.
+"""
+from collections import defaultdict
+
+from wagtail import blocks
+from wagtail.fields import StreamField
+from wagtail.images import get_image_model
+from wagtail.images.blocks import ImageChooserBlock
+
+
+def _child_values(block, value):
+    """Yield ``(child block, child value)`` for the children of a stored value."""
+    if isinstance(block, blocks.StructBlock):
+        for name, child_block in block.child_blocks.items():
+            yield child_block, value.get(name)
+    elif isinstance(block, blocks.StreamBlock):
+        for item in value:
+            child_block = block.child_blocks.get(item["type"])
+            if child_block is not None:
+                yield child_block, item["value"]
+    elif isinstance(block, blocks.ListBlock):
+        for item in value:
+            if isinstance(item, dict) and item.get("type") == "item":
+                item = item["value"]
+            yield block.child_block, item
+
+
+def _collect_block_images(block, value, found):
+    if not value:
+        return
+    if isinstance(block, ImageChooserBlock):
+        found.add(int(value))
+        return
+    for child_block, child_value in _child_values(block, value):
+        _collect_block_images(child_block, child_value, found)
+
+
+def stream_fields(model):
+    """Return the StreamFields defined on a model."""
+    return [
+        field for field in model._meta.get_fields() if isinstance(field, StreamField)
+    ]
+
+
+def streamfield_image_ids(page):
+    """Return the ids of every image referenced from the page's StreamFields."""
+    found = set()
+    for field in stream_fields(type(page)):
+        stream_value = getattr(page, field.name)
+        if stream_value:
+            _collect_block_images(
+                field.stream_block, stream_value.get_prep_value(), found
+            )
+    return found
+
+
+def image_foreign_key_ids(page):
+    """Return the ids of images referenced through foreign keys on the page."""
+    image_model = get_image_model()
+    return {
+        getattr(page, field.attname)
+        for field in page._meta.concrete_fields
+        if field.is_relation
+        and field.related_model is image_model
+        and getattr(page, field.attname)
+    }
+
+
+def referenced_image_ids(page):
+    """Return the ids of every image the page references."""
+    return image_foreign_key_ids(page) | streamfield_image_ids(page)
+
+
+def _collect_block_image_instances(block, value, found):
+    if not value:
+        return
+    if isinstance(block, ImageChooserBlock):
+        found.append(value)
+    elif isinstance(block, blocks.StructBlock):
+        for name, child_block in block.child_blocks.items():
+            _collect_block_image_instances(child_block, value.get(name), found)
+    elif isinstance(block, blocks.StreamBlock):
+        for child in value:
+            _collect_block_image_instances(child.block, child.value, found)
+    elif isinstance(block, blocks.ListBlock):
+        for item in value:
+            _collect_block_image_instances(block.child_block, item, found)
+
+
+def prefetch_page_images(page, filter_specs):
+    """
+    Load every image the page renders, with its renditions for ``filter_specs``.
+
+    Image foreign keys are fetched in one query and StreamField images in one
+    query per block type (Wagtail's bulk conversion). Existing renditions and
+    placeholder metadata for all of them are then fetched in one query each
+    and attached to the instances, so rendering costs no further lookups
+    however many images the page contains.
+    """
+    image_model = get_image_model()
+    image_fields = [
+        field
+        for field in page._meta.concrete_fields
+        if field.is_relation and field.related_model is image_model
+    ]
+
+    instances = []
+    unloaded = {
+        getattr(page, field.attname): field
+        for field in image_fields
+        if getattr(page, field.attname) and not field.is_cached(page)
+    }
+    loaded = image_model.objects.in_bulk(unloaded) if unloaded else {}
+    for field in image_fields:
+        image_id = getattr(page, field.attname)
+        if not image_id:
+            continue
+        if image_id in loaded and not field.is_cached(page):
+            field.set_cached_value(page, loaded[image_id])
+        instances.append(getattr(page, field.name))
+
+    for field in stream_fields(type(page)):
+        stream_value = getattr(page, field.name)
+        if stream_value:
+            _collect_block_image_instances(field.stream_block, stream_value, instances)
+
+    if not instances:
+        return []
+
+    prefetch_renditions(instances, filter_specs)
+
+    from home.models import ImageMetadata
+
+    metadata = ImageMetadata.objects.in_bulk({image.pk for image in instances})
+    metadata_cache = ImageMetadata._meta.get_field("image").remote_field
+    for image in instances:
+        metadata_cache.set_cached_value(image, metadata.get(image.pk))
+    return instances
+
+
+def prefetch_renditions(images, filter_specs):
+    """
+    Attach the existing renditions for ``filter_specs`` to ``images``, in one
+    query, so rendering them does not look each one up.
+    """
+    if not images:
+        return
+    images_by_pk = {image.pk: image for image in images}
+    rendition_model = get_image_model().get_rendition_model()
+    renditions = defaultdict(list)
+    for rendition in rendition_model.objects.filter(
+        image_id__in=images_by_pk, filter_spec__in=list(filter_specs)
+    ):
+        # Rendering an <img> tag reads rendition.image for the alt text.
+        rendition.image = images_by_pk[rendition.image_id]
+        renditions[rendition.image_id].append(rendition)
+
+    for image in images:
+        # Instances for the same image share one list, so a rendition created
+        # while rendering one of them is reused by the others.
+        image.prefetched_renditions = renditions[image.pk]
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from wagtail.images import get_image_model
+
+from home.placeholders import get_image_metadata, update_image_metadata
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute placeholders and dominant colours for images that have none, "
+        "or whose file changed since they were computed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Recompute metadata for every image.",
+        )
+
+    def handle(self, *args, **options):
+        images = get_image_model().objects.select_related("metadata").order_by("pk")
+        updated = 0
+        failed = 0
+        for image in images.iterator(chunk_size=200):
+            previous = get_image_metadata(image)
+            metadata = update_image_metadata(image, force=options["force"])
+            if metadata is None:
+                failed += 1
+                self.stderr.write(f"Image {image.pk}: could not read file")
+            elif metadata is not previous:
+                updated += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Updated metadata for {updated} images"))
+        if failed:
+            self.stderr.write(f"{failed} images failed")
@@ -0,0 +1,163 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from unittest import mock
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management.base import BaseCommand
+from django.db.backends.utils import CursorWrapper
+from django.test import Client
+
+
+@contextmanager
+def slow_database(latency):
+    """Add ``latency`` seconds to every query, as a slow or distant database would."""
+    execute = CursorWrapper._execute
+
+    def slow_execute(self, *args, **kwargs):
+        time.sleep(latency)
+        return execute(self, *args, **kwargs)
+
+    with mock.patch.object(CursorWrapper, "_execute", slow_execute):
+        yield
+
+
+def _host():
+    for host in settings.ALLOWED_HOSTS:
+        if host != "*":
+            return host.lstrip(".")
+    return "localhost"
+
+
+def _percentile(values, percent):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def run_wsgi(requests, workers):
+    """Serve ``requests`` with a pool of ``workers`` sync workers, as gunicorn does."""
+
+    def get(path, start):
+        response = Client(HTTP_HOST=_host()).get(path)
+        return response.status_code, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        start = time.perf_counter()
+        futures = [(kind, executor.submit(get, path, start)) for kind, path in requests]
+        results = [(kind, *future.result()) for kind, future in futures]
+    return results, time.perf_counter() - start
+
+
+async def _asgi_get(application, path, start):
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", _host().encode())],
+        "client": ("127.0.0.1", 0),
+        "server": (_host(), 80),
+    }
+    status = None
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await application(scope, receive, send)
+    return status, time.perf_counter() - start
+
+
+async def _run_asgi(requests):
+    application = ASGIHandler()
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(_asgi_get(application, path, start) for _kind, path in requests)
+    )
+    elapsed = time.perf_counter() - start
+    return [(kind, *result) for (kind, _path), result in zip(requests, results)], elapsed
+
+
+def run_asgi(requests):
+    """Serve ``requests`` concurrently through Django's ASGI handler."""
+    return asyncio.run(_run_asgi(requests))
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare sync (WSGI) workers with ASGI when slow searches arrive "
+        "together with page views and health checks, adding a simulated "
+        "latency to every database query."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--searches", type=int, default=12)
+        parser.add_argument("--pages", type=int, default=12)
+        parser.add_argument("--health", type=int, default=12)
+        parser.add_argument(
+            "--sync-workers",
+            type=int,
+            default=3,
+            help="Number of sync workers to compare against (the gunicorn default).",
+        )
+        parser.add_argument(
+            "--db-latency",
+            type=float,
+            default=100,
+            help="Milliseconds added to every query.",
+        )
+        parser.add_argument("--query", default="benchmark")
+
+    def handle(self, *args, **options):
+        groups = [
+            ("search", f"/search/?query={options['query']}", options["searches"]),
+            ("page", "/", options["pages"]),
+            ("health", "/health/", options["health"]),
+        ]
+        # Interleave the kinds, as requests would arrive in production.
+        requests = []
+        for i in range(max(count for _kind, _path, count in groups)):
+            requests.extend((kind, path) for kind, path, count in groups if i < count)
+
+        self.stdout.write(
+            f"{len(requests)} concurrent requests, "
+            f"{options['db_latency']:g} ms per query"
+        )
+        with slow_database(options["db_latency"] / 1000):
+            # Warm both stacks so neither pays for template compilation.
+            run_wsgi(requests[:3], 1)
+            wsgi_label = f"wsgi ({options['sync_workers']} workers)"
+            modes = [
+                (wsgi_label, run_wsgi(requests, options["sync_workers"])),
+                ("asgi", run_asgi(requests)),
+            ]
+        for label, (results, elapsed) in modes:
+            self.report(label, results, elapsed)
+
+    def report(self, label, results, elapsed):
+        errors = sum(1 for _kind, status, _latency in results if status >= 500)
+        self.stdout.write(f"\n{label}: {elapsed * 1000:.0f} ms total, {errors} errors")
+        for kind in ("search", "page", "health"):
+            latencies = [
+                latency * 1000 for k, _status, latency in results if k == kind
+            ]
+            if latencies:
+                self.stdout.write(
+                    f"  {kind:<7} p50 {statistics.median(latencies):7.0f} ms"
+                    f"   p95 {_percentile(latencies, 95):7.0f} ms"
+                )
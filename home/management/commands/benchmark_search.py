@@ -0,0 +1,247 @@
+import importlib
+import logging
+import random
+import statistics
+import time
+from contextlib import contextmanager, nullcontext
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import override_settings
+from wagtail.models import Page
+from wagtail.search.backends import get_search_backend
+from wagtail.search.models import IndexEntry
+
+from home.models import LandingPage
+
+SYLLABLES = "ba ko ri su ne ta lo mi da ve pu zo ga li ser tan mor vel".split()
+
+
+class Rollback(Exception):
+    pass
+
+
+@contextmanager
+def without_search_indexes():
+    """Drop the indexes added by search/migrations, and restore them afterwards."""
+    migration = importlib.import_module("search.migrations.0001_search_indexes")
+    with connection.cursor() as cursor:
+        check_deferred_constraints(cursor)
+        for name, _definition in migration.INDEXES:
+            cursor.execute(f"DROP INDEX IF EXISTS {name}")
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            check_deferred_constraints(cursor)
+            for name, definition in migration.INDEXES:
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+
+
+def check_deferred_constraints(cursor):
+    """
+    Run the foreign key checks deferred to the end of the transaction now:
+    PostgreSQL refuses to alter the indexes of a table with checks pending.
+    """
+    cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+    cursor.execute("SET CONSTRAINTS ALL DEFERRED")
+
+
+def vocabulary(size, rng):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words, key=lambda word: rng.random())
+
+
+def zipf_words(words, count, rng):
+    """Pick ``count`` words, the first ones far more often than the last."""
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    return rng.choices(words, weights=weights, k=count)
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def _ms(seconds):
+    return f"{seconds * 1000:7.1f} ms"
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a corpus of landing pages and compare Wagtail's database "
+        "search backend with the tuned backend (search.backends): indexing "
+        "throughput, per-page indexing cost and query latency. On PostgreSQL "
+        "the query plans are shown too. Everything is rolled back afterwards "
+        "unless --keep is given; run it against a scratch database, as it "
+        "locks the search tables while it runs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pages", type=int, default=2000)
+        parser.add_argument(
+            "--incremental",
+            type=int,
+            default=100,
+            help="Pages indexed one at a time, as publishing does.",
+        )
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--keep", action="store_true")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                if not options["keep"]:
+                    raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, options):
+        rng = random.Random(options["seed"])
+        words = vocabulary(3000, rng)
+        start = time.perf_counter()
+        page_ids = self.generate_corpus(options["pages"], words, rng)
+        self.stdout.write(
+            f"Generated {len(page_ids)} pages in "
+            f"{time.perf_counter() - start:.1f} s on {connection.vendor}"
+        )
+        queries = [
+            words[0],
+            words[40],
+            words[1500],
+            f"{words[2]} {words[300]}",
+            f"{words[10]} {words[20]} {words[30]}",
+        ]
+
+        params = settings.WAGTAILSEARCH_BACKENDS["default"]
+        # The tuned backend runs first: indexes the baseline drops and
+        # restores within this transaction may not be usable by it.
+        backends = [
+            ("tuned", get_search_backend("default")),
+            (
+                "wagtail",
+                get_search_backend(
+                    "wagtail.search.backends.database",
+                    SEARCH_CONFIG=params.get("SEARCH_CONFIG"),
+                ),
+            ),
+        ]
+        if type(backends[0][1]) is type(backends[1][1]):
+            self.stdout.write(
+                "Both resolve to the same backend on this database; the tuned "
+                "backend only differs on PostgreSQL."
+            )
+            backends = backends[:1]
+
+        for label, backend in backends:
+            # The baseline runs without the indexes from search/migrations.
+            baseline = label == "wagtail" and connection.vendor == "postgresql"
+            with without_search_indexes() if baseline else nullcontext():
+                self.stdout.write(f"\n{label} ({type(backend).__module__})")
+                self.benchmark_indexing(backend, page_ids, options["incremental"])
+                if connection.vendor == "postgresql":
+                    # Plan with statistics of the new pages and entries, as
+                    # autovacuum would gather them on a real site.
+                    tables = [
+                        model._meta.db_table
+                        for model in (Page, LandingPage, IndexEntry)
+                    ]
+                    with connection.cursor() as cursor:
+                        cursor.execute(f"ANALYZE {', '.join(tables)}")
+                for query in queries:
+                    self.benchmark_query(backend, query, options["repeat"])
+                if connection.vendor == "postgresql":
+                    # The rarest word, where the index should be used.
+                    self.explain(backend, queries[2])
+
+    def generate_corpus(self, count, words, rng):
+        root = Page.get_first_root_node()
+        # Index nothing while generating; indexing is measured separately. Nor
+        # log every page created.
+        wagtail_logger = logging.getLogger("wagtail")
+        level = wagtail_logger.level
+        wagtail_logger.setLevel(logging.WARNING)
+        try:
+            return self._generate_pages(root, count, words, rng)
+        finally:
+            wagtail_logger.setLevel(level)
+
+    def _generate_pages(self, root, count, words, rng):
+        with override_settings(
+            WAGTAILSEARCH_BACKENDS={
+                name: {**params, "AUTO_UPDATE": False}
+                for name, params in settings.WAGTAILSEARCH_BACKENDS.items()
+            }
+        ):
+            parent = root.add_child(
+                instance=LandingPage(title="Search benchmark", slug="search-benchmark")
+            )
+            page_ids = []
+            for i in range(count):
+                page = parent.add_child(
+                    instance=LandingPage(
+                        title=" ".join(zipf_words(words, rng.randint(2, 6), rng)),
+                        slug=f"benchmark-{i}",
+                        hero_title=" ".join(zipf_words(words, 5, rng)),
+                        og_title=" ".join(zipf_words(words, 5, rng)),
+                        intro="<p>%s</p>" % " ".join(zipf_words(words, 150, rng)),
+                    )
+                )
+                page_ids.append(page.pk)
+        return page_ids
+
+    def benchmark_indexing(self, backend, page_ids, incremental):
+        IndexEntry._default_manager.all().delete()
+        if connection.vendor == "postgresql":
+            from search.postgres import TITLE_LENGTH_CACHE_KEY
+
+            cache.delete(TITLE_LENGTH_CACHE_KEY)
+        pages = list(LandingPage.objects.filter(pk__in=page_ids).order_by("pk"))
+
+        timings = []
+        for page in pages[:incremental]:
+            start = time.perf_counter()
+            backend.add(page)
+            timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        rest = pages[incremental:]
+        for offset in range(0, len(rest), 500):
+            backend.add_bulk(LandingPage, rest[offset : offset + 500])
+        elapsed = time.perf_counter() - start
+
+        if timings:
+            self.stdout.write(
+                f"  index one page   p50 {_ms(statistics.median(timings))}"
+                f"   p95 {_ms(_percentile(timings, 95))}"
+            )
+        if rest:
+            self.stdout.write(
+                f"  bulk index       {len(rest) / elapsed:7.0f} pages/s"
+            )
+
+    def benchmark_query(self, backend, query, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            results = backend.search(query, Page.objects.live())
+            total = results.count()
+            list(results[:10])
+            timings.append(time.perf_counter() - start)
+        self.stdout.write(
+            f"  {query[:28]!r:<30} p50 {_ms(statistics.median(timings))}"
+            f"   p95 {_ms(_percentile(timings, 95))}   {total} matches"
+        )
+
+    def explain(self, backend, query):
+        results = backend.search(query, Page.objects.live())
+        plan = results.get_queryset().explain()
+        self.stdout.write(f"  plan for {query!r}:")
+        for line in plan.splitlines():
+            self.stdout.write(f"    {line}")
@@ -0,0 +1,32 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from home.tailwind import MANIFEST_PATH, write_stylesheets
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the site stylesheet from the Tailwind classes used in the "
+        "templates, with a content hash in its name, and the critical CSS "
+        "inlined by each page template. Runs offline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default=os.path.join(settings.PROJECT_DIR, "static"),
+            help="Static directory to write css/ into (default: the project's).",
+        )
+
+    def handle(self, *args, **options):
+        manifest = write_stylesheets(options["output"])
+        stylesheet = os.path.join(options["output"], manifest["stylesheet"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {manifest['stylesheet']} ({os.path.getsize(stylesheet)} "
+                f"bytes) and critical CSS for {len(manifest['critical'])} "
+                f"templates to {MANIFEST_PATH}"
+            )
+        )
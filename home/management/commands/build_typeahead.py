@@ -0,0 +1,27 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from search.typeahead import Snapshot, page_texts, write_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the typeahead snapshot (TYPEAHEAD_SNAPSHOT) from the titles, "
+        "hero titles and meta keywords of live pages. Running processes map "
+        "the new file on their next refresh."
+    )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        path = settings.TYPEAHEAD_SNAPSHOT
+        write_snapshot(path, page_texts())
+        snapshot = Snapshot(path)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {snapshot.suggestion_count} suggestions and "
+                f"{snapshot.key_count} keys "
+                f"to {path} in {time.monotonic() - started:.1f}s"
+            )
+        )
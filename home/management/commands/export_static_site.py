@@ -0,0 +1,47 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from home.static_export import export_root, export_site
+
+
+class Command(BaseCommand):
+    help = (
+        "Render every live HomePage and LandingPage, the search page, 404 and "
+        "500 into a static HTML tree. Unchanged files are not rewritten."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of worker processes (1 renders in this process).",
+        )
+        parser.add_argument(
+            "--page",
+            type=int,
+            action="append",
+            dest="page_ids",
+            help="Only re-export the page with this id (can be repeated).",
+        )
+        parser.add_argument(
+            "--output",
+            default=None,
+            help="Directory to export to (defaults to STATIC_EXPORT_ROOT).",
+        )
+
+    def handle(self, *args, **options):
+        root = options["output"] or export_root()
+        started = time.monotonic()
+        stats = export_site(
+            page_ids=options["page_ids"], workers=options["workers"], root=root
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Exported to {root} in {time.monotonic() - started:.1f}s: "
+                f"{stats['rendered']} rendered, {stats['written']} written, "
+                f"{stats['removed']} removed, {stats['assets']} assets copied"
+            )
+        )
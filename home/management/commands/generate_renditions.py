@@ -0,0 +1,95 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from home.renditions import (
+    generate_renditions,
+    live_image_ids,
+    missing_renditions,
+    rendition_filter_specs,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate missing renditions for every image used by live pages and the "
+        "SEO settings, for each filter spec used in the templates. Existing "
+        "renditions are skipped, so an interrupted run resumes where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of worker processes (1 generates in this process).",
+        )
+        parser.add_argument(
+            "--spec",
+            action="append",
+            default=[],
+            dest="extra_specs",
+            help="Additional filter spec to generate (can be repeated).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what would be generated without generating it.",
+        )
+
+    def handle(self, *args, **options):
+        specs = rendition_filter_specs(options["extra_specs"])
+        image_ids = live_image_ids()
+        missing = missing_renditions(image_ids, specs)
+        total = sum(len(image_specs) for image_specs in missing.values())
+
+        self.stdout.write(
+            f"{len(specs)} filter specs, {len(image_ids)} images, "
+            f"{total} renditions missing"
+        )
+        if options["dry_run"] or not total:
+            return
+
+        started = time.monotonic()
+        done = 0
+        failures = 0
+        for image_id, created, error in self._generate(missing, options["workers"]):
+            if error:
+                failures += 1
+                self.stderr.write(f"Image {image_id}: {error}")
+                continue
+            done += created
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"[{done}/{total}] image {image_id} "
+                f"({done / elapsed if elapsed else 0:.1f} renditions/s)"
+            )
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {done} renditions in {elapsed:.1f}s"
+                f" ({done / elapsed if elapsed else 0:.1f} renditions/s)"
+            )
+        )
+        if failures:
+            self.stderr.write(f"{failures} images failed")
+
+    def _generate(self, missing, workers):
+        if workers <= 1:
+            for image_id, specs in missing.items():
+                yield generate_renditions(image_id, specs)
+            return
+
+        # Forked workers must open their own database connections.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(generate_renditions, image_id, specs)
+                for image_id, specs in missing.items()
+            ]
+            for future in as_completed(futures):
+                yield future.result()
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from home.models import HomePage, LandingPage
+from home.seo import update_seo_snapshot
+
+
+class Command(BaseCommand):
+    help = "Rebuild the stored SEO metadata and JSON-LD of every live page."
+
+    def handle(self, *args, **options):
+        count = 0
+        for model in (HomePage, LandingPage):
+            for page in model.objects.live().iterator():
+                update_seo_snapshot(page)
+                count += 1
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {count} SEO snapshots"))
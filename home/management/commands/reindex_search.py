@@ -0,0 +1,186 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from wagtail.models import Page, get_page_models
+
+from search.cache import invalidate_index
+from search.reindex import (
+    finish_in_place,
+    index_chunk,
+    page_chunks,
+    read_state,
+    replay_changes,
+    write_state,
+)
+from search.workers import setup_worker
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the search index of pages in chunks of consecutive ids, in "
+        "parallel, reporting throughput and time remaining. An interrupted run "
+        "can be continued with --resume. With --shadow (PostgreSQL only) the "
+        "index is built into a copy that replaces the live index once complete, "
+        "so searches keep working and stale entries are dropped; pages changed "
+        "meanwhile are indexed again before the swap. Otherwise pages are "
+        "reindexed in place."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of worker processes (1 indexes in this process).",
+        )
+        parser.add_argument(
+            "--max-chunks-per-worker",
+            type=int,
+            default=20,
+            help="Replace each worker after this many chunks, to bound its memory.",
+        )
+        parser.add_argument("--shadow", action="store_true")
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Continue the rebuild recorded in the state file.",
+        )
+        parser.add_argument(
+            "--state-file",
+            default=os.path.join(settings.BASE_DIR, ".reindex-search.json"),
+        )
+
+    def handle(self, *args, **options):
+        if options["shadow"] and connection.vendor != "postgresql":
+            raise CommandError("--shadow needs PostgreSQL.")
+
+        state = self.load_state(options)
+        chunks = state["chunks"]
+        done = set(state["done"])
+        todo = [i for i in range(len(chunks)) if i not in done]
+        total = sum(chunks[i][2] for i in todo)
+        self.stdout.write(
+            f"{len(todo)} of {len(chunks)} chunks, {total} pages to index"
+            + (" into the shadow index" if state["shadow"] else "")
+        )
+
+        started = time.monotonic()
+        indexed = 0
+        remaining = total
+        for i, count in self.index_chunks(chunks, todo, state["shadow"], options):
+            state["done"].append(i)
+            write_state(options["state_file"], state)
+            indexed += count
+            remaining -= chunks[i][2]
+            elapsed = time.monotonic() - started
+            rate = indexed / elapsed if elapsed else 0
+            self.stdout.write(
+                f"[{len(state['done'])}/{len(chunks)}] pages {chunks[i][0]}-{chunks[i][1]}"
+                f" ({rate:.0f} pages/s, ETA {remaining / rate if rate else 0:.0f}s)"
+            )
+
+        self.finish(state)
+        os.remove(options["state_file"])
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Indexed {indexed} pages in {elapsed:.1f}s"
+                f" ({indexed / elapsed if elapsed else 0:.0f} pages/s)"
+            )
+        )
+
+    def load_state(self, options):
+        if options["resume"]:
+            state = read_state(options["state_file"])
+            if state is None:
+                raise CommandError(f"No rebuild to resume in {options['state_file']}.")
+            if state["shadow"] != options["shadow"]:
+                raise CommandError(
+                    "The rebuild being resumed was started "
+                    + ("with" if state["shadow"] else "without")
+                    + " --shadow."
+                )
+            return state
+
+        state = {
+            "shadow": options["shadow"],
+            "started_at": timezone.now().isoformat(),
+            "chunks": page_chunks(options["chunk_size"]),
+            "done": [],
+        }
+        if state["shadow"]:
+            from search.postgres import create_shadow_table
+
+            create_shadow_table(connection)
+        write_state(options["state_file"], state)
+        return state
+
+    def index_chunks(self, chunks, todo, shadow, options):
+        """Index the chunks numbered in ``todo``, yielding (number, pages indexed)."""
+        table = None
+        if shadow:
+            from search.postgres import SHADOW_TABLE
+
+            table = SHADOW_TABLE
+
+        if options["workers"] <= 1:
+            for i in todo:
+                yield i, index_chunk(chunks[i][0], chunks[i][1], table)
+            return
+
+        # Replacing workers needs spawn rather than fork; spawned workers set
+        # Django up themselves.
+        with ProcessPoolExecutor(
+            max_workers=options["workers"],
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=setup_worker,
+            initargs=(connection.settings_dict["NAME"],),
+            max_tasks_per_child=options["max_chunks_per_worker"],
+        ) as executor:
+            futures = {
+                executor.submit(index_chunk, chunks[i][0], chunks[i][1], table): i
+                for i in todo
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+    def finish(self, state):
+        if state["shadow"]:
+            from search.postgres import (
+                SHADOW_TABLE,
+                normalise_table_titles,
+                swap_shadow_table,
+            )
+
+            # Pages changed during the rebuild are indexed again: first
+            # while searches continue, then, for those changed meanwhile,
+            # with the live index locked for the swap.
+            replayed_at = timezone.now()
+            replayed = replay_changes(
+                parse_datetime(state["started_at"]), SHADOW_TABLE
+            )
+            self.stdout.write(f"Reindexed {replayed} pages changed during the rebuild")
+
+            self.stdout.write("Normalising titles and swapping in the shadow index")
+            normalise_table_titles(SHADOW_TABLE, connection)
+            page_content_types = ContentType.objects.get_for_models(
+                Page, *get_page_models()
+            ).values()
+            swap_shadow_table(
+                connection,
+                [content_type.pk for content_type in page_content_types],
+                partial(replay_changes, replayed_at, SHADOW_TABLE),
+            )
+        else:
+            finish_in_place()
+        invalidate_index()
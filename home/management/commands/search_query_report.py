@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from search.models import DailyQueryHits
+from search.querylog import query_log
+
+
+class Command(BaseCommand):
+    help = (
+        "List the most searched queries and the most searched queries that "
+        "found nothing, from the daily query counts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=7, help="Days to report on, today included."
+        )
+        parser.add_argument(
+            "--limit", type=int, default=20, help="Queries to list in each table."
+        )
+
+    def handle(self, *args, **options):
+        # Include this process's buffered hits (none, unless run in a shell).
+        query_log.flush()
+        days, limit = options["days"], options["limit"]
+        self._table(
+            f"Top queries, last {days} days",
+            DailyQueryHits.objects.top(days, limit),
+        )
+        self._table(
+            f"Zero-result queries, last {days} days",
+            DailyQueryHits.objects.zero_results(days, limit),
+        )
+
+    def _table(self, title, rows):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        rows = list(rows)
+        if not rows:
+            self.stdout.write("  (none)")
+        for row in rows:
+            self.stdout.write(
+                f"  {row['total_hits']:>8}  {row['total_zero_result_hits']:>8}  "
+                f"{row['query_string']}"
+            )
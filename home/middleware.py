@@ -0,0 +1,47 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from home.cache import get_cached_response, store_response
+
+
+class PageCacheMiddleware:
+    """
+    Serve cached page responses before sessions, auth or Wagtail routing run.
+
+    Page models mark the responses that may be cached (see
+    ``home.models.CachedPageMixin``) and this middleware stores them on the
+    way out, after every middleware below it has added its headers, so a hit
+    replays the same headers as a miss. A hit costs two cache reads and
+    nothing else: no database queries with Redis, and only the ``django_cache``
+    lookups with ``DatabaseCache``.
+
+    The middleware supports both sync and async requests, so that under ASGI
+    Django does not have to run the whole stack in a thread for async views.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = get_cached_response(request)
+        if response is not None:
+            return response
+        response = self.get_response(request)
+        store_response(request, response)
+        return response
+
+    async def __acall__(self, request):
+        # The cache backend may do network I/O; keep it off the event loop.
+        response = await sync_to_async(get_cached_response)(request)
+        if response is not None:
+            return response
+        response = await self.get_response(request)
+        if getattr(request, "page_cache_versions", None) is not None:
+            await sync_to_async(store_response)(request, response)
+        return response
@@ -0,0 +1,76 @@
+# Generated by Django 4.2.20 on 2026-10-18 05:43
+
+import wagtail.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("home", "0007_alter_landingpage_hero_cta_link"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="landingpage",
+            name="body",
+            field=wagtail.fields.StreamField(
+                [
+                    ("heading", 0),
+                    ("paragraph", 1),
+                    ("image", 2),
+                    ("feature", 6),
+                    ("testimonial", 8),
+                    ("quote", 9),
+                    ("cta", 12),
+                ],
+                blank=True,
+                block_lookup={
+                    0: (
+                        "wagtail.blocks.CharBlock",
+                        (),
+                        {"form_classname": "full title"},
+                    ),
+                    1: ("wagtail.blocks.RichTextBlock", (), {}),
+                    2: (
+                        "wagtail.images.blocks.ImageChooserBlock",
+                        (),
+                        {"template": "blocks/image_block.html"},
+                    ),
+                    3: (
+                        "wagtail.images.blocks.ImageChooserBlock",
+                        (),
+                        {"required": False},
+                    ),
+                    4: ("wagtail.blocks.CharBlock", (), {"required": True}),
+                    5: ("wagtail.blocks.TextBlock", (), {"required": True}),
+                    6: (
+                        "wagtail.blocks.StructBlock",
+                        [[("icon", 3), ("title", 4), ("text", 5)]],
+                        {},
+                    ),
+                    7: ("wagtail.blocks.CharBlock", (), {"required": False}),
+                    8: (
+                        "wagtail.blocks.StructBlock",
+                        [[("quote", 5), ("author", 4), ("role", 7)]],
+                        {},
+                    ),
+                    9: ("wagtail.blocks.BlockQuoteBlock", (), {}),
+                    10: ("wagtail.blocks.RichTextBlock", (), {"required": False}),
+                    11: ("wagtail.blocks.URLBlock", (), {"required": True}),
+                    12: (
+                        "wagtail.blocks.StructBlock",
+                        [
+                            [
+                                ("title", 4),
+                                ("text", 10),
+                                ("button_text", 4),
+                                ("button_link", 11),
+                            ]
+                        ],
+                        {},
+                    ),
+                },
+            ),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.20 on 2026-10-18 05:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wagtailimages", "0027_image_description"),
+        ("home", "0008_landingpage_body_image_template"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImageMetadata",
+            fields=[
+                (
+                    "image",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="metadata",
+                        serialize=False,
+                        to="wagtailimages.image",
+                    ),
+                ),
+                ("file_hash", models.CharField(blank=True, max_length=40)),
+                ("placeholder", models.TextField(blank=True)),
+                ("dominant_color", models.CharField(blank=True, max_length=7)),
+            ],
+            options={
+                "verbose_name": "Image metadata",
+                "verbose_name_plural": "Image metadata",
+            },
+        ),
+    ]
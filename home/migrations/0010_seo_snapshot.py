@@ -0,0 +1,23 @@
+# Generated by Django 4.2.20 on 2026-10-18 05:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("home", "0009_imagemetadata"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="homepage",
+            name="seo_snapshot",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name="landingpage",
+            name="seo_snapshot",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
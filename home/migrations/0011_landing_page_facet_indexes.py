@@ -0,0 +1,33 @@
+# Generated by Django 4.2.20 on 2026-10-18 06:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("home", "0010_seo_snapshot"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="landingpage",
+            name="publish_date",
+            field=models.DateField(
+                blank=True,
+                db_index=True,
+                help_text="When this content was first published",
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="landingpage",
+            name="schema_org_type",
+            field=models.CharField(
+                db_index=True,
+                default="WebPage",
+                help_text="Type of Schema.org entity (e.g., WebPage, Article, Product)",
+                max_length=100,
+            ),
+        ),
+    ]
@@ -4,10 +4,29 @@ from wagtail.admin.panels import FieldPanel, MultiFieldPanel
 from wagtail.fields import RichTextField, StreamField
 from wagtail.images.blocks import ImageChooserBlock
 from wagtail.models import Page
+from wagtail.search import index
 from wagtail.snippets.models import register_snippet
 
+from home import cache as page_cache
+from home.fragment_cache import render_cached
+from home.images import prefetch_page_images
+from home.purge import add_cache_headers
+from home.renditions import picture_filter_specs
+from home.seo import home_page_seo, landing_page_seo
+from search.indexing import QueuedIndexMixin
+from search.ranking import BODY_BOOST, SECONDARY_TITLE_BOOST
+from search.text import RICH_TEXT, TEXT, join_text, stream_text
 
-class FeatureBlock(blocks.StructBlock):
+
+class CachedFragmentMixin:
+    """Render the block through the content-addressed fragment cache."""
+
+    def render(self, value, context=None):
+        render = super().render
+        return render_cached(self, value, lambda: render(value, context))
+
+
+class FeatureBlock(CachedFragmentMixin, blocks.StructBlock):
     icon = ImageChooserBlock(required=False)
     title = blocks.CharBlock(required=True)
     text = blocks.TextBlock(required=True)
@@ -18,7 +37,7 @@ class FeatureBlock(blocks.StructBlock):
         label = "Feature"
 
 
-class TestimonialBlock(blocks.StructBlock):
+class TestimonialBlock(CachedFragmentMixin, blocks.StructBlock):
     quote = blocks.TextBlock(required=True)
     author = blocks.CharBlock(required=True)
     role = blocks.CharBlock(required=False)
@@ -29,7 +48,7 @@ class TestimonialBlock(blocks.StructBlock):
         label = "Testimonial"
 
 
-class PartnerBlock(blocks.StructBlock):
+class PartnerBlock(CachedFragmentMixin, blocks.StructBlock):
     logo = ImageChooserBlock(required=True)
     name = blocks.CharBlock(required=True)
     url = blocks.URLBlock(required=False)
@@ -40,6 +59,60 @@ class PartnerBlock(blocks.StructBlock):
         label = "Partner"
 
 
+# Searchable children of the struct blocks, for search.text.stream_text().
+FEATURE_TEXT = {"title": TEXT, "text": TEXT}
+TESTIMONIAL_TEXT = {"quote": TEXT, "author": TEXT, "role": TEXT}
+PARTNER_TEXT = {"name": TEXT}
+
+
+class CachedPageMixin:
+    """
+    Answer conditional GETs without rendering, add shared-cache headers and
+    store rendered anonymous responses in the full-page cache.
+
+    Cache hits are replayed by ``home.middleware.PageCacheMiddleware`` before
+    the request reaches Wagtail; on a miss this mixin marks the response as
+    cacheable and the middleware stores it with its final headers.
+
+    Pages provide ``build_seo_snapshot()``; the stored ``seo_snapshot`` of the
+    published revision is exposed to templates as ``seo``.
+
+    ``image_filter_specs`` and ``picture_ladders`` list the rendition specs and
+    responsive picture ladders the page's templates use; the images and those
+    renditions are loaded in bulk before rendering.
+    """
+
+    image_filter_specs = []
+    picture_ladders = []
+
+    def get_context(self, request, *args, **kwargs):
+        context = super().get_context(request, *args, **kwargs)
+        # Previews render unpublished content, which has no snapshot yet.
+        if getattr(request, "is_preview", False) or not self.seo_snapshot:
+            context["seo"] = self.build_seo_snapshot()
+        else:
+            context["seo"] = self.seo_snapshot
+        specs = list(self.image_filter_specs)
+        for ladder in self.picture_ladders:
+            specs.extend(picture_filter_specs(ladder))
+        prefetch_page_images(self, specs)
+        return context
+
+    def serve(self, request, *args, **kwargs):
+        validators = None
+        response = None
+        if page_cache.is_anonymous_request(request):
+            validators = page_cache.page_validators(self)
+            response = page_cache.conditional_response(request, *validators)
+        if response is None:
+            response = super().serve(request, *args, **kwargs)
+        if validators:
+            page_cache.set_validators(response, *validators)
+        add_cache_headers(self, request, response)
+        page_cache.mark_cacheable(self, request)
+        return response
+
+
 @register_snippet
 class SEOSettings(models.Model):
     site_name = models.CharField(max_length=100, blank=True)
@@ -72,7 +145,34 @@ class SEOSettings(models.Model):
         verbose_name = "SEO Settings"
 
 
-class HomePage(Page):
+class ImageMetadata(models.Model):
+    """
+    Placeholder data for an image, computed once when the image is saved (or
+    by the ``backfill_image_metadata`` command) so pages never decode images.
+    """
+
+    image = models.OneToOneField(
+        "wagtailimages.Image",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="metadata",
+    )
+    # The image file the metadata was computed from.
+    file_hash = models.CharField(max_length=40, blank=True)
+    placeholder = models.TextField(blank=True)
+    dominant_color = models.CharField(max_length=7, blank=True)
+
+    class Meta:
+        verbose_name = "Image metadata"
+        verbose_name_plural = "Image metadata"
+
+
+class HomePage(QueuedIndexMixin, CachedPageMixin, Page):
+    picture_ladders = ["hero", "icon", "logo"]
+
+    def build_seo_snapshot(self):
+        return home_page_seo(self)
+
     # Hero Section
     hero_title = models.CharField(max_length=100, blank=True)
     hero_subtitle = models.CharField(max_length=200, blank=True)
@@ -147,6 +247,31 @@ class HomePage(Page):
     seo_description = models.TextField(
         blank=True, help_text="Custom SEO description (optional)"
     )
+    seo_snapshot = models.JSONField(default=dict, blank=True, editable=False)
+
+    search_fields = Page.search_fields + [
+        index.SearchField("hero_title", boost=SECONDARY_TITLE_BOOST),
+        index.SearchField("body_text", boost=BODY_BOOST),
+    ]
+
+    def body_text(self):
+        """Text of the page's sections, for the search index."""
+        return join_text(
+            self.hero_subtitle,
+            self.features_title,
+            stream_text(self.features, {"feature": FEATURE_TEXT}),
+            self.pricing_title,
+            self.pricing_subtitle,
+            self.pricing_description,
+            stream_text(self.pricing_features, {"feature": TEXT}),
+            self.newsletter_title,
+            self.newsletter_text,
+            self.partners_title,
+            self.partners_text,
+            stream_text(self.partners, {"partner": PARTNER_TEXT}),
+            self.testimonials_title,
+            stream_text(self.testimonials, {"testimonial": TESTIMONIAL_TEXT}),
+        )
 
     content_panels = Page.content_panels + [
         MultiFieldPanel(
@@ -213,12 +338,17 @@ class HomePage(Page):
         verbose_name = "Home Page"
 
 
-class LandingPage(Page):
+class LandingPage(QueuedIndexMixin, CachedPageMixin, Page):
     """
     A flexible landing page model for SEO-optimized content.
     This can be created as a child page of any page type.
     """
 
+    picture_ladders = ["content", "icon"]
+
+    def build_seo_snapshot(self):
+        return landing_page_seo(self)
+
     # Hero Section
     hero_title = models.CharField(max_length=100, blank=True)
     hero_subtitle = models.CharField(max_length=200, blank=True)
@@ -238,7 +368,7 @@ class LandingPage(Page):
         [
             ("heading", blocks.CharBlock(form_classname="full title")),
             ("paragraph", blocks.RichTextBlock()),
-            ("image", ImageChooserBlock()),
+            ("image", ImageChooserBlock(template="blocks/image_block.html")),
             ("feature", FeatureBlock()),
             ("testimonial", TestimonialBlock()),
             ("quote", blocks.BlockQuoteBlock()),
@@ -296,6 +426,7 @@ class LandingPage(Page):
     canonical_url = models.URLField(
         blank=True, help_text="Override canonical URL if this page has a preferred URL"
     )
+    seo_snapshot = models.JSONField(default=dict, blank=True, editable=False)
 
     # Schema.org structured data
     enable_schema_org = models.BooleanField(
@@ -304,10 +435,14 @@ class LandingPage(Page):
     schema_org_type = models.CharField(
         max_length=100,
         default="WebPage",
+        db_index=True,
         help_text="Type of Schema.org entity (e.g., WebPage, Article, Product)",
     )
     publish_date = models.DateField(
-        null=True, blank=True, help_text="When this content was first published"
+        null=True,
+        blank=True,
+        db_index=True,
+        help_text="When this content was first published",
     )
     update_date = models.DateField(
         null=True,
@@ -330,6 +465,28 @@ class LandingPage(Page):
         default=True, help_text="Show social sharing buttons"
     )
 
+    search_fields = Page.search_fields + [
+        index.SearchField("hero_title", boost=SECONDARY_TITLE_BOOST),
+        index.SearchField("og_title", boost=SECONDARY_TITLE_BOOST),
+        index.SearchField("intro", boost=BODY_BOOST),
+        index.SearchField("body_text", boost=BODY_BOOST),
+    ]
+
+    body_text_blocks = {
+        "heading": TEXT,
+        "paragraph": RICH_TEXT,
+        "feature": FEATURE_TEXT,
+        "testimonial": TESTIMONIAL_TEXT,
+        "quote": TEXT,
+        "cta": {"title": TEXT, "text": RICH_TEXT, "button_text": TEXT},
+    }
+
+    def body_text(self):
+        """Text of the hero subtitle and body blocks, for the search index."""
+        return join_text(
+            self.hero_subtitle, stream_text(self.body, self.body_text_blocks)
+        )
+
     content_panels = Page.content_panels + [
         MultiFieldPanel(
             [
@@ -0,0 +1,100 @@
+"""
+Low-quality image placeholders and dominant colours.
+
+Both are computed once per image file and stored in ``ImageMetadata``;
+rendering only reads the stored values.
+"""
+import base64
+import io
+import logging
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from PIL import Image as PILImage
+from PIL import ImageFilter, ImageOps
+
+logger = logging.getLogger(__name__)
+
+
+def _open(image):
+    with image.open_file() as f:
+        pil_image = PILImage.open(f)
+        # Let JPEG decode at a reduced scale; we only need a thumbnail.
+        pil_image.draft("RGB", (256, 256))
+        pil_image = ImageOps.exif_transpose(pil_image)
+        return pil_image.convert("RGB")
+
+
+def dominant_color(pil_image):
+    """Return the most common colour of a quantised thumbnail as ``#rrggbb``."""
+    thumbnail = pil_image.copy()
+    thumbnail.thumbnail((64, 64))
+    quantized = thumbnail.quantize(colors=5)
+    _count, index = max(quantized.getcolors())
+    r, g, b = quantized.getpalette()[index * 3 : index * 3 + 3]
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+def placeholder_data_uri(pil_image):
+    """Return a tiny blurred JPEG of the image as a base64 data URI."""
+    size = getattr(settings, "IMAGE_PLACEHOLDER_SIZE", 16)
+    thumbnail = pil_image.copy()
+    thumbnail.thumbnail((size, size))
+    thumbnail = thumbnail.filter(ImageFilter.GaussianBlur(1))
+    buffer = io.BytesIO()
+    thumbnail.save(buffer, "JPEG", quality=50)
+    encoded = base64.b64encode(buffer.getvalue()).decode("ascii")
+    return f"data:image/jpeg;base64,{encoded}"
+
+
+def update_image_metadata(image, force=False):
+    """
+    Compute and store the image's placeholder and dominant colour.
+
+    Skipped when the stored metadata was computed from the current file,
+    unless ``force`` is set. Returns the ``ImageMetadata``, or ``None`` if the
+    file could not be read.
+    """
+    from home.models import ImageMetadata
+
+    file_hash = image.file_hash or image.file.name
+    metadata = get_image_metadata(image)
+    if metadata is not None and metadata.file_hash == file_hash and not force:
+        return metadata
+
+    try:
+        pil_image = _open(image)
+    except Exception as e:
+        logger.warning("Could not compute metadata for image %s: %s", image.pk, e)
+        return None
+
+    metadata, _created = ImageMetadata.objects.update_or_create(
+        image=image,
+        defaults={
+            "file_hash": file_hash,
+            "placeholder": placeholder_data_uri(pil_image),
+            "dominant_color": dominant_color(pil_image),
+        },
+    )
+    return metadata
+
+
+def get_image_metadata(image):
+    """Return the image's ``ImageMetadata``, or ``None`` if not computed yet."""
+    try:
+        return image.metadata
+    except ObjectDoesNotExist:
+        return None
+
+
+def placeholder_style(image):
+    """Return an inline style painting the placeholder behind the image."""
+    metadata = get_image_metadata(image)
+    if metadata is None:
+        return ""
+    style = f"background-color: {metadata.dominant_color};"
+    if metadata.placeholder:
+        style += (
+            f" background-image: url({metadata.placeholder}); background-size: cover;"
+        )
+    return style
@@ -0,0 +1,143 @@
+"""
+Surrogate-key cache headers and the purge dispatcher for shared caches.
+
+Page responses carry a surrogate-key header naming every object they were
+rendered from. When one of those objects changes, its key is queued and sent
+to the configured purge endpoint once the surrounding transaction commits.
+"""
+import logging
+import threading
+import time
+
+import requests
+from django.conf import settings
+from django.db import transaction
+
+from home.cache import is_anonymous_request
+from home.images import referenced_image_ids
+
+logger = logging.getLogger(__name__)
+
+SEO_SETTINGS_KEY = "seo-settings"
+
+# Status codes worth retrying: throttling and transient upstream failures.
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def page_key(page_id):
+    return f"page-{page_id}"
+
+
+def image_key(image_id):
+    return f"image-{image_id}"
+
+
+def page_surrogate_keys(page):
+    """Return the surrogate keys for everything a page's response depends on."""
+    keys = [page_key(page.pk)]
+    keys.extend(
+        page_key(ancestor_id)
+        for ancestor_id in page.get_ancestors().values_list("pk", flat=True)
+    )
+    keys.extend(image_key(image_id) for image_id in sorted(referenced_image_ids(page)))
+    keys.append(SEO_SETTINGS_KEY)
+    return keys
+
+
+def add_cache_headers(page, request, response):
+    """
+    Add shared-cache headers to a page response.
+
+    Requests carrying a session cookie may render user-specific content (the
+    Wagtail userbar, for instance), so they are marked private.
+    """
+    if not is_anonymous_request(request):
+        response["Cache-Control"] = "private, no-cache"
+        return
+
+    response["Cache-Control"] = (
+        f"public, max-age=0, s-maxage={settings.PAGE_CACHE_S_MAXAGE}, "
+        f"stale-while-revalidate={settings.PAGE_CACHE_STALE_WHILE_REVALIDATE}"
+    )
+    response["X-Accel-Expires"] = str(settings.PAGE_CACHE_PROXY_MAXAGE)
+    response[settings.SURROGATE_KEY_HEADER] = " ".join(page_surrogate_keys(page))
+
+
+class PurgeDispatcher:
+    """
+    Collect surrogate keys and send them to the purge endpoint in batches.
+
+    Keys queued within one transaction are de-duplicated and sent together
+    after it commits. Each batch is retried with exponential backoff on
+    connection errors and retryable status codes.
+    """
+
+    def __init__(self):
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def queue(self, keys):
+        if not getattr(settings, "PURGE_URL", ""):
+            return
+        with self._lock:
+            self._pending.update(keys)
+        # Every queue() registers its own callback: a flush finding nothing
+        # pending is free, and no state is left behind by a rolled back
+        # transaction whose callbacks never run.
+        transaction.on_commit(self._flush_on_commit)
+
+    def _flush_on_commit(self):
+        if not self._pending:
+            return
+        if settings.PURGE_ASYNC:
+            threading.Thread(target=self.flush, daemon=True).start()
+        else:
+            self.flush()
+
+    def flush(self):
+        """Send every pending key. Returns the number of keys purged."""
+        with self._lock:
+            keys = sorted(self._pending)
+            self._pending.clear()
+
+        purged = 0
+        batch_size = settings.PURGE_BATCH_SIZE
+        for start in range(0, len(keys), batch_size):
+            batch = keys[start : start + batch_size]
+            if self._send(batch):
+                purged += len(batch)
+        return purged
+
+    def _send(self, keys):
+        headers = {}
+        if settings.PURGE_TOKEN:
+            headers[settings.PURGE_AUTH_HEADER] = settings.PURGE_TOKEN
+
+        for attempt in range(settings.PURGE_MAX_RETRIES + 1):
+            if attempt:
+                time.sleep(settings.PURGE_RETRY_BACKOFF * 2 ** (attempt - 1))
+            try:
+                response = requests.post(
+                    settings.PURGE_URL,
+                    json={"surrogate_keys": keys},
+                    headers=headers,
+                    timeout=settings.PURGE_TIMEOUT,
+                )
+            except requests.RequestException as e:
+                logger.warning("Purge request failed (attempt %d): %s", attempt + 1, e)
+                continue
+            if response.status_code < 400:
+                return True
+            if response.status_code not in RETRYABLE_STATUS_CODES:
+                break
+            logger.warning(
+                "Purge request returned %d (attempt %d)",
+                response.status_code,
+                attempt + 1,
+            )
+
+        logger.error("Giving up purging %d surrogate keys", len(keys))
+        return False
+
+
+purge_dispatcher = PurgeDispatcher()
@@ -0,0 +1,232 @@
+"""
+Rendition filter specs: responsive picture ladders, discovery of the specs and
+images the site renders, and pre-generation outside of the request cycle.
+"""
+import functools
+import os
+import re
+import shlex
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.template import engines
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+from PIL import features
+from wagtail.images import get_image_model
+from wagtail.images.models import Filter
+from wagtail.images.shortcuts import get_renditions_or_not_found
+
+from home.images import referenced_image_ids
+
+# Matches ``{% image <expr> <spec> [<spec> ...] [attr="..."] [as name] %}``.
+IMAGE_TAG_RE = re.compile(r"{%\s*image\s+(?P<args>.+?)\s*%}")
+
+# Matches ``{% responsive_picture|lazy_picture <expr> "<ladder>" ... %}``.
+PICTURE_TAG_RE = re.compile(
+    r"{%\s*(?:responsive|lazy)_picture\s+\S+\s+[\"'](?P<ladder>[\w-]+)[\"']"
+)
+
+# <source> formats in the order browsers should try them.
+PICTURE_SOURCE_TYPES = {"avif": "image/avif", "webp": "image/webp"}
+
+
+# Responsive pictures
+
+
+@functools.lru_cache
+def _format_supported(fmt):
+    if fmt == "avif" and not features.check("avif"):
+        try:
+            import pillow_avif  # noqa: F401 (registers the AVIF plugin)
+        except ImportError:
+            return False
+        return True
+    return features.check(fmt)
+
+
+def picture_formats():
+    """Return the configured <source> formats that Pillow can encode."""
+    configured = getattr(settings, "RESPONSIVE_IMAGE_FORMATS", [])
+    return [
+        fmt for fmt in PICTURE_SOURCE_TYPES if fmt in configured and _format_supported(fmt)
+    ]
+
+
+def get_ladder(name):
+    try:
+        return settings.RESPONSIVE_IMAGE_LADDERS[name]
+    except KeyError:
+        raise ImproperlyConfigured(f"Unknown responsive image ladder {name!r}")
+
+
+def picture_filter_specs(name):
+    """
+    Return every filter spec a ladder renders: each of its specs in the
+    image's own format (the <img> fallback) and in each <source> format.
+    """
+    specs = list(get_ladder(name)["specs"])
+    for fmt in picture_formats():
+        specs.extend(f"{spec}|format-{fmt}" for spec in get_ladder(name)["specs"])
+    return specs
+
+
+def _srcset(renditions):
+    by_width = {}
+    for rendition in renditions:
+        by_width.setdefault(rendition.width, rendition)
+    return ", ".join(f"{r.url} {width}w" for width, r in sorted(by_width.items()))
+
+
+def render_picture(image, name, attrs=None):
+    """
+    Render ``image`` as a <picture> using the named ladder.
+
+    Each <source> format gets a srcset over the ladder's specs. The <img>
+    fallback keeps the image's own format and uses the ladder's first spec as
+    its ``src``. Missing renditions are generated (and cached) on the way.
+    """
+    ladder = get_ladder(name)
+    renditions = get_renditions_or_not_found(image, picture_filter_specs(name))
+    sizes = ladder.get("sizes")
+
+    sources = format_html_join(
+        "",
+        '<source type="{}" srcset="{}"{}>',
+        (
+            (
+                PICTURE_SOURCE_TYPES[fmt],
+                _srcset(renditions[f"{spec}|format-{fmt}"] for spec in ladder["specs"]),
+                format_html(' sizes="{}"', sizes) if sizes else "",
+            )
+            for fmt in picture_formats()
+        ),
+    )
+
+    fallback = [renditions[spec] for spec in ladder["specs"]]
+    img_attrs = {}
+    if len(fallback) > 1:
+        img_attrs["srcset"] = _srcset(fallback)
+        if sizes:
+            img_attrs["sizes"] = sizes
+    img_attrs.update(attrs or {})
+    return mark_safe(f"<picture>{sources}{fallback[0].img_tag(img_attrs)}</picture>")
+
+
+# Discovery and pre-generation
+
+
+def project_template_dirs():
+    """Return the template directories that belong to this project."""
+    base_dir = os.path.realpath(settings.BASE_DIR)
+    dirs = []
+    for engine in engines.all():
+        for directory in getattr(engine, "template_dirs", []):
+            directory = os.path.realpath(directory)
+            if directory.startswith(base_dir + os.sep) and "site-packages" not in directory:
+                dirs.append(directory)
+    return dirs
+
+
+def parse_image_tag(args):
+    """Return the filter spec of an ``{% image %}`` tag's arguments, or ``None``."""
+    bits = shlex.split(args)[1:]
+    specs = []
+    for bit in bits:
+        if bit == "as" or "=" in bit:
+            break
+        specs.append(bit)
+    if not specs:
+        return None
+    return "|".join(specs)
+
+
+def template_filter_specs(template_dirs=None):
+    """
+    Return every filter spec used by ``{% image %}``, ``{% responsive_picture %}``
+    and ``{% lazy_picture %}`` tags in the templates.
+    """
+    specs = set()
+    for directory in template_dirs or project_template_dirs():
+        for root, _dirs, files in os.walk(directory):
+            for filename in files:
+                if not filename.endswith((".html", ".txt", ".xml")):
+                    continue
+                with open(os.path.join(root, filename), encoding="utf-8") as f:
+                    source = f.read()
+                for match in IMAGE_TAG_RE.finditer(source):
+                    spec = parse_image_tag(match.group("args"))
+                    if spec:
+                        specs.add(spec)
+                for match in PICTURE_TAG_RE.finditer(source):
+                    specs.update(picture_filter_specs(match.group("ladder")))
+    return specs
+
+
+def rendition_filter_specs(extra=()):
+    """Return the template filter specs plus the configured and given extras."""
+    specs = template_filter_specs()
+    specs.update(getattr(settings, "RENDITION_EXTRA_FILTER_SPECS", []))
+    specs.update(extra)
+    return sorted(specs)
+
+
+def live_image_ids():
+    """Return the ids of images referenced by live pages and the SEO settings."""
+    from home.models import HomePage, LandingPage, SEOSettings
+
+    image_ids = set()
+    for model in (HomePage, LandingPage):
+        for page in model.objects.live().iterator():
+            image_ids.update(referenced_image_ids(page))
+    image_ids.update(
+        SEOSettings.objects.exclude(default_image=None).values_list(
+            "default_image_id", flat=True
+        )
+    )
+    return image_ids
+
+
+def missing_renditions(image_ids, filter_specs):
+    """
+    Return ``{image_id: [spec, ...]}`` for renditions that do not exist yet.
+
+    Renditions are matched on the image's current focal point as well as the
+    spec, the same way Wagtail looks them up when rendering.
+    """
+    image_model = get_image_model()
+    rendition_model = image_model.get_rendition_model()
+    filters = [Filter(spec) for spec in filter_specs]
+
+    existing = set(
+        rendition_model.objects.filter(
+            image_id__in=image_ids, filter_spec__in=filter_specs
+        ).values_list("image_id", "filter_spec", "focal_point_key")
+    )
+
+    missing = {}
+    for image in image_model.objects.filter(pk__in=image_ids).order_by("pk"):
+        specs = [
+            f.spec
+            for f in filters
+            if (image.pk, f.spec, f.get_cache_key(image)) not in existing
+        ]
+        if specs:
+            missing[image.pk] = specs
+    return missing
+
+
+def generate_renditions(image_id, filter_specs):
+    """
+    Create the given renditions of one image.
+
+    Returns ``(image_id, created, error)``; failures are reported rather than
+    raised so one broken source file does not stop a batch.
+    """
+    image_model = get_image_model()
+    try:
+        image = image_model.objects.get(pk=image_id)
+        image.get_renditions(*filter_specs)
+    except Exception as e:
+        return image_id, 0, f"{type(e).__name__}: {e}"
+    return image_id, len(filter_specs), None
@@ -0,0 +1,165 @@
+"""
+Resolved SEO metadata and schema.org JSON-LD for pages.
+
+The fallback chains (og_title → title, twitter_description → og_description
+→ search_description, ...) and the social image renditions are resolved once
+when a revision is published and stored on the page as ``seo_snapshot``, so
+rendering the <head> reads plain values. Site-wide fallbacks (site name and
+description) are left to the template so that editing ``SEOSettings`` does
+not require rebuilding every snapshot.
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils.safestring import mark_safe
+from wagtail.images.shortcuts import get_rendition_or_not_found
+
+SOCIAL_IMAGE_SPEC = "width-1200"
+
+# Characters that could close the <script> element or open an HTML comment.
+_JSON_SCRIPT_ESCAPES = {
+    ord(">"): "\\u003E",
+    ord("<"): "\\u003C",
+    ord("&"): "\\u0026",
+}
+
+
+def _first(*values):
+    return next((value for value in values if value), "")
+
+
+def _compact(data):
+    return {key: value for key, value in data.items() if value}
+
+
+def _social_image(image):
+    if image is None:
+        return None
+    rendition = get_rendition_or_not_found(image, SOCIAL_IMAGE_SPEC)
+    return {
+        "id": image.pk,
+        "url": rendition.url,
+        "width": rendition.width,
+        "height": rendition.height,
+    }
+
+
+def landing_page_seo(page):
+    """Return the SEO snapshot of a ``LandingPage``."""
+    og_title = _first(page.og_title, page.seo_title, page.title)
+    description = _first(page.search_description, page.og_description)
+    og_image = _social_image(page.og_image)
+
+    modified = page.update_date or page.publish_date
+    json_ld = None
+    if page.enable_schema_org:
+        json_ld = _compact(
+            {
+                "@context": "https://schema.org",
+                "@type": page.schema_org_type,
+                "headline": og_title,
+                "description": description,
+                "url": page.get_full_url(),
+                "image": og_image["url"] if og_image else None,
+                "datePublished": (
+                    page.publish_date.isoformat() if page.publish_date else None
+                ),
+                "dateModified": modified.isoformat() if modified else None,
+            }
+        )
+
+    return _compact(
+        {
+            "title": og_title,
+            "description": description,
+            "og_title": og_title,
+            "og_description": _first(page.og_description, page.search_description),
+            "og_image": og_image,
+            "twitter_title": _first(page.twitter_title, og_title),
+            "twitter_description": _first(
+                page.twitter_description, page.og_description, page.search_description
+            ),
+            "twitter_image": _social_image(page.twitter_image),
+            "canonical_url": page.canonical_url,
+            "keywords": page.meta_keywords,
+            "json_ld": json_ld,
+        }
+    )
+
+
+def home_page_seo(page):
+    """Return the SEO snapshot of a ``HomePage``."""
+    # The home page's <title> is the site name unless an SEO title is set.
+    title = _first(page.custom_seo_title, page.seo_title)
+    og_title = _first(title, page.title)
+    description = _first(page.seo_description, page.search_description)
+    url = page.get_full_url()
+
+    json_ld = _compact(
+        {
+            "@context": "https://schema.org",
+            "@type": "WebSite",
+            "name": "Shoshin AI",
+            "url": url,
+            "description": _first(page.seo_description, page.hero_subtitle),
+            "potentialAction": (
+                {
+                    "@type": "SearchAction",
+                    "target": f"{url.rstrip('/')}/search/?query={{search_term_string}}",
+                    "query-input": "required name=search_term_string",
+                }
+                if url
+                else None
+            ),
+        }
+    )
+
+    return _compact(
+        {
+            "title": title,
+            "description": description,
+            "og_title": og_title,
+            "og_description": description,
+            "twitter_title": og_title,
+            "twitter_description": description,
+            "json_ld": json_ld,
+        }
+    )
+
+
+def update_seo_snapshot(page):
+    """Rebuild and store the page's snapshot without creating a revision."""
+    page.seo_snapshot = page.build_seo_snapshot()
+    type(page).objects.filter(pk=page.pk).update(seo_snapshot=page.seo_snapshot)
+
+
+def refresh_seo_snapshots(pages):
+    """Rebuild the snapshots of the live pages among ``pages`` that have one."""
+    for page in pages:
+        page = page.specific
+        if page.live and hasattr(page, "build_seo_snapshot"):
+            update_seo_snapshot(page)
+
+
+def pages_using_social_image(image_id):
+    """Return the live pages whose snapshot embeds the given image."""
+    from home.models import LandingPage
+
+    return LandingPage.objects.live().filter(
+        Q(seo_snapshot__og_image__id=image_id)
+        | Q(seo_snapshot__twitter_image__id=image_id)
+    )
+
+
+def json_ld_script(data, url=None):
+    """
+    Render ``data`` as an ``application/ld+json`` script element.
+
+    The JSON is escaped so that no value can close the element. ``url`` fills
+    in the document URL when the snapshot could not resolve one.
+    """
+    if url and "url" not in data:
+        data = {**data, "url": url}
+    payload = json.dumps(data, cls=DjangoJSONEncoder).translate(_JSON_SCRIPT_ESCAPES)
+    return mark_safe(f'<script type="application/ld+json">{payload}</script>')
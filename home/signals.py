@@ -0,0 +1,83 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from wagtail.images import get_image_model
+from wagtail.models import Page
+from wagtail.signals import page_published, page_unpublished, post_page_move
+
+from home.cache import (
+    invalidate_image,
+    invalidate_pages,
+    invalidate_seo_settings,
+    page_lineage_ids,
+)
+from home.models import ImageMetadata, SEOSettings
+from home.placeholders import update_image_metadata
+from home.purge import SEO_SETTINGS_KEY, image_key, page_key, purge_dispatcher
+from home.seo import pages_using_social_image, refresh_seo_snapshots
+from home.static_export import static_export_queue
+
+
+def refresh_page_seo_snapshot(sender, instance, **kwargs):
+    """Resolve the SEO metadata of a published or moved page and its subtree."""
+    refresh_seo_snapshots([instance])
+    if kwargs.get("url_path_before") is not None:
+        refresh_seo_snapshots(instance.get_descendants().live().specific())
+
+
+def refresh_image_seo_snapshots(sender, instance, **kwargs):
+    refresh_seo_snapshots(pages_using_social_image(instance.pk))
+
+
+def invalidate_page_cache(sender, instance, **kwargs):
+    """Drop cached responses affected by a change to ``instance``."""
+    page_ids = page_lineage_ids(instance)
+    invalidate_pages(page_ids)
+    purge_dispatcher.queue([page_key(page_id) for page_id in page_ids])
+
+
+def invalidate_deleted_page_cache(sender, instance, **kwargs):
+    if isinstance(instance, Page):
+        invalidate_page_cache(sender, instance)
+        export_static_pages(sender, instance)
+
+
+def export_static_pages(sender, instance, **kwargs):
+    """Re-export the page and the pages whose breadcrumbs or listings show it."""
+    static_export_queue.queue(page_lineage_ids(instance))
+
+
+def invalidate_seo_settings_cache(sender, instance, **kwargs):
+    invalidate_seo_settings()
+    purge_dispatcher.queue([SEO_SETTINGS_KEY])
+
+
+def invalidate_image_cache(sender, instance, **kwargs):
+    invalidate_image(instance.pk)
+    purge_dispatcher.queue([image_key(instance.pk)])
+
+
+def update_image_metadata_on_save(sender, instance, **kwargs):
+    """Compute the placeholder once the uploaded file is committed."""
+    transaction.on_commit(lambda: update_image_metadata(instance))
+
+
+def register_signal_handlers():
+    # Snapshots are refreshed before caches are invalidated so that the next
+    # render already sees them.
+    page_published.connect(refresh_page_seo_snapshot)
+    post_page_move.connect(refresh_page_seo_snapshot)
+    post_save.connect(refresh_image_seo_snapshots, sender=get_image_model())
+    post_delete.connect(refresh_image_seo_snapshots, sender=get_image_model())
+    page_published.connect(invalidate_page_cache)
+    page_unpublished.connect(invalidate_page_cache)
+    post_page_move.connect(invalidate_page_cache)
+    page_published.connect(export_static_pages)
+    page_unpublished.connect(export_static_pages)
+    post_page_move.connect(export_static_pages)
+    post_delete.connect(invalidate_deleted_page_cache)
+    post_save.connect(invalidate_image_cache, sender=get_image_model())
+    post_delete.connect(invalidate_image_cache, sender=get_image_model())
+    post_save.connect(update_image_metadata_on_save, sender=get_image_model())
+    post_save.connect(invalidate_image_cache, sender=ImageMetadata)
+    post_save.connect(invalidate_seo_settings_cache, sender=SEOSettings)
+    post_delete.connect(invalidate_seo_settings_cache, sender=SEOSettings)
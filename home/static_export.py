@@ -0,0 +1,339 @@
+"""
+Static HTML export of the marketing site.
+
+Every live, public ``HomePage`` and ``LandingPage`` plus the search shell and
+the 404 and 500 pages are rendered through the normal request stack into a
+directory tree that can be served from static storage. Root-relative static
+and media URLs are rewritten to ``STATIC_EXPORT_ASSET_URL`` when it is set,
+and otherwise the referenced files are copied into the tree.
+
+A manifest records the hash of every exported file, so files whose content
+did not change are never rewritten, and files of pages that were unpublished
+or moved are removed. With ``STATIC_EXPORT_ON_PUBLISH`` enabled, publishing a
+page re-exports just that page and the pages in its lineage.
+"""
+import hashlib
+import json
+import logging
+import os
+import posixpath
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.test import Client, RequestFactory
+from django.views.defaults import server_error
+from wagtail.models import Page, Site
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+# A path no page lives at, requested to render the site's 404 page.
+NOT_FOUND_PATH = "/__static-export-not-found__/"
+
+SEARCH_TARGET = ("search", None)
+NOT_FOUND_TARGET = ("404", None)
+SERVER_ERROR_TARGET = ("500", None)
+
+# Serialises exports within a process so manifest updates are not lost.
+_export_lock = threading.Lock()
+
+
+def export_root():
+    return settings.STATIC_EXPORT_ROOT
+
+
+def exportable_page_ids():
+    """Return the ids of the live, public pages that are exported."""
+    from home.models import HomePage, LandingPage
+
+    page_ids = []
+    for model in (HomePage, LandingPage):
+        page_ids.extend(model.objects.live().public().values_list("pk", flat=True))
+    return sorted(page_ids)
+
+
+# Manifest
+
+
+def load_manifest(root):
+    try:
+        with open(os.path.join(root, MANIFEST_NAME), encoding="utf-8") as f:
+            return json.load(f)["files"]
+    except FileNotFoundError:
+        return {}
+
+
+def save_manifest(root, files):
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(root, MANIFEST_NAME)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump({"files": files}, f, indent=1, sort_keys=True)
+    os.replace(f"{path}.tmp", path)
+
+
+def _sha256(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def write_if_changed(root, path, content, old_hash):
+    """Write ``content`` to ``path`` unless it already has that content."""
+    digest = _sha256(content)
+    full_path = os.path.join(root, path)
+    if digest == old_hash and os.path.exists(full_path):
+        return digest, False
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    with open(f"{full_path}.tmp", "wb") as f:
+        f.write(content)
+    os.replace(f"{full_path}.tmp", full_path)
+    return digest, True
+
+
+def _remove(root, path):
+    try:
+        os.remove(os.path.join(root, path))
+    except FileNotFoundError:
+        pass
+
+
+# Rendering
+
+
+def _get(path):
+    # A fresh client per render, so no cookie set by one response (which would
+    # make the next request non-anonymous) leaks into another page.
+    site = Site.objects.filter(is_default_site=True).first()
+    host = site.hostname if site else "localhost"
+    if site and site.port not in (80, 443):
+        host = f"{host}:{site.port}"
+    client = Client(HTTP_HOST=host, raise_request_exception=False)
+    # The scheme is set per request: Client() has no option for it.
+    return client.get(path, secure=bool(site and site.port == 443))
+
+
+def page_output_path(page):
+    """Return the export path of a page, or ``None`` if it has no URL."""
+    url_parts = page.get_url_parts()
+    if url_parts is None:
+        return None
+    page_path = url_parts[2].strip("/")
+    return posixpath.join(page_path, "index.html") if page_path else "index.html"
+
+
+def render_target(target):
+    """Return ``(path, html)`` for an export target, or ``None`` to skip it."""
+    kind, page_id = target
+    if kind == "page":
+        page = Page.objects.filter(pk=page_id).live().public().first()
+        path = page and page_output_path(page)
+        if path is None:
+            return None
+        response = _get(page.url)
+        if response.status_code != 200:
+            logger.warning("Page %s returned %d", page_id, response.status_code)
+            return None
+        return path, response.content
+    if kind == "search":
+        response = _get("/search/")
+        return "search/index.html", response.content
+    if kind == "404":
+        return "404.html", _get(NOT_FOUND_PATH).content
+    request = RequestFactory().get("/")
+    return "500.html", server_error(request).content
+
+
+def _asset_url_re():
+    prefixes = [
+        re.escape(prefix)
+        for prefix in (settings.STATIC_URL, settings.MEDIA_URL)
+        if prefix and prefix.startswith("/")
+    ]
+    if not prefixes:
+        return None
+    # Root-relative URLs in attributes, srcsets and CSS url()s.
+    return re.compile(
+        r"(?<=[\"'\s,(=])(?P<url>(?:%s)[^\"'\s,)?#]+)" % "|".join(prefixes)
+    )
+
+
+def rewrite_asset_urls(html):
+    """
+    Point static and media URLs at ``STATIC_EXPORT_ASSET_URL``.
+
+    Returns the rewritten HTML and the root-relative asset URLs it references.
+    """
+    pattern = _asset_url_re()
+    if pattern is None:
+        return html, set()
+    text = html.decode("utf-8")
+    assets = set(match.group("url") for match in pattern.finditer(text))
+    asset_url = settings.STATIC_EXPORT_ASSET_URL.rstrip("/")
+    if asset_url:
+        text = pattern.sub(lambda match: asset_url + match.group("url"), text)
+    return text.encode("utf-8"), assets
+
+
+def export_target(target, root, old_hashes):
+    """Render one target and write it if changed. Runs in worker processes."""
+    rendered = render_target(target)
+    if rendered is None:
+        return None
+    path, html = rendered
+    html, assets = rewrite_asset_urls(html)
+    digest, written = write_if_changed(root, path, html, old_hashes.get(path))
+    return {
+        "path": path,
+        "sha256": digest,
+        "page": target[1],
+        "written": written,
+        "assets": sorted(assets),
+    }
+
+
+def _open_asset(url):
+    if url.startswith(settings.STATIC_URL):
+        name = url[len(settings.STATIC_URL) :]
+        if staticfiles_storage.exists(name):
+            with staticfiles_storage.open(name) as f:
+                return f.read()
+        found = finders.find(name)
+        if found is None:
+            raise FileNotFoundError(name)
+        with open(found, "rb") as f:
+            return f.read()
+    with default_storage.open(url[len(settings.MEDIA_URL) :]) as f:
+        return f.read()
+
+
+def copy_assets(root, urls, manifest):
+    """Copy referenced static and media files into the tree. Returns the count written."""
+    written = 0
+    for url in sorted(urls):
+        path = url.lstrip("/")
+        try:
+            content = _open_asset(url)
+        except (FileNotFoundError, OSError):
+            logger.warning("Asset %s not found", url)
+            continue
+        entry = manifest.get(path, {})
+        digest, changed = write_if_changed(root, path, content, entry.get("sha256"))
+        manifest[path] = {"sha256": digest, "asset": True}
+        written += changed
+    return written
+
+
+# Export
+
+
+def _run(targets, root, old_hashes, workers):
+    if workers <= 1 or len(targets) <= 1:
+        for target in targets:
+            yield export_target(target, root, old_hashes)
+        return
+
+    # Forked workers must open their own database connections.
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(
+            export_target,
+            targets,
+            [root] * len(targets),
+            [old_hashes] * len(targets),
+        )
+
+
+def export_site(page_ids=None, workers=1, root=None):
+    """
+    Export the site, or only the given pages when ``page_ids`` is set.
+
+    Returns ``{"rendered": n, "written": n, "removed": n, "assets": n}``.
+    """
+    root = root or export_root()
+    manifest = load_manifest(root)
+    full = page_ids is None
+    if full:
+        page_ids = exportable_page_ids()
+        targets = [SEARCH_TARGET, NOT_FOUND_TARGET, SERVER_ERROR_TARGET]
+    else:
+        targets = []
+    targets.extend(("page", page_id) for page_id in sorted(page_ids))
+
+    old_hashes = {path: entry["sha256"] for path, entry in manifest.items()}
+    rendered = {}
+    assets = set()
+    stats = {"rendered": 0, "written": 0, "removed": 0, "assets": 0}
+    for result in _run(targets, root, old_hashes, workers):
+        if result is None:
+            continue
+        rendered[result["path"]] = {"sha256": result["sha256"], "page": result["page"]}
+        assets.update(result["assets"])
+        stats["rendered"] += 1
+        stats["written"] += result["written"]
+
+    # Drop files of pages that were exported before but were not rendered to
+    # the same path now: unpublished, made private, moved or deleted pages.
+    page_ids = set(page_ids)
+    for path, entry in list(manifest.items()):
+        if path in rendered or entry.get("asset"):
+            continue
+        if full or entry.get("page") in page_ids:
+            _remove(root, path)
+            del manifest[path]
+            stats["removed"] += 1
+
+    manifest.update(rendered)
+    if not settings.STATIC_EXPORT_ASSET_URL:
+        stats["assets"] = copy_assets(root, assets, manifest)
+    save_manifest(root, manifest)
+    return stats
+
+
+class StaticExportQueue:
+    """
+    Collect pages changed within a transaction and re-export them after it
+    commits, in a background thread when ``STATIC_EXPORT_ASYNC`` is set.
+    """
+
+    def __init__(self):
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def queue(self, page_ids):
+        if not getattr(settings, "STATIC_EXPORT_ON_PUBLISH", False):
+            return
+        with self._lock:
+            self._pending.update(page_ids)
+        # Every queue() registers its own callback: a flush finding nothing
+        # pending is free, and no state is left behind by a rolled back
+        # transaction whose callbacks never run.
+        transaction.on_commit(self._flush_on_commit)
+
+    def _flush_on_commit(self):
+        if not self._pending:
+            return
+        if settings.STATIC_EXPORT_ASYNC:
+            threading.Thread(target=self.flush, daemon=True).start()
+        else:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            page_ids = set(self._pending)
+            self._pending.clear()
+        if not page_ids:
+            return None
+        try:
+            with _export_lock:
+                return export_site(page_ids)
+        except Exception:
+            logger.exception("Static export of pages %s failed", sorted(page_ids))
+            return None
+
+
+static_export_queue = StaticExportQueue()
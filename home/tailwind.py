@@ -0,0 +1,855 @@
+"""
+Build-time Tailwind CSS for the site.
+
+The templates use Tailwind utility classes. Rather than compiling them in the
+browser with the Tailwind CDN script, the ``build_css`` command scans the
+template (and script) sources for class names, generates the rules of the
+utilities actually used, and writes one minified stylesheet with a content
+hash in its name plus, per page template, the subset of rules that template
+and the templates it extends use. ``{% site_css %}`` inlines that critical
+subset and loads the full stylesheet without blocking rendering.
+
+The generator covers the subset of Tailwind v3 the site uses (spacing,
+sizing, colours with opacity, typography, flexbox and grid, borders,
+shadows, gradients, transforms and transitions) with the responsive, hover
+and focus variants, and needs no Node toolchain or network access.
+"""
+import functools
+import hashlib
+import json
+import logging
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+
+logger = logging.getLogger(__name__)
+
+STYLESHEET_PREFIX = "css/site"
+MANIFEST_PATH = "css/site.json"
+
+# Theme, matching the tailwind.config the CDN script was given.
+FONT_SANS = "Inter, ui-sans-serif, system-ui, sans-serif"
+
+_PALETTE = {
+    "gray": "f9fafb f3f4f6 e5e7eb d1d5db 9ca3af 6b7280 4b5563 374151 1f2937 111827",
+    "red": "fef2f2 fee2e2 fecaca fca5a5 f87171 ef4444 dc2626 b91c1c 991b1b 7f1d1d",
+    "yellow": "fefce8 fef9c3 fef08a fde047 facc15 eab308 ca8a04 a16207 854d0e 713f12",
+    "green": "f0fdf4 dcfce7 bbf7d0 86efac 4ade80 22c55e 16a34a 15803d 166534 14532d",
+    "blue": "eff6ff dbeafe bfdbfe 93c5fd 60a5fa 3b82f6 2563eb 1d4ed8 1e40af 1e3a8a",
+    "indigo": "eef2ff e0e7ff c7d2fe a5b4fc 818cf8 6366f1 4f46e5 4338ca 3730a3 312e81",
+    "purple": "faf5ff f3e8ff e9d5ff d8b4fe c084fc a855f7 9333ea 7e22ce 6b21a8 581c87",
+}
+_SHADES = ["50", "100", "200", "300", "400", "500", "600", "700", "800", "900"]
+
+COLORS = {
+    "primary": "4f46e5",
+    "secondary": "10b981",
+    "dark": "1f2937",
+    "light": "f9fafb",
+    "white": "ffffff",
+    "black": "000000",
+    **{
+        f"{name}-{shade}": value
+        for name, values in _PALETTE.items()
+        for shade, value in zip(_SHADES, values.split())
+    },
+}
+KEYWORD_COLORS = {"transparent": "transparent", "current": "currentColor"}
+
+SPACING = {"0": "0px", "px": "1px"}
+SPACING.update(
+    (f"{n:g}", f"{n / 4:g}rem")
+    for n in [0.5, 1.5, 2.5, 3.5, *range(1, 13), *range(14, 17, 2), *range(20, 65, 4)]
+)
+SPACING.update((str(n), f"{n / 4:g}rem") for n in (72, 80, 96))
+
+SCREENS = {
+    "sm": "640px",
+    "md": "768px",
+    "lg": "1024px",
+    "xl": "1280px",
+    "2xl": "1536px",
+}
+PSEUDO_CLASSES = {
+    "hover": ":hover",
+    "focus": ":focus",
+    "focus-within": ":focus-within",
+    "focus-visible": ":focus-visible",
+    "active": ":active",
+}
+
+FONT_SIZES = {
+    "xs": ("0.75rem", "1rem"),
+    "sm": ("0.875rem", "1.25rem"),
+    "base": ("1rem", "1.5rem"),
+    "lg": ("1.125rem", "1.75rem"),
+    "xl": ("1.25rem", "1.75rem"),
+    "2xl": ("1.5rem", "2rem"),
+    "3xl": ("1.875rem", "2.25rem"),
+    "4xl": ("2.25rem", "2.5rem"),
+    "5xl": ("3rem", "1"),
+    "6xl": ("3.75rem", "1"),
+}
+FONT_WEIGHTS = {
+    "light": "300",
+    "normal": "400",
+    "medium": "500",
+    "semibold": "600",
+    "bold": "700",
+    "extrabold": "800",
+}
+LINE_HEIGHTS = {
+    "none": "1",
+    "tight": "1.25",
+    "snug": "1.375",
+    "normal": "1.5",
+    "relaxed": "1.625",
+    "loose": "2",
+}
+LETTER_SPACINGS = {"tight": "-0.025em", "normal": "0em", "wide": "0.025em"}
+RADII = {
+    "none": "0px",
+    "sm": "0.125rem",
+    "": "0.25rem",
+    "md": "0.375rem",
+    "lg": "0.5rem",
+    "xl": "0.75rem",
+    "2xl": "1rem",
+    "3xl": "1.5rem",
+    "full": "9999px",
+}
+MAX_WIDTHS = {
+    "none": "none",
+    "xs": "20rem",
+    "sm": "24rem",
+    "md": "28rem",
+    "lg": "32rem",
+    "xl": "36rem",
+    "2xl": "42rem",
+    "3xl": "48rem",
+    "4xl": "56rem",
+    "5xl": "64rem",
+    "6xl": "72rem",
+    "7xl": "80rem",
+    "full": "100%",
+    "prose": "65ch",
+}
+SHADOWS = {
+    "sm": "0 1px 2px 0 rgb(0 0 0 / 0.05)",
+    "": "0 1px 3px 0 rgb(0 0 0 / 0.1), 0 1px 2px -1px rgb(0 0 0 / 0.1)",
+    "md": "0 4px 6px -1px rgb(0 0 0 / 0.1), 0 2px 4px -2px rgb(0 0 0 / 0.1)",
+    "lg": "0 10px 15px -3px rgb(0 0 0 / 0.1), 0 4px 6px -4px rgb(0 0 0 / 0.1)",
+    "xl": "0 20px 25px -5px rgb(0 0 0 / 0.1), 0 8px 10px -6px rgb(0 0 0 / 0.1)",
+    "2xl": "0 25px 50px -12px rgb(0 0 0 / 0.25)",
+    "none": "0 0 #0000",
+}
+GRADIENT_DIRECTIONS = {
+    "t": "top",
+    "tr": "top right",
+    "r": "right",
+    "br": "bottom right",
+    "b": "bottom",
+    "bl": "bottom left",
+    "l": "left",
+    "tl": "top left",
+}
+TRANSITIONS = {
+    "": (
+        "color, background-color, border-color, text-decoration-color, fill, "
+        "stroke, opacity, box-shadow, transform, filter"
+    ),
+    "all": "all",
+    "colors": (
+        "color, background-color, border-color, text-decoration-color, fill, stroke"
+    ),
+    "opacity": "opacity",
+    "shadow": "box-shadow",
+    "transform": "transform",
+}
+EASINGS = {
+    "linear": "linear",
+    "in": "cubic-bezier(0.4, 0, 1, 1)",
+    "out": "cubic-bezier(0, 0, 0.2, 1)",
+    "in-out": "cubic-bezier(0.4, 0, 0.2, 1)",
+}
+TRANSFORM = (
+    "translate(var(--tw-translate-x), var(--tw-translate-y)) "
+    "rotate(var(--tw-rotate)) scale(var(--tw-scale-x), var(--tw-scale-y))"
+)
+
+# Tailwind's Preflight reset, trimmed to the elements the site uses, and the
+# defaults of the custom properties the utilities compose.
+PREFLIGHT = f"""
+*, ::before, ::after {{
+    box-sizing: border-box;
+    border-width: 0;
+    border-style: solid;
+    border-color: #e5e7eb;
+    --tw-translate-x: 0;
+    --tw-translate-y: 0;
+    --tw-rotate: 0;
+    --tw-scale-x: 1;
+    --tw-scale-y: 1;
+    --tw-ring-offset-width: 0px;
+    --tw-ring-offset-color: #fff;
+    --tw-ring-color: rgb(59 130 246 / 0.5);
+    --tw-ring-offset-shadow: 0 0 #0000;
+    --tw-ring-shadow: 0 0 #0000;
+    --tw-shadow: 0 0 #0000;
+}}
+html {{
+    line-height: 1.5;
+    -webkit-text-size-adjust: 100%;
+    tab-size: 4;
+    font-family: {FONT_SANS};
+}}
+body {{ margin: 0; line-height: inherit; }}
+hr {{ height: 0; color: inherit; border-top-width: 1px; }}
+h1, h2, h3, h4, h5, h6 {{ font-size: inherit; font-weight: inherit; }}
+a {{ color: inherit; text-decoration: inherit; }}
+b, strong {{ font-weight: bolder; }}
+small {{ font-size: 80%; }}
+button, input, select, textarea {{
+    font-family: inherit;
+    font-size: 100%;
+    font-weight: inherit;
+    line-height: inherit;
+    color: inherit;
+    margin: 0;
+    padding: 0;
+}}
+button, [type="button"], [type="submit"] {{
+    -webkit-appearance: button;
+    background-color: transparent;
+    background-image: none;
+}}
+blockquote, dl, dd, h1, h2, h3, h4, h5, h6, hr, figure, p, pre {{ margin: 0; }}
+ol, ul {{ list-style: none; margin: 0; padding: 0; }}
+input::placeholder, textarea::placeholder {{ opacity: 1; color: #9ca3af; }}
+button, [role="button"] {{ cursor: pointer; }}
+img, svg, video, iframe {{ display: block; vertical-align: middle; }}
+img, video {{ max-width: 100%; height: auto; }}
+[hidden] {{ display: none; }}
+"""
+
+STATIC_UTILITIES = {
+    "block": [("display", "block")],
+    "inline-block": [("display", "inline-block")],
+    "inline": [("display", "inline")],
+    "flex": [("display", "flex")],
+    "inline-flex": [("display", "inline-flex")],
+    "grid": [("display", "grid")],
+    "hidden": [("display", "none")],
+    "static": [("position", "static")],
+    "fixed": [("position", "fixed")],
+    "absolute": [("position", "absolute")],
+    "relative": [("position", "relative")],
+    "sticky": [("position", "sticky")],
+    "flex-row": [("flex-direction", "row")],
+    "flex-row-reverse": [("flex-direction", "row-reverse")],
+    "flex-col": [("flex-direction", "column")],
+    "flex-col-reverse": [("flex-direction", "column-reverse")],
+    "flex-wrap": [("flex-wrap", "wrap")],
+    "flex-nowrap": [("flex-wrap", "nowrap")],
+    "flex-1": [("flex", "1 1 0%")],
+    "flex-auto": [("flex", "1 1 auto")],
+    "flex-none": [("flex", "none")],
+    "flex-grow": [("flex-grow", "1")],
+    "flex-grow-0": [("flex-grow", "0")],
+    "flex-shrink-0": [("flex-shrink", "0")],
+    "items-start": [("align-items", "flex-start")],
+    "items-end": [("align-items", "flex-end")],
+    "items-center": [("align-items", "center")],
+    "items-baseline": [("align-items", "baseline")],
+    "items-stretch": [("align-items", "stretch")],
+    "justify-start": [("justify-content", "flex-start")],
+    "justify-end": [("justify-content", "flex-end")],
+    "justify-center": [("justify-content", "center")],
+    "justify-between": [("justify-content", "space-between")],
+    "justify-around": [("justify-content", "space-around")],
+    "justify-evenly": [("justify-content", "space-evenly")],
+    "overflow-auto": [("overflow", "auto")],
+    "overflow-hidden": [("overflow", "hidden")],
+    "overflow-visible": [("overflow", "visible")],
+    "overflow-x-auto": [("overflow-x", "auto")],
+    "overflow-y-auto": [("overflow-y", "auto")],
+    "object-cover": [("object-fit", "cover")],
+    "object-contain": [("object-fit", "contain")],
+    "font-sans": [("font-family", FONT_SANS)],
+    "italic": [("font-style", "italic")],
+    "uppercase": [("text-transform", "uppercase")],
+    "lowercase": [("text-transform", "lowercase")],
+    "capitalize": [("text-transform", "capitalize")],
+    "underline": [("text-decoration-line", "underline")],
+    "no-underline": [("text-decoration-line", "none")],
+    "text-left": [("text-align", "left")],
+    "text-center": [("text-align", "center")],
+    "text-right": [("text-align", "right")],
+    "whitespace-nowrap": [("white-space", "nowrap")],
+    "list-none": [("list-style-type", "none")],
+    "list-disc": [("list-style-type", "disc")],
+    "cursor-pointer": [("cursor", "pointer")],
+    "select-none": [("user-select", "none")],
+    "pointer-events-none": [("pointer-events", "none")],
+    "outline-none": [("outline", "2px solid transparent"), ("outline-offset", "2px")],
+    "transform": [("transform", TRANSFORM)],
+    "sr-only": [
+        ("position", "absolute"),
+        ("width", "1px"),
+        ("height", "1px"),
+        ("padding", "0"),
+        ("margin", "-1px"),
+        ("overflow", "hidden"),
+        ("clip", "rect(0, 0, 0, 0)"),
+        ("white-space", "nowrap"),
+        ("border-width", "0"),
+    ],
+}
+
+# Matches anything in a source file that could be a class name.
+CANDIDATE_RE = re.compile(r"[-a-z0-9:/.]*[a-z0-9%]", re.IGNORECASE)
+_FRACTION_RE = re.compile(r"^(\d+)/(\d+)$")
+_EXTENDS_RE = re.compile(r"{%\s*extends\s")
+_INHERITS_RE = re.compile(r"{%\s*(?:extends|include)\s+[\"']([^\"']+)[\"']")
+
+
+# Values
+
+
+def _rgb(hex_value):
+    return " ".join(str(int(hex_value[i : i + 2], 16)) for i in (0, 2, 4))
+
+
+def _color(value, prop, opacity_var=None):
+    """Return the declarations setting ``prop`` to a theme colour, or ``None``."""
+    value, _, alpha = value.partition("/")
+    if value in KEYWORD_COLORS and not alpha:
+        return [(prop, KEYWORD_COLORS[value])]
+    if value not in COLORS:
+        return None
+    rgb = _rgb(COLORS[value])
+    if alpha:
+        if not alpha.isdigit():
+            return None
+        return [(prop, f"rgb({rgb} / {int(alpha) / 100:g})")]
+    if opacity_var is None:
+        return [(prop, f"rgb({rgb})")]
+    return [(opacity_var, "1"), (prop, f"rgb({rgb} / var({opacity_var}))")]
+
+
+def _length(value, fractions=False, extra=None):
+    if extra and value in extra:
+        return extra[value]
+    if value in SPACING:
+        return SPACING[value]
+    match = _FRACTION_RE.match(value)
+    if fractions and match:
+        return f"{int(match[1]) / int(match[2]) * 100:g}%"
+    return None
+
+
+def _negate(value):
+    return value if value.startswith("0") else f"-{value}"
+
+
+# Utilities, in the order their rules are emitted so that, as in Tailwind,
+# a more specific utility (``px-4``) overrides a general one (``p-6``).
+
+
+def _prefixed(prefix, props, value_fn):
+    def handler(name):
+        if not name.startswith(f"{prefix}-"):
+            return None
+        value = value_fn(name[len(prefix) + 1 :])
+        if value is None:
+            return None
+        return [(prop, value) for prop in props]
+
+    return handler
+
+
+def _spacing(prefix, props, negative=False, **kwargs):
+    handler = _prefixed(prefix, props, lambda value: _length(value, **kwargs))
+    if not negative:
+        return handler
+
+    def negatable(name):
+        if name.startswith("-"):
+            declarations = handler(name[1:])
+            return declarations and [(p, _negate(v)) for p, v in declarations]
+        return handler(name)
+
+    return negatable
+
+
+def _static(name):
+    return STATIC_UTILITIES.get(name)
+
+
+def _keyed(prefix, mapping, props):
+    def handler(name):
+        if name == prefix:
+            key = ""
+        elif name.startswith(f"{prefix}-"):
+            key = name[len(prefix) + 1 :]
+        else:
+            return None
+        value = mapping.get(key)
+        if value is None:
+            return None
+        return [(prop, value) for prop in props]
+
+    return handler
+
+
+def _numeric(prefix, prop, scale=None, suffix="", allowed=None):
+    def handler(name):
+        if not name.startswith(f"{prefix}-"):
+            return None
+        value = name[len(prefix) + 1 :]
+        if not value.isdigit() or (allowed and int(value) not in allowed):
+            return None
+        if scale:
+            return [(prop, f"{int(value) / scale:g}{suffix}")]
+        return [(prop, f"{value}{suffix}")]
+
+    return handler
+
+
+def _colored(prefix, prop, opacity_var=None):
+    def handler(name):
+        if not name.startswith(f"{prefix}-"):
+            return None
+        return _color(name[len(prefix) + 1 :], prop, opacity_var)
+
+    return handler
+
+
+def _grid_cols(name):
+    value = name[len("grid-cols-") :] if name.startswith("grid-cols-") else ""
+    if value.isdigit() and 1 <= int(value) <= 12:
+        return [("grid-template-columns", f"repeat({value}, minmax(0, 1fr))")]
+    return None
+
+
+def _col_span(name):
+    value = name[len("col-span-") :] if name.startswith("col-span-") else ""
+    if value.isdigit() and 1 <= int(value) <= 12:
+        return [("grid-column", f"span {value} / span {value}")]
+    return None
+
+
+def _font_size(name):
+    if not name.startswith("text-") or name[5:] not in FONT_SIZES:
+        return None
+    size, line_height = FONT_SIZES[name[5:]]
+    return [("font-size", size), ("line-height", line_height)]
+
+
+def _rounded_side(name):
+    sides = {
+        "t": ("top-left", "top-right"),
+        "r": ("top-right", "bottom-right"),
+        "b": ("bottom-right", "bottom-left"),
+        "l": ("top-left", "bottom-left"),
+    }
+    match = re.match(r"^rounded-([trbl])(?:-(.+))?$", name)
+    if not match or (match[2] or "") not in RADII:
+        return None
+    radius = RADII[match[2] or ""]
+    return [(f"border-{corner}-radius", radius) for corner in sides[match[1]]]
+
+
+def _border_width(name):
+    match = re.match(r"^border(?:-([trblxy]))?(?:-(0|2|4|8))?$", name)
+    if not match:
+        return None
+    width = f"{match[2] or 1}px"
+    sides = {
+        None: [""],
+        "t": ["-top"],
+        "r": ["-right"],
+        "b": ["-bottom"],
+        "l": ["-left"],
+        "x": ["-left", "-right"],
+        "y": ["-top", "-bottom"],
+    }
+    return [(f"border{side}-width", width) for side in sides[match[1]]]
+
+
+def _space(axis):
+    prop = "margin-left" if axis == "x" else "margin-top"
+
+    def handler(name):
+        declarations = _spacing(f"space-{axis}", [prop], negative=True)(name)
+        return declarations and {
+            "selector": " > :not([hidden]) ~ :not([hidden])",
+            "declarations": declarations,
+        }
+
+    return handler
+
+
+def _shadow(name):
+    declarations = _keyed("shadow", SHADOWS, ["--tw-shadow"])(name)
+    if declarations is None:
+        return None
+    return declarations + [
+        (
+            "box-shadow",
+            "var(--tw-ring-offset-shadow, 0 0 #0000), "
+            "var(--tw-ring-shadow, 0 0 #0000), var(--tw-shadow)",
+        )
+    ]
+
+
+def _ring(name):
+    match = re.match(r"^ring(?:-(0|1|2|4|8))?$", name)
+    if not match:
+        return None
+    width = f"{match[1] or 3}px"
+    return [
+        (
+            "--tw-ring-offset-shadow",
+            "0 0 0 var(--tw-ring-offset-width) var(--tw-ring-offset-color)",
+        ),
+        (
+            "--tw-ring-shadow",
+            f"0 0 0 calc({width} + var(--tw-ring-offset-width)) var(--tw-ring-color)",
+        ),
+        (
+            "box-shadow",
+            "var(--tw-ring-offset-shadow), var(--tw-ring-shadow), "
+            "var(--tw-shadow, 0 0 #0000)",
+        ),
+    ]
+
+
+def _gradient(name):
+    match = re.match(r"^bg-gradient-to-(\w+)$", name)
+    if not match or match[1] not in GRADIENT_DIRECTIONS:
+        return None
+    direction = GRADIENT_DIRECTIONS[match[1]]
+    gradient = f"linear-gradient(to {direction}, var(--tw-gradient-stops))"
+    return [("background-image", gradient)]
+
+
+def _gradient_stop(name):
+    kind, _, value = name.partition("-")
+    if kind not in ("from", "via", "to") or value not in COLORS:
+        return None
+    color = f"#{COLORS[value]}"
+    transparent = f"rgb({_rgb(COLORS[value])} / 0)"
+    if kind == "from":
+        return [
+            ("--tw-gradient-from", color),
+            ("--tw-gradient-to", transparent),
+            ("--tw-gradient-stops", "var(--tw-gradient-from), var(--tw-gradient-to)"),
+        ]
+    if kind == "via":
+        return [
+            ("--tw-gradient-to", transparent),
+            (
+                "--tw-gradient-stops",
+                f"var(--tw-gradient-from), {color}, var(--tw-gradient-to)",
+            ),
+        ]
+    return [("--tw-gradient-to", color)]
+
+
+def _translate(name):
+    negative = name.startswith("-")
+    match = re.match(r"^translate-([xy])-(.+)$", name.lstrip("-"))
+    if not match:
+        return None
+    value = _length(match[2], fractions=True, extra={"full": "100%"})
+    if value is None:
+        return None
+    return [
+        (f"--tw-translate-{match[1]}", _negate(value) if negative else value),
+        ("transform", TRANSFORM),
+    ]
+
+
+def _scale(name):
+    match = re.match(r"^scale-(\d+)$", name)
+    if not match:
+        return None
+    value = f"{int(match[1]) / 100:g}"
+    return [("--tw-scale-x", value), ("--tw-scale-y", value), ("transform", TRANSFORM)]
+
+
+def _transition(name):
+    if name != "transition" and not name.startswith("transition-"):
+        return None
+    key = name[len("transition-") :] if name != "transition" else ""
+    if key == "none":
+        return [("transition-property", "none")]
+    if key not in TRANSITIONS:
+        return None
+    return [
+        ("transition-property", TRANSITIONS[key]),
+        ("transition-timing-function", EASINGS["in-out"]),
+        ("transition-duration", "150ms"),
+    ]
+
+
+_AUTO = {"auto": "auto"}
+_WIDTHS = {"auto": "auto", "full": "100%", "screen": "100vw"}
+_HEIGHTS = {"auto": "auto", "full": "100%", "screen": "100vh"}
+_INSETS = {"auto": "auto", "full": "100%"}
+
+HANDLERS = [
+    _static,
+    _spacing("inset", ["top", "right", "bottom", "left"], negative=True, extra=_INSETS),
+    _spacing("inset-x", ["left", "right"], negative=True, extra=_INSETS),
+    _spacing("inset-y", ["top", "bottom"], negative=True, extra=_INSETS),
+    *(
+        _spacing(side, [side], negative=True, fractions=True, extra=_INSETS)
+        for side in ("top", "right", "bottom", "left")
+    ),
+    _keyed("z", {str(z): str(z) for z in (0, 10, 20, 30, 40, 50)} | _AUTO, ["z-index"]),
+    _col_span,
+    _spacing("m", ["margin"], negative=True, extra=_AUTO),
+    _spacing("mx", ["margin-left", "margin-right"], negative=True, extra=_AUTO),
+    _spacing("my", ["margin-top", "margin-bottom"], negative=True, extra=_AUTO),
+    *(
+        _spacing(f"m{side[0]}", [f"margin-{side}"], negative=True, extra=_AUTO)
+        for side in ("top", "right", "bottom", "left")
+    ),
+    _spacing("w", ["width"], fractions=True, extra=_WIDTHS),
+    _spacing("h", ["height"], fractions=True, extra=_HEIGHTS),
+    _keyed("min-h", {"0": "0px", "full": "100%", "screen": "100vh"}, ["min-height"]),
+    _keyed("max-w", MAX_WIDTHS, ["max-width"]),
+    _translate,
+    _scale,
+    _grid_cols,
+    _spacing("gap", ["gap"]),
+    _spacing("gap-x", ["column-gap"]),
+    _spacing("gap-y", ["row-gap"]),
+    _space("x"),
+    _space("y"),
+    _keyed("rounded", RADII, ["border-radius"]),
+    _rounded_side,
+    _border_width,
+    _colored("border", "border-color", "--tw-border-opacity"),
+    _colored("bg", "background-color", "--tw-bg-opacity"),
+    _numeric("bg-opacity", "--tw-bg-opacity", scale=100),
+    _gradient,
+    _gradient_stop,
+    _spacing("p", ["padding"]),
+    _spacing("px", ["padding-left", "padding-right"]),
+    _spacing("py", ["padding-top", "padding-bottom"]),
+    *(
+        _spacing(f"p{side[0]}", [f"padding-{side}"])
+        for side in ("top", "right", "bottom", "left")
+    ),
+    _font_size,
+    _keyed("font", FONT_WEIGHTS, ["font-weight"]),
+    _keyed("leading", LINE_HEIGHTS, ["line-height"]),
+    _keyed("tracking", LETTER_SPACINGS, ["letter-spacing"]),
+    _colored("text", "color", "--tw-text-opacity"),
+    _numeric("text-opacity", "--tw-text-opacity", scale=100),
+    _numeric("opacity", "opacity", scale=100),
+    _shadow,
+    _ring,
+    _colored("ring", "--tw-ring-color"),
+    _transition,
+    _numeric("duration", "transition-duration", suffix="ms"),
+    _keyed("ease", EASINGS, ["transition-timing-function"]),
+]
+
+
+def _escape(class_name):
+    return re.sub(r"([^\w-])", r"\\\1", class_name)
+
+
+def utility_rule(class_name):
+    """
+    Return ``(screen, sort_key, css)`` for a utility class, or ``None`` when
+    the class is not a utility this generator knows.
+    """
+    *variants, name = class_name.split(":")
+    screen = None
+    pseudo = ""
+    for variant in variants:
+        if variant in SCREENS and screen is None and not pseudo:
+            screen = variant
+        elif variant in PSEUDO_CLASSES:
+            pseudo += PSEUDO_CLASSES[variant]
+        else:
+            return None
+
+    for order, handler in enumerate(HANDLERS):
+        result = handler(name)
+        if result:
+            break
+    else:
+        return None
+
+    suffix = ""
+    if isinstance(result, dict):
+        suffix, result = result["selector"], result["declarations"]
+    body = "; ".join(f"{prop}: {value}" for prop, value in result)
+    css = f".{_escape(class_name)}{pseudo}{suffix} {{ {body}; }}"
+    return screen, (bool(pseudo), order, class_name), css
+
+
+def _container_css(screen):
+    if screen is None:
+        return ".container { width: 100%; }"
+    return f".container {{ max-width: {SCREENS[screen]}; }}"
+
+
+def generate_css(class_names):
+    """Return the rules of the utilities among ``class_names``, unminified."""
+    rules = {None: [], **{screen: [] for screen in SCREENS}}
+    container = "container" in class_names
+    for class_name in set(class_names):
+        rule = utility_rule(class_name)
+        if rule is not None:
+            screen, sort_key, css = rule
+            rules[screen].append((sort_key, css))
+
+    blocks = []
+    for screen, screen_rules in rules.items():
+        css = [css for _, css in sorted(screen_rules)]
+        if container:
+            css.insert(0, _container_css(screen))
+        if not css:
+            continue
+        if screen is None:
+            blocks.extend(css)
+        else:
+            body = "\n".join(css)
+            blocks.append(f"@media (min-width: {SCREENS[screen]}) {{\n{body}\n}}")
+    return "\n".join(blocks)
+
+
+def minify_css(css):
+    """Strip comments and insignificant whitespace from a stylesheet."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    # Keep descendant combinators before pseudo-classes (``a :not(...)``).
+    css = css.replace(">:not", "> :not").replace("~:not", "~ :not")
+    return css.replace(";}", "}").strip()
+
+
+# Sources
+
+
+def content_paths():
+    """Yield the template and script files scanned for class names."""
+    for directory in settings.TAILWIND_CONTENT_DIRS:
+        for dirpath, _dirnames, filenames in os.walk(directory):
+            for filename in sorted(filenames):
+                if filename.endswith((".html", ".js", ".txt")):
+                    yield os.path.join(dirpath, filename)
+
+
+def scan_classes(text):
+    """Return the tokens of ``text`` that are utility classes."""
+    return {
+        token
+        for token in CANDIDATE_RE.findall(text)
+        if token == "container" or utility_rule(token) is not None
+    }
+
+
+def _template_sources():
+    """Map template names, relative to their templates dir, to their source."""
+    sources = {}
+    for path in content_paths():
+        if not path.endswith(".html"):
+            continue
+        for directory in settings.TAILWIND_CONTENT_DIRS:
+            if path.startswith(os.path.join(directory, "")):
+                name = os.path.relpath(path, directory).replace(os.sep, "/")
+                with open(path, encoding="utf-8") as f:
+                    sources.setdefault(name, f.read())
+    return sources
+
+
+def _template_classes(name, sources, seen=None):
+    """Return the classes of a template and the templates it extends or includes."""
+    seen = seen if seen is not None else set()
+    if name in seen or name not in sources:
+        return set()
+    seen.add(name)
+    classes = scan_classes(sources[name])
+    for parent in _INHERITS_RE.findall(sources[name]):
+        classes |= _template_classes(parent, sources, seen)
+    return classes
+
+
+def _read_custom_css():
+    path = os.path.join(settings.PROJECT_DIR, "static", "css", "myproject.css")
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def build_stylesheets():
+    """
+    Return ``(stylesheet, critical)``: the minified site stylesheet, and the
+    minified critical CSS of every page template, keyed by template name.
+    """
+    classes = set()
+    for path in content_paths():
+        with open(path, encoding="utf-8") as f:
+            classes |= scan_classes(f.read())
+
+    base = PREFLIGHT + _read_custom_css()
+    stylesheet = minify_css(base + generate_css(classes))
+
+    sources = _template_sources()
+    critical = {}
+    for name, source in sources.items():
+        # Pages and the layout they extend; blocks are covered by the stylesheet.
+        if name == "base.html" or _EXTENDS_RE.search(source):
+            critical[name] = minify_css(
+                base + generate_css(_template_classes(name, sources))
+            )
+    return stylesheet, critical
+
+
+def write_stylesheets(output_dir):
+    """
+    Write the stylesheet under a content-hashed name and the manifest listing
+    it and the critical CSS, removing stylesheets of earlier builds.
+
+    Returns the manifest.
+    """
+    stylesheet, critical = build_stylesheets()
+    digest = hashlib.sha256(stylesheet.encode("utf-8")).hexdigest()[:12]
+    name = f"{STYLESHEET_PREFIX}.{digest}.css"
+
+    css_dir = os.path.join(output_dir, os.path.dirname(STYLESHEET_PREFIX))
+    os.makedirs(css_dir, exist_ok=True)
+    stale = re.compile(r"^%s\.[0-9a-f]{12}\.css$" % os.path.basename(STYLESHEET_PREFIX))
+    for filename in os.listdir(css_dir):
+        if stale.match(filename) and filename != os.path.basename(name):
+            os.remove(os.path.join(css_dir, filename))
+
+    with open(os.path.join(output_dir, name), "w", encoding="utf-8") as f:
+        f.write(stylesheet)
+    manifest = {"stylesheet": name, "critical": critical}
+    with open(os.path.join(output_dir, MANIFEST_PATH), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+        f.write("\n")
+    load_manifest.cache_clear()
+    return manifest
+
+
+@functools.lru_cache(maxsize=None)
+def load_manifest():
+    """Return the manifest written by ``build_css``, or ``None`` if missing."""
+    path = finders.find(MANIFEST_PATH)
+    if path is None:
+        logger.warning("%s not found; run manage.py build_css", MANIFEST_PATH)
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,38 @@
+from django import template
+
+from home.placeholders import placeholder_style
+from home.renditions import render_picture
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_picture(image, ladder, **attrs):
+    """
+    Render an image as a <picture> with AVIF/WebP sources and a srcset over
+    the named ladder from ``RESPONSIVE_IMAGE_LADDERS``::
+
+        {% responsive_picture page.hero_image "hero" class="rounded-lg" %}
+    """
+    if not image:
+        return ""
+    return render_picture(image, ladder, attrs)
+
+
+@register.simple_tag
+def lazy_picture(image, ladder, **attrs):
+    """
+    Like ``responsive_picture``, for images below the fold: the browser defers
+    loading it, and the stored placeholder and dominant colour are painted in
+    its reserved box until it arrives::
+
+        {% lazy_picture value.logo "logo" class="h-16 w-auto" %}
+    """
+    if not image:
+        return ""
+    lazy_attrs = {"loading": "lazy", "decoding": "async"}
+    style = placeholder_style(image)
+    if style:
+        lazy_attrs["style"] = style
+    lazy_attrs.update(attrs)
+    return render_picture(image, ladder, lazy_attrs)
@@ -0,0 +1,19 @@
+from django import template
+
+from home.seo import json_ld_script
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def json_ld(context, data):
+    """
+    Render a schema.org document as an escaped ``application/ld+json`` script::
+
+        {% json_ld seo.json_ld %}
+    """
+    if not data:
+        return ""
+    request = context.get("request")
+    url = request.build_absolute_uri() if request is not None else None
+    return json_ld_script(data, url)
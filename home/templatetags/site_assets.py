@@ -0,0 +1,36 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+from home.tailwind import load_manifest
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def site_css(context):
+    """
+    Inline the critical CSS of the template being rendered and load the full
+    stylesheet built by ``manage.py build_css`` without blocking rendering::
+
+        {% site_css %}
+    """
+    manifest = load_manifest()
+    if manifest is None:
+        return ""
+    template_name = getattr(context.template, "name", None)
+    critical = manifest["critical"].get(template_name) or manifest["critical"].get(
+        "base.html", ""
+    )
+    url = static(manifest["stylesheet"])
+    return format_html(
+        "<style>{}</style>\n"
+        '<link rel="preload" href="{}" as="style" '
+        "onload=\"this.onload=null;this.rel='stylesheet'\">\n"
+        '<noscript><link rel="stylesheet" href="{}"></noscript>',
+        # Generated from the project's own sources; only guard the end tag.
+        mark_safe(critical.replace("</", "<\\/")),
+        url,
+        url,
+    )
@@ -0,0 +1,130 @@
+"""
+Tests for the full-page response cache.
+"""
+import pytest
+from django.test import override_settings
+
+pytestmark = pytest.mark.django_db
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+def test_homepage_served_from_cache_without_queries(
+    client, home_page, site, django_assert_num_queries
+):
+    """Test a warm cache hit does not touch the database."""
+    first = client.get("/")
+    assert first.status_code == 200
+
+    with django_assert_num_queries(0):
+        second = client.get("/")
+
+    assert second.status_code == 200
+    assert second.content == first.content
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+def test_landing_page_cached_per_query_string(
+    client, landing_page, site, django_assert_num_queries
+):
+    """Test different query strings are cached as separate variants."""
+    client.get(landing_page.url)
+    client.get(landing_page.url + "?utm_source=test")
+
+    with django_assert_num_queries(0):
+        client.get(landing_page.url)
+        client.get(landing_page.url + "?utm_source=test")
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+def test_publish_invalidates_page(client, home_page, site):
+    """Test publishing a new revision replaces the cached response."""
+    client.get("/")
+
+    home_page.hero_title = "Freshly Published Hero"
+    home_page.save_revision().publish()
+
+    response = client.get("/")
+    assert "Freshly Published Hero" in response.content.decode("utf-8")
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+def test_publishing_child_invalidates_ancestors(client, home_page, landing_page, site):
+    """Test publishing a landing page invalidates the cached home page too."""
+    client.get("/")
+
+    home_page.hero_title = "Changed Without Publishing"
+    home_page.save()
+    landing_page.save_revision().publish()
+
+    response = client.get("/")
+    assert "Changed Without Publishing" in response.content.decode("utf-8")
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+def test_unpublish_invalidates_page(client, landing_page, site):
+    """Test an unpublished page is no longer served from the cache."""
+    url = landing_page.url
+    assert client.get(url).status_code == 200
+
+    landing_page.unpublish()
+
+    assert client.get(url).status_code == 404
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+def test_session_cookie_bypasses_cache(client, home_page, site):
+    """Test requests carrying a session cookie are never served from cache."""
+    client.get("/")
+
+    home_page.hero_title = "Visible To Logged In Users"
+    home_page.save()
+
+    client.cookies["sessionid"] = "not-a-real-session"
+    response = client.get("/")
+    assert "Visible To Logged In Users" in response.content.decode("utf-8")
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+def test_release_invalidates_pages(client, home_page, site):
+    """Test a new release does not serve responses rendered by the last one."""
+    client.get("/")
+
+    home_page.hero_title = "Rendered By The New Release"
+    home_page.save()
+    with override_settings(CONDITIONAL_GET_SALT="new-release"):
+        response = client.get("/")
+    assert "Rendered By The New Release" in response.content.decode("utf-8")
+
+
+def test_cache_disabled_by_default(client, home_page, site):
+    """Test the cache is opt-in."""
+    client.get("/")
+
+    home_page.hero_title = "Uncached Hero"
+    home_page.save()
+
+    response = client.get("/")
+    assert "Uncached Hero" in response.content.decode("utf-8")
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+def test_seo_settings_change_invalidates_pages(client, home_page, site, seo_settings):
+    """Test editing the SEO settings snippet invalidates every cached page."""
+    client.get("/")
+
+    seo_settings.site_name = "Renamed Site"
+    seo_settings.save()
+
+    response = client.get("/")
+    assert "Renamed Site" in response.content.decode("utf-8")
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+def test_cache_hit_has_same_headers_as_miss(client, home_page, site):
+    """Test a hit replays the headers the middleware added to the miss."""
+    miss = client.get("/")
+    hit = client.get("/")
+
+    assert miss["X-Frame-Options"] == "DENY"
+    assert miss["X-Content-Type-Options"] == "nosniff"
+    assert dict(hit.items()) == dict(miss.items())
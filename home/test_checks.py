@@ -0,0 +1,32 @@
+"""
+Tests for the home app's system checks.
+"""
+from django.test import override_settings
+
+from home.checks import check_shared_cache
+
+LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+DATABASE = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "django_cache",
+    }
+}
+
+
+@override_settings(DEBUG=False, CACHES=LOCMEM)
+def test_per_process_cache_warned():
+    """Test a per-process cache is reported outside development."""
+    assert [warning.id for warning in check_shared_cache(None)] == ["home.W001"]
+
+
+@override_settings(DEBUG=False, CACHES=DATABASE)
+def test_shared_cache_accepted():
+    """Test a shared backend passes."""
+    assert check_shared_cache(None) == []
+
+
+@override_settings(DEBUG=True, CACHES=LOCMEM)
+def test_per_process_cache_allowed_in_development():
+    """Test a single development process may keep its cache in memory."""
+    assert check_shared_cache(None) == []
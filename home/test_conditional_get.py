@@ -0,0 +1,92 @@
+"""
+Tests for conditional GET (ETag / Last-Modified) on page responses.
+"""
+import pytest
+from django.test import override_settings
+
+pytestmark = pytest.mark.django_db
+
+
+def test_page_response_has_validators(client, home_page, site):
+    """Test page responses carry an ETag and Last-Modified header."""
+    home_page.save_revision().publish()
+
+    response = client.get("/")
+
+    assert response.status_code == 200
+    assert response.has_header("ETag")
+    assert response.has_header("Last-Modified")
+
+
+def test_matching_etag_returns_304_without_rendering(client, home_page, site):
+    """Test a matching If-None-Match short-circuits before template rendering."""
+    etag = client.get("/")["ETag"]
+
+    response = client.get("/", HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response["ETag"] == etag
+    assert not response.templates
+
+
+def test_if_modified_since_returns_304(client, home_page, site):
+    """Test clients that only send If-Modified-Since are answered with 304."""
+    home_page.save_revision().publish()
+    last_modified = client.get("/")["Last-Modified"]
+
+    response = client.get("/", HTTP_IF_MODIFIED_SINCE=last_modified)
+
+    assert response.status_code == 304
+
+
+def test_publish_changes_etag(client, home_page, site):
+    """Test publishing a new revision produces a new validator."""
+    etag = client.get("/")["ETag"]
+
+    home_page.save_revision().publish()
+
+    response = client.get("/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+
+def test_seo_settings_change_changes_etag(client, home_page, site, seo_settings):
+    """Test editing the SEO settings invalidates page validators."""
+    etag = client.get("/")["ETag"]
+
+    seo_settings.save()
+
+    assert client.get("/", HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+def test_image_change_changes_etag(client, landing_page, site, image):
+    """Test changing a referenced image invalidates page validators."""
+    landing_page.hero_image = image
+    landing_page.save_revision().publish()
+    etag = client.get(landing_page.url)["ETag"]
+
+    image.title = "Replaced"
+    image.save()
+
+    assert client.get(landing_page.url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+def test_session_requests_have_no_validators(client, home_page, site):
+    """Test user-specific responses are not given shared validators."""
+    client.cookies["sessionid"] = "not-a-real-session"
+
+    assert not client.get("/").has_header("ETag")
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+def test_cached_page_revalidated_without_queries(
+    client, home_page, site, django_assert_num_queries
+):
+    """Test the full-page cache answers revalidation with a 304 from memory."""
+    etag = client.get("/")["ETag"]
+
+    with django_assert_num_queries(0):
+        response = client.get("/", HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 304
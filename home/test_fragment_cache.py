@@ -0,0 +1,90 @@
+"""
+Tests for the StreamField block fragment cache.
+"""
+import pytest
+
+from home import models
+from home.fragment_cache import get_fragment_cache_stats, reset_fragment_cache_stats
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def reset_stats():
+    reset_fragment_cache_stats()
+
+
+def test_block_rendered_once():
+    """Test an unchanged block is served from the cache on later renders."""
+    block = models.TestimonialBlock()
+    value = block.to_python({"quote": "Great", "author": "Ada", "role": "CTO"})
+
+    first = block.render(value)
+    second = block.render(value)
+
+    assert first == second
+    assert "Great" in second
+    assert get_fragment_cache_stats() == {"hits": 1, "misses": 1, "hit_ratio": 0.5}
+
+
+def test_changed_content_misses():
+    """Test editing a block's content produces a new fragment."""
+    block = models.TestimonialBlock()
+    block.render(block.to_python({"quote": "Old", "author": "Ada"}))
+
+    html = block.render(block.to_python({"quote": "New", "author": "Ada"}))
+
+    assert "New" in html
+    assert get_fragment_cache_stats()["misses"] == 2
+
+
+def test_identical_blocks_share_fragment():
+    """Test the same content reuses one fragment wherever it appears."""
+    block = models.FeatureBlock()
+    data = {"icon": None, "title": "Fast", "text": "Very fast"}
+
+    block.render(block.to_python(data))
+    models.FeatureBlock().render(models.FeatureBlock().to_python(data))
+
+    assert get_fragment_cache_stats()["hits"] == 1
+
+
+def test_image_file_hash_is_part_of_key(image):
+    """Test replacing an image's file invalidates fragments that use it."""
+    block = models.PartnerBlock()
+    value = block.to_python({"logo": image.pk, "name": "Acme", "url": ""})
+    block.render(value)
+
+    value["logo"].file_hash = "replaced"
+    block.render(value)
+
+    assert get_fragment_cache_stats()["misses"] == 2
+
+
+@pytest.mark.parametrize(
+    "field, changed",
+    [("title", "New alt text"), ("focal_point_x", 10), ("focal_point_width", 40)],
+)
+def test_image_title_and_focal_point_are_part_of_key(image, field, changed):
+    """Test editing an image's alt text or focal point invalidates its fragments."""
+    block = models.PartnerBlock()
+    value = block.to_python({"logo": image.pk, "name": "Acme", "url": ""})
+    block.render(value)
+
+    setattr(value["logo"], field, changed)
+    block.render(value)
+
+    assert get_fragment_cache_stats()["misses"] == 2
+
+
+def test_homepage_blocks_cached_across_requests(client, home_page, site):
+    """Test the home page reuses block fragments on the next request."""
+    home_page.testimonials = [("testimonial", {"quote": "Lovely", "author": "Bo"})]
+    home_page.features = [("feature", {"title": "Quick", "text": "Really"})]
+    home_page.save_revision().publish()
+
+    client.get("/")
+    response = client.get("/")
+
+    assert "Lovely" in response.content.decode("utf-8")
+    assert get_fragment_cache_stats()["hits"] == 2
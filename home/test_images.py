@@ -0,0 +1,72 @@
+"""
+Tests for bulk-loading page images and renditions.
+"""
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from home.images import prefetch_page_images
+from home.placeholders import update_image_metadata
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def make_images(image_collection):
+    from wagtail.images.models import Image
+    from wagtail.images.tests.utils import get_test_image_file
+
+    def make_images(count):
+        images = [
+            Image.objects.create(
+                title=f"Logo {i}",
+                file=get_test_image_file(),
+                collection=image_collection,
+            )
+            for i in range(count)
+        ]
+        for image in images:
+            update_image_metadata(image)
+        return images
+
+    return make_images
+
+
+def _render_queries(client, page, images):
+    page.partners = [
+        ("partner", {"logo": image, "name": image.title, "url": ""})
+        for image in images
+    ]
+    page.save_revision().publish()
+
+    # The first render creates the renditions; the second is the warm path.
+    client.get(page.url)
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(page.url)
+    assert response.status_code == 200
+    return len(queries)
+
+
+@override_settings(FRAGMENT_CACHE_ENABLED=False)
+def test_query_count_independent_of_image_count(
+    client, home_page, site, make_images
+):
+    """Test rendering 30 partner logos costs no more queries than 3."""
+    few = _render_queries(client, home_page, make_images(3))
+    many = _render_queries(client, home_page, make_images(30))
+
+    assert many == few
+
+
+def test_prefetch_attaches_renditions(home_page, image):
+    """Test existing renditions are attached to every image instance."""
+    rendition = image.get_rendition("width-150")
+    home_page.hero_image = image
+    home_page.partners = [("partner", {"logo": image, "name": "Acme", "url": ""})]
+
+    instances = prefetch_page_images(home_page, ["width-150"])
+
+    assert len(instances) == 2
+    for instance in instances:
+        assert instance.prefetched_renditions == [rendition]
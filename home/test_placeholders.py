@@ -0,0 +1,73 @@
+"""
+Tests for image placeholders and the lazy picture tag.
+"""
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.template import Context, Template
+
+from home import placeholders
+from home.models import ImageMetadata
+
+pytestmark = pytest.mark.django_db
+
+
+def render_lazy(image):
+    return Template(
+        '{% load responsive_images %}{% lazy_picture image "logo" class="logo" %}'
+    ).render(Context({"image": image}))
+
+
+def test_metadata_computed_on_upload(image_collection, django_capture_on_commit_callbacks):
+    """Test saving an image stores its placeholder and dominant colour."""
+    from wagtail.images.models import Image
+    from wagtail.images.tests.utils import get_test_image_file
+
+    with django_capture_on_commit_callbacks(execute=True):
+        image = Image.objects.create(
+            title="Upload",
+            file=get_test_image_file(colour="red"),
+            collection=image_collection,
+        )
+
+    metadata = ImageMetadata.objects.get(image=image)
+    assert metadata.placeholder.startswith("data:image/jpeg;base64,")
+    assert metadata.dominant_color == "#ff0000"
+
+
+def test_lazy_picture_uses_stored_metadata(image, monkeypatch):
+    """Test the lazy tag emits lazy loading, dimensions and the placeholder."""
+    placeholders.update_image_metadata(image)
+
+    def fail(image):
+        raise AssertionError("image decoded while rendering")
+
+    monkeypatch.setattr(placeholders, "_open", fail)
+    html = render_lazy(image)
+
+    assert 'loading="lazy"' in html
+    assert 'decoding="async"' in html
+    assert 'width="150"' in html
+    assert "background-image: url(data:image/jpeg;base64," in html
+    assert f"background-color: {image.metadata.dominant_color}" in html
+
+
+def test_lazy_picture_without_metadata(image):
+    """Test images without metadata still render lazily."""
+    html = render_lazy(image)
+
+    assert 'loading="lazy"' in html
+    assert "style=" not in html
+
+
+def test_backfill_command(image):
+    """Test the backfill computes missing metadata and skips current ones."""
+    out = StringIO()
+    call_command("backfill_image_metadata", stdout=out)
+    assert "Updated metadata for 1 images" in out.getvalue()
+    assert ImageMetadata.objects.filter(image=image).exists()
+
+    out = StringIO()
+    call_command("backfill_image_metadata", stdout=out)
+    assert "Updated metadata for 0 images" in out.getvalue()
@@ -0,0 +1,146 @@
+"""
+Tests for surrogate-key headers and the purge dispatcher.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from django.test import override_settings
+
+from home.models import LandingPage
+from home.purge import PurgeDispatcher, page_surrogate_keys, purge_dispatcher
+
+pytestmark = pytest.mark.django_db
+
+
+class PurgeServer(ThreadingHTTPServer):
+    """Local stand-in for a CDN purge API that records every request."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), PurgeHandler)
+        self.requests = []
+        self.responses = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/purge"
+
+
+class PurgeHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.requests.append(
+            {"headers": dict(self.headers), "json": json.loads(body)}
+        )
+        status = self.server.responses.pop(0) if self.server.responses else 200
+        self.send_response(status)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def purge_server():
+    server = PurgeServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_page_response_cache_headers(client, home_page, landing_page, site, image):
+    """Test page responses carry Cache-Control and surrogate keys."""
+    landing_page.hero_image = image
+    landing_page.save_revision().publish()
+
+    response = client.get(landing_page.url)
+
+    assert "s-maxage=" in response["Cache-Control"]
+    assert "stale-while-revalidate=" in response["Cache-Control"]
+    assert response["X-Accel-Expires"] == "10"
+    keys = response["Surrogate-Key"].split()
+    assert f"page-{landing_page.pk}" in keys
+    assert f"page-{home_page.pk}" in keys
+    assert f"image-{image.pk}" in keys
+    assert "seo-settings" in keys
+
+
+def test_streamfield_images_in_surrogate_keys(home_page, image):
+    """Test images referenced from StreamField blocks are listed."""
+    home_page.partners = [("partner", {"logo": image, "name": "Acme"})]
+
+    assert f"image-{image.pk}" in page_surrogate_keys(home_page)
+
+
+def test_session_requests_are_private(client, home_page, site):
+    """Test responses to requests with a session cookie are not shared."""
+    client.cookies["sessionid"] = "not-a-real-session"
+    response = client.get("/")
+
+    assert response["Cache-Control"] == "private, no-cache"
+    assert not response.has_header("Surrogate-Key")
+
+
+@override_settings(PURGE_BATCH_SIZE=2, PURGE_TOKEN="secret")
+def test_dispatcher_batches_keys(purge_server, django_capture_on_commit_callbacks):
+    """Test keys queued in one transaction are sent in batches after commit."""
+    dispatcher = PurgeDispatcher()
+
+    with override_settings(PURGE_URL=purge_server.url, PURGE_ASYNC=False):
+        with django_capture_on_commit_callbacks(execute=True):
+            dispatcher.queue(["page-1", "page-2"])
+            dispatcher.queue(["page-2", "image-3"])
+
+    assert [r["json"]["surrogate_keys"] for r in purge_server.requests] == [
+        ["image-3", "page-1"],
+        ["page-2"],
+    ]
+    assert purge_server.requests[0]["headers"]["Authorization"] == "secret"
+
+
+@override_settings(PURGE_RETRY_BACKOFF=0)
+def test_dispatcher_retries_transient_errors(purge_server):
+    """Test a batch is retried after a retryable error status."""
+    purge_server.responses = [503, 200]
+    dispatcher = PurgeDispatcher()
+
+    with override_settings(PURGE_URL=purge_server.url):
+        dispatcher._pending.add("page-1")
+        assert dispatcher.flush() == 1
+
+    assert len(purge_server.requests) == 2
+
+
+@override_settings(PURGE_RETRY_BACKOFF=0)
+def test_dispatcher_gives_up_on_client_errors(purge_server):
+    """Test non-retryable errors are not retried."""
+    purge_server.responses = [403]
+    dispatcher = PurgeDispatcher()
+
+    with override_settings(PURGE_URL=purge_server.url):
+        dispatcher._pending.add("page-1")
+        assert dispatcher.flush() == 0
+
+    assert len(purge_server.requests) == 1
+
+
+def test_publish_purges_lineage_keys(
+    purge_server, home_page, landing_page, django_capture_on_commit_callbacks
+):
+    """Test publishing a page purges its ancestors' and descendants' keys too."""
+    child = landing_page.add_child(instance=LandingPage(title="Child", slug="child"))
+
+    with override_settings(PURGE_URL=purge_server.url, PURGE_ASYNC=False):
+        with django_capture_on_commit_callbacks(execute=True):
+            landing_page.save_revision().publish()
+
+    keys = purge_server.requests[0]["json"]["surrogate_keys"]
+    assert {
+        f"page-{home_page.pk}",
+        f"page-{landing_page.pk}",
+        f"page-{child.pk}",
+    } <= set(keys)
+    assert not purge_dispatcher._pending
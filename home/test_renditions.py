@@ -0,0 +1,107 @@
+"""
+Tests for responsive pictures and rendition pre-generation.
+"""
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import override_settings
+
+from home.renditions import (
+    missing_renditions,
+    parse_image_tag,
+    render_picture,
+    rendition_filter_specs,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.parametrize(
+    "args,spec",
+    [
+        ('page.hero_image fill-600x500 class="rounded-lg"', "fill-600x500"),
+        ("page.og_image width-1200 as og_img", "width-1200"),
+        ("img fill-200x200 format-webp", "fill-200x200|format-webp"),
+        ("img", None),
+    ],
+)
+def test_parse_image_tag(args, spec):
+    """Test filter specs are read from image tag arguments."""
+    assert parse_image_tag(args) == spec
+
+
+def test_template_specs_discovered():
+    """Test the specs used by the project's templates are found."""
+    specs = rendition_filter_specs(["max-10x10"])
+
+    for spec in ["fill-600x500", "width-800", "width-1200", "width-80", "width-150"]:
+        assert spec in specs
+    assert "fill-600x500|format-webp" in specs
+    assert "max-10x10" in specs
+
+
+def test_generates_missing_renditions(home_page, image):
+    """Test renditions are created for live pages' images, and only once."""
+    home_page.hero_image = image
+    home_page.save_revision().publish()
+    specs = rendition_filter_specs()
+
+    out = StringIO()
+    call_command("generate_renditions", workers=1, stdout=out)
+
+    assert f"Generated {len(specs)} renditions" in out.getvalue()
+    assert missing_renditions({image.pk}, specs) == {}
+
+    out = StringIO()
+    call_command("generate_renditions", workers=1, stdout=out)
+    assert "0 renditions missing" in out.getvalue()
+
+
+def test_broken_image_does_not_stop_run(home_page, image):
+    """Test a failing image is reported and the run carries on."""
+    image.file.storage.delete(image.file.name)
+    home_page.hero_image = image
+    home_page.save_revision().publish()
+
+    out, err = StringIO(), StringIO()
+    call_command("generate_renditions", workers=1, stdout=out, stderr=err)
+
+    assert f"Image {image.pk}:" in err.getvalue()
+    assert "1 images failed" in err.getvalue()
+
+
+def test_responsive_picture_markup(image):
+    """Test the picture has AVIF and WebP sources and a fallback <img>."""
+    html = Template(
+        '{% load responsive_images %}'
+        '{% responsive_picture image "logo" class="logo" %}'
+    ).render(Context({"image": image}))
+
+    assert html.startswith("<picture><source")
+    assert '<source type="image/avif" srcset="' in html
+    assert '<source type="image/webp" srcset="' in html
+    assert html.index("image/avif") < html.index("image/webp")
+    assert 'sizes="150px"' in html
+    assert 'class="logo"' in html
+    assert html.endswith("></picture>")
+    assert image.renditions.filter(filter_spec="width-150|format-avif").exists()
+
+
+@override_settings(RESPONSIVE_IMAGE_FORMATS=["webp"])
+def test_responsive_picture_formats_configurable(image):
+    """Test only the configured <source> formats are rendered."""
+    html = render_picture(image, "logo")
+
+    assert "image/avif" not in html
+    assert "image/webp" in html
+
+
+def test_responsive_picture_without_image():
+    """Test an empty image renders nothing."""
+    html = Template(
+        '{% load responsive_images %}{% responsive_picture image "hero" %}'
+    ).render(Context({"image": None}))
+
+    assert html == ""
@@ -0,0 +1,113 @@
+"""
+Tests for the SEO snapshots stored on published pages.
+"""
+from unittest.mock import patch
+
+import pytest
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+
+from home.cache import (
+    SEO_SETTINGS_VERSION_KEY,
+    bump_versions,
+    get_seo_settings,
+    page_validators,
+)
+from home.models import LandingPage, SEOSettings
+
+pytestmark = pytest.mark.django_db
+
+
+def test_snapshot_resolved_on_publish(landing_page, site, image):
+    """Test publishing stores the resolved fallbacks and social images."""
+    landing_page.og_title = "OG Title"
+    landing_page.search_description = "Search description"
+    landing_page.og_image = image
+    landing_page.save_revision().publish()
+
+    seo = LandingPage.objects.get(pk=landing_page.pk).seo_snapshot
+
+    assert seo["title"] == "OG Title"
+    assert seo["twitter_title"] == "OG Title"
+    assert seo["twitter_description"] == "Search description"
+    assert seo["og_image"]["width"] == 640
+    assert seo["og_image"]["url"].endswith(".width-1200.png")
+    assert seo["json_ld"]["headline"] == "OG Title"
+    assert seo["json_ld"]["image"] == seo["og_image"]["url"]
+    assert seo["json_ld"]["url"] == landing_page.get_full_url()
+
+
+def test_head_rendered_without_queries(
+    landing_page, site, image, seo_settings, django_assert_num_queries
+):
+    """Test rendering the <head> from the snapshot runs no queries."""
+    landing_page.og_image = image
+    landing_page.twitter_image = image
+    landing_page.save_revision().publish()
+    page = LandingPage.objects.get(pk=landing_page.pk)
+    request = RequestFactory().get(page.url)
+    get_seo_settings()
+
+    with django_assert_num_queries(0):
+        html = render_to_string(
+            "base.html", {"page": page, "seo": page.seo_snapshot}, request
+        )
+
+    assert 'property="og:image:width" content="640"' in html
+    assert '"@type": "WebPage"' in html
+
+
+def test_seo_settings_version_read_once_per_interval(seo_settings, settings):
+    """Test a warm worker renders without reading the version from the cache."""
+    settings.SEO_SETTINGS_RECHECK_INTERVAL = 60
+    get_seo_settings()
+
+    with patch("home.cache.get_versions") as get_versions:
+        assert get_seo_settings() == seo_settings
+
+    get_versions.assert_not_called()
+
+
+def test_page_validators_pick_up_seo_settings_edits(home_page, seo_settings, settings):
+    """Test an edit made by another worker is used by the next cacheable render."""
+    settings.SEO_SETTINGS_RECHECK_INTERVAL = 60
+    get_seo_settings()
+    # As another worker would: change the row and bump the version.
+    SEOSettings.objects.filter(pk=seo_settings.pk).update(site_name="Edited")
+    bump_versions([SEO_SETTINGS_VERSION_KEY])
+
+    assert get_seo_settings().site_name == "Test Site"
+    page_validators(home_page)
+    assert get_seo_settings().site_name == "Edited"
+
+
+def test_json_ld_is_escaped(client, landing_page, site):
+    """Test editor content cannot break out of the JSON-LD script element."""
+    landing_page.og_title = "</script><script>alert(1)</script>"
+    landing_page.save_revision().publish()
+
+    html = client.get(landing_page.url).content.decode("utf-8")
+
+    assert "<script>alert(1)" not in html
+    assert "\\u003C/script\\u003E\\u003Cscript\\u003Ealert(1)" in html
+
+
+def test_deleting_social_image_refreshes_snapshot(landing_page, site, image):
+    """Test snapshots drop a social image when it is deleted."""
+    landing_page.og_image = image
+    landing_page.save_revision().publish()
+
+    image.delete()
+
+    assert "og_image" not in LandingPage.objects.get(pk=landing_page.pk).seo_snapshot
+
+
+def test_unpublished_page_builds_snapshot_on_the_fly(client, home_page, site):
+    """Test pages published before snapshots existed still render SEO tags."""
+    home_page.custom_seo_title = "Custom Title"
+    home_page.save()
+
+    html = client.get("/").content.decode("utf-8")
+
+    assert "<title>Custom Title</title>" in html
+    assert '"@type": "WebSite"' in html
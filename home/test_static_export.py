@@ -0,0 +1,98 @@
+"""
+Tests for the static HTML export.
+"""
+import json
+import os
+
+import pytest
+from django.test import override_settings
+
+from home.static_export import export_site, static_export_queue
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def export_dir(tmp_path, settings):
+    settings.STATIC_EXPORT_ROOT = str(tmp_path)
+    settings.STATIC_EXPORT_ASSET_URL = ""
+    return tmp_path
+
+
+def read(path):
+    return path.read_text(encoding="utf-8")
+
+
+def test_full_export(export_dir, home_page, landing_page, site):
+    """Test pages, search, 404 and 500 are exported with a manifest."""
+    landing_page.save_revision().publish()
+
+    stats = export_site()
+
+    assert "Test Landing Page" in read(export_dir / "test-landing-page" / "index.html")
+    assert (export_dir / "index.html").exists()
+    assert (export_dir / "search" / "index.html").exists()
+    assert (export_dir / "404.html").exists()
+    assert (export_dir / "500.html").exists()
+    assert stats["rendered"] == 5
+    manifest = json.loads(read(export_dir / "manifest.json"))["files"]
+    assert manifest["test-landing-page/index.html"]["page"] == landing_page.pk
+    assert (export_dir / "static" / "js" / "myproject.js").exists()
+
+
+def test_unchanged_files_not_rewritten(export_dir, home_page, site):
+    """Test a second export leaves unchanged files alone."""
+    export_site()
+    mtime = os.stat(export_dir / "index.html").st_mtime_ns
+
+    stats = export_site()
+
+    assert stats["written"] == 0
+    assert stats["assets"] == 0
+    assert os.stat(export_dir / "index.html").st_mtime_ns == mtime
+
+
+def test_asset_urls_rewritten(export_dir, home_page, site, settings):
+    """Test static URLs point at the asset host and nothing is copied."""
+    settings.STATIC_EXPORT_ASSET_URL = "https://cdn.example.com/"
+
+    export_site()
+
+    html = read(export_dir / "index.html")
+    assert 'src="https://cdn.example.com/static/js/myproject.js"' in html
+    assert not (export_dir / "static").exists()
+
+
+def test_https_site_exported_with_https_urls(export_dir, home_page, site, settings):
+    """Test a port 443 site is rendered as HTTPS, not redirected or as http://."""
+    settings.SECURE_SSL_REDIRECT = True
+    site.hostname, site.port = "www.example.com", 443
+    site.save()
+
+    stats = export_site()
+
+    assert '<link rel="canonical" href="https://www.example.com/">' in read(
+        export_dir / "index.html"
+    )
+    assert stats["rendered"] == 4
+
+
+@override_settings(STATIC_EXPORT_ON_PUBLISH=True, STATIC_EXPORT_ASYNC=False)
+def test_publish_reexports_lineage(
+    export_dir, home_page, landing_page, site, django_capture_on_commit_callbacks
+):
+    """Test publishing re-exports the page and removes it when unpublished."""
+    landing_page.save_revision().publish()
+    export_site()
+
+    landing_page.title = "Renamed Landing Page"
+    with django_capture_on_commit_callbacks(execute=True):
+        landing_page.save_revision().publish()
+    assert "Renamed Landing Page" in read(
+        export_dir / "test-landing-page" / "index.html"
+    )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        landing_page.unpublish()
+    assert not (export_dir / "test-landing-page" / "index.html").exists()
+    assert not static_export_queue._pending
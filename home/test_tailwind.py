@@ -0,0 +1,93 @@
+"""
+Tests for the build-time Tailwind stylesheet.
+"""
+import json
+from io import StringIO
+
+import pytest
+from django.contrib.staticfiles import finders
+from django.core.management import call_command
+
+from home.tailwind import (
+    MANIFEST_PATH,
+    build_stylesheets,
+    generate_css,
+    minify_css,
+    scan_classes,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+def test_utilities_and_variants():
+    """Test theme colours, opacity, fractions and variants are generated."""
+    css = minify_css(
+        generate_css(
+            {"bg-primary", "hover:bg-primary/90", "md:w-1/2", "-top-6", "space-x-4"}
+        )
+    )
+
+    assert ".bg-primary{--tw-bg-opacity:1;background-color:rgb(79 70 229 / var(" in css
+    assert ".hover\\:bg-primary\\/90:hover{background-color:rgb(79 70 229 / 0.9)}" in css
+    assert "@media (min-width:768px){.md\\:w-1\\/2{width:50%}}" in css
+    assert ".-top-6{top:-1.5rem}" in css
+    assert ".space-x-4> :not([hidden]) ~ :not([hidden]){margin-left:1rem}" in css
+
+
+def test_specific_utilities_override_general_ones():
+    """Test rules are ordered like Tailwind's, whatever order classes are found in."""
+    css = generate_css({"pt-8", "px-4", "p-6", "hover:text-primary", "text-dark"})
+
+    assert css.index(".p-6") < css.index(".px-4") < css.index(".pt-8")
+    assert css.index(".text-dark") < css.index(".hover\\:text-primary")
+
+
+def test_scan_ignores_non_utilities():
+    """Test only known utilities are picked from template source."""
+    classes = scan_classes(
+        '<div class="prose egg md:flex {{ value.class }}">The grid layout</div>'
+    )
+
+    assert classes == {"md:flex", "grid"}
+
+
+def test_build_writes_hashed_stylesheet(tmp_path):
+    """Test the command writes a hashed stylesheet and removes older builds."""
+    (tmp_path / "css").mkdir()
+    (tmp_path / "css" / "site.0123456789ab.css").write_text("stale")
+
+    call_command("build_css", output=str(tmp_path), stdout=StringIO())
+
+    manifest = json.loads((tmp_path / MANIFEST_PATH).read_text())
+    stylesheet = (tmp_path / manifest["stylesheet"]).read_text()
+    assert not (tmp_path / "css" / "site.0123456789ab.css").exists()
+    assert ".container{width:100%}" in stylesheet
+    assert ".animate-fade-in{" in stylesheet
+    # Critical CSS covers a template and the layout it extends, not others.
+    landing = manifest["critical"]["home/landing_page.html"]
+    assert ".sticky{" in landing
+    assert ".border-l-4{" not in landing
+    assert ".border-l-4{" in manifest["critical"]["search/search.html"]
+
+
+def test_committed_stylesheet_is_current():
+    """Test the committed build matches the templates; run build_css if not."""
+    with open(finders.find(MANIFEST_PATH), encoding="utf-8") as f:
+        manifest = json.load(f)
+    with open(finders.find(manifest["stylesheet"]), encoding="utf-8") as f:
+        committed = f.read()
+
+    stylesheet, critical = build_stylesheets()
+
+    assert committed == stylesheet
+    assert manifest["critical"] == critical
+
+
+def test_pages_use_self_hosted_css(client, home_page, site):
+    """Test pages inline critical CSS and load the hashed stylesheet."""
+    html = client.get("/").content.decode("utf-8")
+
+    assert "<style>*,::before,::after{" in html
+    assert 'href="/static/css/site.' in html
+    assert "cdn.tailwindcss.com" not in html
+    assert "jquery" not in html
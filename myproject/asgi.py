@@ -0,0 +1,23 @@
+"""
+ASGI config for myproject project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Run it with uvicorn, directly or as gunicorn workers (see docs/deployment.md).
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "myproject.settings.dev")
+
+application = get_asgi_application()
+
+# Servers without a pre-fork hook can warm up here instead (see warmup.py).
+if os.getenv("DJANGO_WARMUP", "False") == "True":
+    from myproject.warmup import warm_up
+
+    warm_up()
@@ -1,30 +1,33 @@
 import os
 
+from django.utils.functional import SimpleLazyObject
+
 
 def site_settings(request):
     """
     Adds site settings variables to the context from the database SEO settings.
+
+    The values are lazy: the SEO settings are only looked up if a template
+    actually reads them, and then come from a per-process cache that is
+    refreshed whenever the snippet is saved or deleted.
     """
     # Import here to avoid circular imports
-    from home.models import SEOSettings
+    from home.cache import get_seo_settings
 
-    # Try to get the first SEO settings instance
-    seo_settings = SEOSettings.objects.first()
+    def setting(field_name):
+        def load():
+            seo_settings = get_seo_settings()
+            # Use database values if available, otherwise use empty defaults
+            # This allows admin to add values through the admin interface
+            if seo_settings is None:
+                return ""
+            return getattr(seo_settings, field_name)
 
-    # Check if we're in a test environment
-    is_test = "PYTEST_CURRENT_TEST" in os.environ
+        return SimpleLazyObject(load)
 
-    # Use database values if available, otherwise use empty defaults
-    # This allows admin to add values through the admin interface
-    if seo_settings:
-        return {
-            "site_name": seo_settings.site_name,
-            "site_description": seo_settings.default_description,
-            "is_test_environment": is_test,
-        }
-    else:
-        return {
-            "site_name": "",
-            "site_description": "",
-            "is_test_environment": is_test,
-        }
+    return {
+        "site_name": setting("site_name"),
+        "site_description": setting("default_description"),
+        # Check if we're in a test environment
+        "is_test_environment": "PYTEST_CURRENT_TEST" in os.environ,
+    }
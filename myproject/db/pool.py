@@ -0,0 +1,265 @@
+"""
+A process-local pool of database connections.
+
+Django opens a connection per thread and, with ``CONN_MAX_AGE = 0``, closes
+it at the end of every request; against a remote PostgreSQL that means a TCP
+and TLS handshake plus authentication for each request. The pooled backend
+(``myproject.db.postgresql_pool``) hands connections back to a pool instead,
+and the next request, in any thread of the same process, reuses them.
+
+Pools belong to one process. A forked child (a gunicorn worker) never uses
+or closes connections it inherited, since their sockets are shared with the
+parent; it starts with empty pools of its own.
+
+Connections that sat idle for longer than ``CHECK_IDLE_AFTER`` seconds are
+checked with a trivial query before being handed out, connections older than
+``MAX_LIFETIME`` are replaced, and idle connections beyond ``MIN_SIZE`` are
+closed after ``MAX_IDLE`` seconds. At most ``MAX_SIZE`` connections are open
+per process; when all are in use, callers wait up to ``TIMEOUT`` seconds.
+"""
+import collections
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "MIN_SIZE": 1,
+    "MAX_SIZE": 10,
+    "TIMEOUT": 10.0,
+    "CHECK_IDLE_AFTER": 30.0,
+    "MAX_IDLE": 300.0,
+    "MAX_LIFETIME": 3600.0,
+}
+
+STAT_NAMES = [
+    "connections_opened",
+    "connections_reused",
+    "connections_closed",
+    "checks",
+    "checks_failed",
+    "waits",
+    "timeouts",
+]
+
+
+class PoolTimeout(Exception):
+    """No connection became available within the pool's timeout."""
+
+
+class _Entry:
+    __slots__ = ("connection", "created_at", "returned_at")
+
+    def __init__(self, connection, now):
+        self.connection = connection
+        self.created_at = now
+        self.returned_at = now
+
+
+class ConnectionPool:
+    def __init__(self, alias, config=None):
+        config = {**DEFAULTS, **(config or {})}
+        self.alias = alias
+        self.min_size = int(config["MIN_SIZE"])
+        self.max_size = int(config["MAX_SIZE"])
+        self.timeout = float(config["TIMEOUT"])
+        self.check_idle_after = float(config["CHECK_IDLE_AFTER"])
+        self.max_idle = float(config["MAX_IDLE"])
+        self.max_lifetime = float(config["MAX_LIFETIME"])
+        self.pid = os.getpid()
+
+        self._idle = collections.deque()
+        self._in_use = {}
+        self._opening = 0
+        self._condition = threading.Condition()
+        self._stats = dict.fromkeys(STAT_NAMES, 0)
+
+    @property
+    def size(self):
+        return len(self._idle) + len(self._in_use) + self._opening
+
+    def getconn(self, connect):
+        """
+        Return a usable connection, opening one with ``connect()`` if none is
+        idle and the pool is not full.
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._condition:
+                entry = self._checkout(deadline)
+            if entry is None:
+                return self._open(connect)
+            if self._usable(entry):
+                with self._condition:
+                    self._stats["connections_reused"] += 1
+                    self._in_use[id(entry.connection)] = entry
+                return entry.connection
+            self._close(entry)
+
+    def _checkout(self, deadline):
+        # Called with the lock held. Returns an idle entry, or None after
+        # reserving a slot for a new connection.
+        waited = False
+        while not self._idle and self.size >= self.max_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._stats["timeouts"] += 1
+                raise PoolTimeout(
+                    f"No connection to {self.alias!r} available within "
+                    f"{self.timeout:g}s ({self.max_size} in use)"
+                )
+            if not waited:
+                self._stats["waits"] += 1
+                waited = True
+            self._condition.wait(remaining)
+        if self._idle:
+            # Most recently used first: it is the least likely to be stale.
+            return self._idle.pop()
+        self._opening += 1
+        return None
+
+    def _open(self, connect):
+        try:
+            connection = connect()
+        except BaseException:
+            with self._condition:
+                self._opening -= 1
+                self._condition.notify()
+            raise
+        entry = _Entry(connection, time.monotonic())
+        with self._condition:
+            self._opening -= 1
+            self._in_use[id(connection)] = entry
+            self._stats["connections_opened"] += 1
+        return connection
+
+    def _usable(self, entry):
+        now = time.monotonic()
+        if entry.connection.closed or now - entry.created_at > self.max_lifetime:
+            return False
+        if now - entry.returned_at < self.check_idle_after:
+            return True
+        with self._condition:
+            self._stats["checks"] += 1
+        try:
+            with entry.connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            entry.connection.rollback()
+        except Exception:
+            logger.info("Discarding broken idle connection to %r", self.alias)
+            with self._condition:
+                self._stats["checks_failed"] += 1
+            return False
+        return True
+
+    def putconn(self, connection):
+        """Take a connection back, rolling back any transaction it left open."""
+        with self._condition:
+            entry = self._in_use.pop(id(connection), None)
+        if entry is None:
+            # Not from this pool (e.g. inherited across a fork): leave it alone.
+            return
+        try:
+            # Leave no transaction open; a no-op for connections that are idle.
+            if not connection.closed:
+                connection.rollback()
+        except Exception:
+            pass
+        if connection.closed:
+            self._close(entry)
+            return
+
+        now = time.monotonic()
+        entry.returned_at = now
+        with self._condition:
+            self._idle.append(entry)
+            expired = self._expire_idle(now)
+            self._condition.notify()
+        for stale in expired:
+            self._close(stale)
+
+    def _expire_idle(self, now):
+        # Called with the lock held. Oldest idle connections are at the left.
+        expired = []
+        while len(self._idle) > self.min_size:
+            if now - self._idle[0].returned_at <= self.max_idle:
+                break
+            expired.append(self._idle.popleft())
+        return expired
+
+    def _close(self, entry):
+        try:
+            entry.connection.close()
+        except Exception:
+            pass
+        with self._condition:
+            self._stats["connections_closed"] += 1
+            self._condition.notify()
+
+    def close(self):
+        """Close every idle connection."""
+        with self._condition:
+            idle, self._idle = list(self._idle), collections.deque()
+        for entry in idle:
+            self._close(entry)
+
+    def stats(self):
+        with self._condition:
+            return {
+                "pid": self.pid,
+                "size": self.size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                **self._stats,
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+# Pools inherited from the parent process. Kept referenced so that their
+# connections are never garbage collected (which would close sockets the
+# parent still uses).
+_inherited = []
+
+
+def _forget_pools():
+    _inherited.extend(_pools.values())
+    _pools.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_pools)
+
+
+def get_pool(alias, config=None):
+    """Return this process's pool for the database ``alias``."""
+    pool = _pools.get(alias)
+    if pool is not None and pool.pid == os.getpid():
+        return pool
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is None or pool.pid != os.getpid():
+            if pool is not None:
+                _inherited.append(pool)
+            pool = _pools[alias] = ConnectionPool(alias, config)
+        return pool
+
+
+def close_pools():
+    """Close the idle connections of this process's pools, e.g. before forking."""
+    for pool in list(_pools.values()):
+        if pool.pid == os.getpid():
+            pool.close()
+
+
+def pool_stats():
+    """Return the statistics of this process's pools, by database alias."""
+    return {
+        alias: pool.stats()
+        for alias, pool in _pools.items()
+        if pool.pid == os.getpid()
+    }
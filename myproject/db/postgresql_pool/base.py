@@ -0,0 +1,36 @@
+"""
+PostgreSQL backend whose connections come from a per-process pool.
+
+Use it as the ``ENGINE`` of a database and tune the pool with a ``POOL``
+dict next to ``OPTIONS`` (keys as in ``myproject.db.pool.DEFAULTS``). Leave
+``CONN_MAX_AGE`` at 0: Django then "closes" the connection at the end of
+every request, which returns it to the pool for the next request.
+"""
+import functools
+
+from django.db.backends.postgresql import base as postgresql
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from myproject.db.pool import get_pool
+
+
+class DatabaseWrapper(postgresql.DatabaseWrapper):
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict.get("POOL"))
+
+    def get_new_connection(self, conn_params):
+        connect = functools.partial(super().get_new_connection, conn_params)
+        connection = self.pool.getconn(connect)
+        # get_new_connection() records the isolation level on the wrapper; a
+        # reused connection skipped it, so record it the same way.
+        options = self.settings_dict["OPTIONS"]
+        self.isolation_level = IsolationLevel(
+            options.get("isolation_level", IsolationLevel.READ_COMMITTED)
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.putconn(self.connection)
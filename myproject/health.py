@@ -1,26 +1,419 @@
-from django.db import connections
+"""
+Health check endpoints.
+
+- ``/health/live/`` (liveness): answers as long as the process serves
+  requests. No I/O, so a slow database never gets a healthy worker killed.
+- ``/health/ready/`` (readiness): reports the last result of a database and
+  cache probe that a background thread refreshes every
+  ``HEALTH_PROBE_INTERVAL`` seconds, so frequent polling (ECS, the load
+  balancer, nginx) costs no connections. Returns 503 when a dependency is
+  down, or when the probe has not completed for several intervals.
+- ``/health/deep/``: runs the database and cache checks now and reports
+  their round-trip latency, unapplied migrations and worker uptime. Meant for
+  people and dashboards, not for frequent polling. It answers only requests
+  bearing ``HEALTH_DEEP_TOKEN``, and goes through the whole middleware stack
+  (``ALLOWED_HOSTS`` included). Failures are reported without their error
+  messages, which are logged instead.
+- ``/health/``: the original endpoint, kept for existing probes. Always 200.
+
+Each view has an async variant (``*_async``), served over ASGI by
+``myproject.urls_async``.
+
+``HealthCheckMiddleware`` serves the others ahead of the session, auth and
+CSRF middleware.
+"""
+import hmac
+import logging
+import os
+import threading
+import time
+import uuid
+
+from asgiref.sync import (
+    async_to_sync,
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
 from django.db.utils import OperationalError
 from django.http import JsonResponse
-from django.views.decorators.csrf import csrf_exempt
+from django.urls import Resolver404, resolve
+from django.utils.cache import add_never_cache_headers
+
+from myproject.db.pool import pool_stats
+
+logger = logging.getLogger(__name__)
+
+HEALTH_CACHE_KEY = "myproject:health"
+HEALTH_PATH_PREFIX = "/health/"
+
+# A probe result older than this many intervals means the probe thread is
+# stuck (e.g. on a database that accepts connections but never answers).
+STALE_AFTER_INTERVALS = 3
+
+# Seconds before unapplied migrations are looked for again. None pending is
+# final for the process: its code, and so its migrations, never change.
+MIGRATIONS_RECHECK_INTERVAL = 60
+
+_started_at = time.time()
+
+
+def _reset_started_at():
+    # With a preloaded app the module is imported in the master; a worker's
+    # uptime starts when it is forked.
+    global _started_at
+    _started_at = time.time()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_started_at)
+
+
+def _database_status():
+    try:
+        connections["default"].cursor()
+    except OperationalError:
+        # Database is not ready yet
+        return "not_available"
+    return "ok"
+
+
+def check_database(alias=DEFAULT_DB_ALIAS):
+    """Run a trivial query and return its status and round-trip time."""
+    start = time.perf_counter()
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+    except Exception:
+        logger.warning("Health check: database not available", exc_info=True)
+        return {"status": "not_available"}
+    return {"status": "ok", "latency_ms": (time.perf_counter() - start) * 1000}
+
+
+def check_cache():
+    """Write and read back a key in the default cache."""
+    token = uuid.uuid4().hex
+    start = time.perf_counter()
+    try:
+        cache.set(HEALTH_CACHE_KEY, token, 30)
+        ok = cache.get(HEALTH_CACHE_KEY) == token
+    except Exception:
+        logger.warning("Health check: cache not available", exc_info=True)
+        return {"status": "not_available"}
+    if not ok:
+        logger.warning("Health check: cache value not read back")
+        return {"status": "not_available"}
+    return {"status": "ok", "latency_ms": (time.perf_counter() - start) * 1000}
+
+
+_migrations = {"result": None, "checked_at": 0.0}
+
+
+def check_migrations(alias=DEFAULT_DB_ALIAS):
+    """
+    Return the migrations not yet applied to the database.
+
+    Loading the migration graph reads every migration module, so the result
+    is kept: for good once none are pending, otherwise for
+    ``MIGRATIONS_RECHECK_INTERVAL`` seconds.
+    """
+    result = _migrations["result"]
+    if result is not None and (
+        result["status"] == "ok"
+        or time.time() - _migrations["checked_at"] < MIGRATIONS_RECHECK_INTERVAL
+    ):
+        return result
+    try:
+        executor = MigrationExecutor(connections[alias])
+        plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    except Exception:
+        logger.warning("Health check: migrations not readable", exc_info=True)
+        return {"status": "not_available"}
+    pending = [f"{migration.app_label}.{migration.name}" for migration, _ in plan]
+    result = {"status": "pending" if pending else "ok", "pending": pending}
+    _migrations.update(result=result, checked_at=time.time())
+    return result
+
+
+class HealthProbe:
+    """
+    Keep the latest result of the readiness checks, refreshed at a fixed
+    interval by a daemon thread in each worker process.
+
+    The thread is started by the first readiness request after a fork, never
+    in a master that is about to fork. With ``HEALTH_PROBE_ASYNC`` off the
+    probe runs inline instead, whenever its result is older than the interval.
+    """
+
+    def __init__(self):
+        self.result = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    @property
+    def interval(self):
+        return settings.HEALTH_PROBE_INTERVAL
+
+    def refresh(self):
+        """Run the checks now and store the result."""
+        result = {
+            "database": check_database(),
+            "cache": check_cache(),
+            "checked_at": time.time(),
+        }
+        self.result = result
+        return result
+
+    def age(self):
+        if self.result is None:
+            return None
+        return time.time() - self.result["checked_at"]
+
+    def needs_refresh(self):
+        if self.result is None:
+            return True
+        return not settings.HEALTH_PROBE_ASYNC and self.age() >= self.interval
+
+    def refresh_if_needed(self):
+        """Probe now if there is no usable result; concurrent callers wait."""
+        with self._refresh_lock:
+            if self.needs_refresh():
+                self.refresh()
+        return self.result
+
+    def start(self):
+        """Start this process's probe thread, unless it is already running."""
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name="health-probe", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Health probe failed")
+            finally:
+                # Return the probe's connection to the pool, or close it,
+                # according to CONN_MAX_AGE, as the end of a request would.
+                for connection in connections.all(initialized_only=True):
+                    connection.close_if_unusable_or_obsolete()
+            time.sleep(self.interval)
+
+
+probe = HealthProbe()
+
+
+def _ready_status(result, age):
+    if age is not None and age > STALE_AFTER_INTERVALS * max(probe.interval, 1):
+        return "stale"
+    if all(result[check]["status"] == "ok" for check in ("database", "cache")):
+        return "ok"
+    return "not_ready"
+
+
+def _health_check_response(db_status):
+    data = {"status": "ok", "db_status": db_status}
+    pools = pool_stats()
+    if pools:
+        data["db_pools"] = pools
+    return JsonResponse(data)
 
 
-@csrf_exempt
 def health_check(request):
     """
     Basic health check endpoint that doesn't rely on the database if it's not ready.
 
     If the DB is ready, it will include a db_status: "ok".
     If the DB is not ready, it will still return 200 but with db_status: "not_available".
+    With the pooled database backend, the statistics of this worker's pools
+    are included as db_pools.
     """
-    db_status = "not_available"
+    return _health_check_response(_database_status())
 
-    # Check database connection
-    try:
-        db_conn = connections["default"]
-        db_conn.cursor()
-        db_status = "ok"
-    except OperationalError:
-        # Database is not ready yet
-        pass
 
-    return JsonResponse({"status": "ok", "db_status": db_status})
+async def health_check_async(request):
+    """``health_check()`` for ASGI, with the database check in a thread."""
+    return _health_check_response(await sync_to_async(_database_status)())
+
+
+def liveness(request):
+    """Report that the process is serving requests. Does no I/O."""
+    return JsonResponse({"status": "ok"})
+
+
+async def liveness_async(request):
+    """``liveness()`` for ASGI, answered on the event loop."""
+    return liveness(request)
+
+
+def _readiness_response(result):
+    age = probe.age()
+    status = _ready_status(result, age)
+    data = {
+        "status": status,
+        "database": result["database"]["status"],
+        "cache": result["cache"]["status"],
+        "checked_seconds_ago": round(age, 3),
+    }
+    return JsonResponse(data, status=200 if status == "ok" else 503)
+
+
+def readiness(request):
+    """
+    Report whether the database and cache were reachable at the last probe.
+
+    Responds 503 when they were not, so that the load balancer stops routing
+    to this worker until they are.
+    """
+    if settings.HEALTH_PROBE_ASYNC:
+        probe.start()
+    result = probe.result
+    if probe.needs_refresh():
+        result = probe.refresh_if_needed()
+    return _readiness_response(result)
+
+
+async def readiness_async(request):
+    """``readiness()`` for ASGI; only a probe run inline needs a thread."""
+    if settings.HEALTH_PROBE_ASYNC:
+        probe.start()
+    result = probe.result
+    if probe.needs_refresh():
+        result = await sync_to_async(probe.refresh_if_needed)()
+    return _readiness_response(result)
+
+
+def _deep_checks():
+    return {
+        "database": check_database(),
+        "cache": check_cache(),
+        "migrations": check_migrations(),
+    }
+
+
+def _has_deep_token(request):
+    token = settings.HEALTH_DEEP_TOKEN
+    scheme, _, value = request.headers.get("Authorization", "").partition(" ")
+    return bool(token) and (
+        scheme.lower() == "bearer"
+        and hmac.compare_digest(value.encode(), token.encode())
+    )
+
+
+def _deep_response(checks):
+    healthy = (
+        checks["database"]["status"] == "ok" and checks["cache"]["status"] == "ok"
+    )
+    data = {
+        "status": "ok" if healthy else "not_ready",
+        **checks,
+        "worker": {"uptime_seconds": round(time.time() - _started_at, 3)},
+        "probe_age_seconds": probe.age(),
+    }
+    pools = pool_stats()
+    if pools:
+        data["db_pools"] = pools
+    response = JsonResponse(data, status=200 if healthy else 503)
+    add_never_cache_headers(response)
+    return response
+
+
+FORBIDDEN = {"status": "forbidden"}
+
+
+def deep(request):
+    """
+    Run every check now and report the details, with this worker's uptime,
+    database pools and last readiness probe.
+
+    Requires ``Authorization: Bearer <HEALTH_DEEP_TOKEN>``; without a token
+    configured the endpoint is off.
+    """
+    if not _has_deep_token(request):
+        return JsonResponse(FORBIDDEN, status=403)
+    return _deep_response(_deep_checks())
+
+
+async def deep_async(request):
+    """``deep()`` for ASGI, with the checks in a thread."""
+    if not _has_deep_token(request):
+        return JsonResponse(FORBIDDEN, status=403)
+    return _deep_response(await sync_to_async(_deep_checks)())
+
+
+# Served by HealthCheckMiddleware; /health/deep/ is not, so that the host
+# check and the rest of the middleware apply to it.
+HEALTH_VIEWS = (
+    health_check,
+    health_check_async,
+    liveness,
+    liveness_async,
+    readiness,
+    readiness_async,
+)
+
+# csrf_exempt only wraps sync views before Django 5.0; this is what it sets.
+for _view in (*HEALTH_VIEWS, deep, deep_async):
+    _view.csrf_exempt = True
+
+
+class HealthCheckMiddleware:
+    """
+    Serve the probe endpoints directly, skipping the rest of the middleware.
+
+    Probes arrive every few seconds from several sources and need no session,
+    user, CSRF token or redirect lookup. They also skip the ``ALLOWED_HOSTS``
+    check, so load balancers can probe a task by its IP address. Keep this
+    first in ``MIDDLEWARE``, after ``AsyncViewsMiddleware``.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def health_view(request):
+        if not request.path_info.startswith(HEALTH_PATH_PREFIX):
+            return None
+        try:
+            match = resolve(request.path_info, getattr(request, "urlconf", None))
+        except Resolver404:
+            return None
+        return match.func if match.func in HEALTH_VIEWS else None
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        view = self.health_view(request)
+        if view is not None:
+            if iscoroutinefunction(view):
+                return async_to_sync(view)(request)
+            return view(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        view = self.health_view(request)
+        if view is not None:
+            if iscoroutinefunction(view):
+                return await view(request)
+            return await sync_to_async(view)(request)
+        return await self.get_response(request)
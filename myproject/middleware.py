@@ -0,0 +1,33 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+ASYNC_URLCONF = "myproject.urls_async"
+
+
+class AsyncViewsMiddleware:
+    """
+    Route requests served over ASGI to the async variants of the views.
+
+    The search and health views come in pairs. Under ASGI the async ones
+    await their database and cache work without holding a worker. Under WSGI
+    Django would wrap each of them in an event loop of its own per request,
+    so the sync ones are served. Only the handler knows which server it runs
+    under, so the choice is made per request. Keep this first in
+    ``MIDDLEWARE``.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        request.urlconf = ASYNC_URLCONF
+        return await self.get_response(request)
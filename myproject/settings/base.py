@@ -67,6 +67,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "myproject.middleware.AsyncViewsMiddleware",
+    "myproject.health.HealthCheckMiddleware",
+    "home.middleware.PageCacheMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -103,14 +106,35 @@ WSGI_APPLICATION = "myproject.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+#
+# With DB_POOL=True connections come from a per-process pool (see
+# myproject/db/pool.py) and are returned to it at the end of each request.
+# Otherwise DB_CONN_MAX_AGE keeps each thread's connection open for that many
+# seconds, checked for health before reuse.
+DB_POOL = os.getenv("DB_POOL", "False") == "True"
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": (
+            "myproject.db.postgresql_pool"
+            if DB_POOL
+            else "django.db.backends.postgresql"
+        ),
         "NAME": os.getenv("DB_NAME", "myproject"),
         "USER": os.getenv("DB_USER", "postgres"),
         "PASSWORD": os.getenv("DB_PASSWORD", "q"),
         "HOST": os.getenv("DB_HOST", "localhost"),
         "PORT": os.getenv("DB_PORT", "5432"),
+        "CONN_MAX_AGE": 0 if DB_POOL else int(os.getenv("DB_CONN_MAX_AGE", "0")),
+        "CONN_HEALTH_CHECKS": True,
+        "POOL": {
+            "MIN_SIZE": int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+            "MAX_SIZE": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+            "TIMEOUT": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+            "CHECK_IDLE_AFTER": float(os.getenv("DB_POOL_CHECK_IDLE_AFTER", "30")),
+            "MAX_IDLE": float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+            "MAX_LIFETIME": float(os.getenv("DB_POOL_MAX_LIFETIME", "3600")),
+        },
     }
 }
 
@@ -161,6 +185,14 @@ STATICFILES_DIRS = [
     os.path.join(PROJECT_DIR, "static"),
 ]
 
+# Sources the build_css command scans for Tailwind classes.
+TAILWIND_CONTENT_DIRS = [
+    os.path.join(PROJECT_DIR, "templates"),
+    os.path.join(BASE_DIR, "home", "templates"),
+    os.path.join(BASE_DIR, "search", "templates"),
+    os.path.join(PROJECT_DIR, "static", "js"),
+]
+
 
 # CSRF settings
 CSRF_COOKIE_SECURE = True
@@ -202,12 +234,168 @@ WAGTAIL_SITE_NAME = "myproject"
 
 # Search
 # https://docs.wagtail.org/en/stable/topics/search/backends.html
+# On PostgreSQL, search.backends selects the tuned full-text backend in
+# search/postgres.py. SEARCH_LANGUAGE is the PostgreSQL text search
+# configuration used for stemming and stop words; run update_index after
+# changing it.
+SEARCH_LANGUAGE = os.getenv("SEARCH_LANGUAGE", "english")
+
 WAGTAILSEARCH_BACKENDS = {
     "default": {
-        "BACKEND": "wagtail.search.backends.database",
+        "BACKEND": "search.backends",
+        "SEARCH_CONFIG": SEARCH_LANGUAGE,
+        "TITLE_NORM_TTL": int(os.getenv("SEARCH_TITLE_NORM_TTL", "3600")),
+    }
+}
+
+# HomePage and LandingPage are indexed after publish, unpublish, move or
+# delete, and drafts on save, in a background thread that waits
+# SEARCH_INDEX_DELAY seconds so that repeated publishes are indexed once (see
+# search/indexing.py).
+SEARCH_INDEX_ASYNC = True
+SEARCH_INDEX_DELAY = float(os.getenv("SEARCH_INDEX_DELAY", "1"))
+
+# Search results are cached as ranked page ids (at most SEARCH_CACHE_MAX_RESULTS
+# per query) until the index changes or SEARCH_CACHE_TIMEOUT expires. Results
+# ranked lower can't be browsed; the results page says so. A request waits up
+# to SEARCH_CACHE_LOCK_TIMEOUT seconds for an identical search already running
+# elsewhere.
+SEARCH_CACHE_TIMEOUT = int(os.getenv("SEARCH_CACHE_TIMEOUT", "600"))
+SEARCH_CACHE_MAX_RESULTS = int(os.getenv("SEARCH_CACHE_MAX_RESULTS", "10000"))
+SEARCH_CACHE_LOCK_TIMEOUT = 10
+
+# Searches are counted per day and normalised query in DailyQueryHits. Hits
+# are buffered in each process and written in batches SEARCH_QUERY_LOG_INTERVAL
+# seconds after the first one, or once SEARCH_QUERY_LOG_MAX_PENDING distinct
+# queries are waiting (see search/querylog.py).
+SEARCH_QUERY_LOG = os.getenv("SEARCH_QUERY_LOG", "True") == "True"
+SEARCH_QUERY_LOG_INTERVAL = float(os.getenv("SEARCH_QUERY_LOG_INTERVAL", "30"))
+SEARCH_QUERY_LOG_MAX_PENDING = 1000
+
+# Typeahead suggestions for /search/autocomplete/, served from a snapshot file
+# each process memory-maps (see search/typeahead.py). build_typeahead writes it
+# at startup; published pages are picked up every TYPEAHEAD_REFRESH_INTERVAL
+# seconds, and the snapshot is rebuilt after TYPEAHEAD_REBUILD_AFTER seconds or
+# TYPEAHEAD_MAX_CHANGES changed pages.
+TYPEAHEAD_SNAPSHOT = os.getenv(
+    "TYPEAHEAD_SNAPSHOT", os.path.join(BASE_DIR, "typeahead.snapshot")
+)
+TYPEAHEAD_REFRESH_INTERVAL = 5
+TYPEAHEAD_REBUILD_AFTER = int(os.getenv("TYPEAHEAD_REBUILD_AFTER", "3600"))
+TYPEAHEAD_MAX_CHANGES = 500
+TYPEAHEAD_MIN_LENGTH = 2
+TYPEAHEAD_LIMIT = 8
+# Browser and CDN cache lifetime of autocomplete responses.
+TYPEAHEAD_CACHE_MAX_AGE = 60
+
+# Shared cache. Version stamps, cached pages, search results and their locks,
+# and typeahead changes must be seen by every worker and container, so this is
+# never a per-process cache outside development: Redis when REDIS_URL is set,
+# otherwise the database cache table (created by createcachetable in
+# docker-entrypoint.sh). home.checks warns when a per-process cache is in use.
+REDIS_URL = os.getenv("REDIS_URL", "")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "django_cache",
+        }
     }
+
+# Full-page cache for HomePage and LandingPage responses to anonymous visitors.
+# Entries are invalidated when a page (or one of its ancestors) is published,
+# unpublished, moved or deleted.
+PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE_ENABLED", "False") == "True"
+PAGE_CACHE_TIMEOUT = int(os.getenv("PAGE_CACHE_TIMEOUT", "600"))
+PAGE_CACHE_ALIAS = "default"
+
+# Each process keeps the SEO settings snippet in memory and checks its version
+# token in the cache at most every SEO_SETTINGS_RECHECK_INTERVAL seconds.
+SEO_SETTINGS_RECHECK_INTERVAL = float(
+    os.getenv("SEO_SETTINGS_RECHECK_INTERVAL", "5")
+)
+
+# Content-addressed HTML fragment cache for FeatureBlock, TestimonialBlock and
+# PartnerBlock. Keys change with the block content, so entries never go stale.
+FRAGMENT_CACHE_ENABLED = os.getenv("FRAGMENT_CACHE_ENABLED", "True") == "True"
+FRAGMENT_CACHE_TIMEOUT = int(os.getenv("FRAGMENT_CACHE_TIMEOUT", "86400"))
+FRAGMENT_CACHE_ALIAS = "default"
+
+# Shared-cache (CDN / nginx) headers for page responses. Each response lists the
+# objects it depends on in the surrogate-key header; when one of them changes,
+# its key is POSTed to PURGE_URL as {"surrogate_keys": [...]}. nginx cannot
+# purge by surrogate key, so it keeps pages for PAGE_CACHE_PROXY_MAXAGE seconds
+# only (X-Accel-Expires, which it reads before s-maxage and never forwards).
+PAGE_CACHE_S_MAXAGE = int(os.getenv("PAGE_CACHE_S_MAXAGE", "300"))
+PAGE_CACHE_PROXY_MAXAGE = int(os.getenv("PAGE_CACHE_PROXY_MAXAGE", "10"))
+PAGE_CACHE_STALE_WHILE_REVALIDATE = int(
+    os.getenv("PAGE_CACHE_STALE_WHILE_REVALIDATE", "60")
+)
+SURROGATE_KEY_HEADER = os.getenv("SURROGATE_KEY_HEADER", "Surrogate-Key")
+PURGE_URL = os.getenv("PURGE_URL", "")
+PURGE_AUTH_HEADER = os.getenv("PURGE_AUTH_HEADER", "Authorization")
+PURGE_TOKEN = os.getenv("PURGE_TOKEN", "")
+PURGE_BATCH_SIZE = int(os.getenv("PURGE_BATCH_SIZE", "256"))
+PURGE_MAX_RETRIES = int(os.getenv("PURGE_MAX_RETRIES", "3"))
+PURGE_RETRY_BACKOFF = float(os.getenv("PURGE_RETRY_BACKOFF", "0.5"))
+PURGE_TIMEOUT = float(os.getenv("PURGE_TIMEOUT", "5"))
+PURGE_ASYNC = True
+
+# Static HTML export (see home.static_export and the export_static_site
+# command). Static and media URLs are rewritten to STATIC_EXPORT_ASSET_URL when
+# set; otherwise the referenced files are copied into the export tree.
+STATIC_EXPORT_ROOT = os.getenv(
+    "STATIC_EXPORT_ROOT", os.path.join(BASE_DIR, "static_export")
+)
+STATIC_EXPORT_ASSET_URL = os.getenv("STATIC_EXPORT_ASSET_URL", "")
+STATIC_EXPORT_ON_PUBLISH = os.getenv("STATIC_EXPORT_ON_PUBLISH", "False") == "True"
+STATIC_EXPORT_ASYNC = True
+
+# Responsive <picture> ladders used by the {% responsive_picture %} tag. The
+# first spec of each ladder is the <img> src; the others widen the srcset.
+RESPONSIVE_IMAGE_FORMATS = ["avif", "webp"]
+RESPONSIVE_IMAGE_LADDERS = {
+    "hero": {
+        "specs": ["fill-600x500", "fill-360x300", "fill-1200x1000"],
+        "sizes": "(min-width: 1024px) 600px, 100vw",
+    },
+    "content": {
+        "specs": ["width-800", "width-400", "width-1200"],
+        "sizes": "(min-width: 768px) 50vw, 100vw",
+    },
+    "logo": {"specs": ["width-150", "width-300"], "sizes": "150px"},
+    "icon": {"specs": ["width-80", "width-160"], "sizes": "80px"},
 }
 
+# Rendition filter specs to pre-generate in addition to those found in the
+# templates, as a comma-separated list (see the generate_renditions command).
+RENDITION_EXTRA_FILTER_SPECS = [
+    spec for spec in os.getenv("RENDITION_EXTRA_FILTER_SPECS", "").split(",") if spec
+]
+
+# Mixed into page and search ETags, full-page cache keys and fragment cache keys
+# so that a deploy changing templates invalidates validators held by browsers
+# and crawlers and everything cached from the old templates. Dockerfile.prod
+# sets RELEASE_VERSION to the commit being built (a build argument, passed by
+# the CD workflow).
+CONDITIONAL_GET_SALT = os.getenv("RELEASE_VERSION", "")
+
+# Readiness probe (/health/ready/): database and cache are checked by a
+# background thread in each worker every HEALTH_PROBE_INTERVAL seconds.
+HEALTH_PROBE_INTERVAL = float(os.getenv("HEALTH_PROBE_INTERVAL", "10"))
+HEALTH_PROBE_ASYNC = True
+
+# /health/deep/ answers only requests with "Authorization: Bearer <token>";
+# it is off while no token is set.
+HEALTH_DEEP_TOKEN = os.getenv("HEALTH_DEEP_TOKEN", "")
+
 # Base URL to use when referring to full URLs within the Wagtail admin backend -
 # e.g. in notification emails. Don't include '/admin' or a trailing slash
 WAGTAILADMIN_BASE_URL = "http://example.com"
@@ -7,27 +7,39 @@ from django.db import connection  # Move import to top
 
 from .dev import *  # noqa
 
-# Use in-memory SQLite database for testing
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": ":memory:",
+# Use in-memory SQLite database for testing, or PostgreSQL when
+# TEST_POSTGRES_HOST is set. PostgreSQL runs the migrations, so that the search
+# indexes and tsvector queries they rely on are tested as deployed.
+if os.getenv("TEST_POSTGRES_HOST"):
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "HOST": os.environ["TEST_POSTGRES_HOST"],
+            "PORT": os.getenv("TEST_POSTGRES_PORT", "5432"),
+            "NAME": os.getenv("TEST_POSTGRES_NAME", "postgres"),
+            "USER": os.getenv("TEST_POSTGRES_USER", "postgres"),
+            "PASSWORD": os.getenv("TEST_POSTGRES_PASSWORD", ""),
+        }
+    }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": ":memory:",
+        }
     }
-}
-
-# Disable migrations by replacing the migration module with a dummy one
-# This significantly speeds up tests
-
 
-class DisableMigrations:
-    def __contains__(self, item):
-        return True
+    # Disable migrations by replacing the migration module with a dummy one
+    # This significantly speeds up tests
 
-    def __getitem__(self, item):
-        return None
+    class DisableMigrations:
+        def __contains__(self, item):
+            return True
 
+        def __getitem__(self, item):
+            return None
 
-MIGRATION_MODULES = DisableMigrations()
+    MIGRATION_MODULES = DisableMigrations()
 
 # Use a faster password hasher for testing
 PASSWORD_HASHERS = [
@@ -51,6 +63,9 @@ STORAGES = {
     },
 }
 
+# Tests that count searches flush the query log themselves.
+SEARCH_QUERY_LOG = False
+
 MEDIA_ROOT = os.path.join(BASE_DIR, "test-media")  # noqa
 STATIC_ROOT = os.path.join(BASE_DIR, "test-static")  # noqa
 
@@ -0,0 +1,121 @@
+"""
+Tests for serving the site over ASGI.
+"""
+import json
+from unittest.mock import patch
+
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.core import signals
+from django.db import close_old_connections
+from django.http import HttpResponse
+from django.test import RequestFactory
+from wagtail.models import Page
+
+from home.middleware import PageCacheMiddleware
+from myproject.health import _database_status, health_check, health_check_async
+from search.views import search, search_async
+
+pytestmark = pytest.mark.django_db
+
+
+def asgi_get(application, path):
+    """Send a GET through an ASGI application and return (status, body)."""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "query_string": b"",
+        "headers": [(b"host", b"localhost")],
+    }
+    # As the test client does: closing "old" connections would close the
+    # test's transaction on a database other than in-memory SQLite.
+    signals.request_started.disconnect(close_old_connections)
+    signals.request_finished.disconnect(close_old_connections)
+    try:
+        async_to_sync(application)(scope, receive, send)
+    finally:
+        signals.request_started.connect(close_old_connections)
+        signals.request_finished.connect(close_old_connections)
+    body = b"".join(
+        message.get("body", b"")
+        for message in messages
+        if message["type"] == "http.response.body"
+    )
+    return messages[0]["status"], body
+
+
+def test_health_check_over_asgi():
+    """Test the ASGI entry point serves the async health check."""
+    from myproject.asgi import application
+
+    with patch("myproject.health.sync_to_async", wraps=sync_to_async) as wrapper:
+        status, body = asgi_get(application, "/health/")
+
+    assert status == 200
+    assert json.loads(body)["status"] == "ok"
+    # Only the database check runs in a thread, not the whole view.
+    wrapper.assert_called_once_with(_database_status)
+
+
+def test_health_bypass_over_asgi():
+    """Test the health middleware serves liveness on the event loop."""
+    from myproject.asgi import application
+
+    with patch("myproject.health.sync_to_async") as sync_to_async:
+        status, body = asgi_get(application, "/health/live/")
+
+    assert status == 200
+    assert json.loads(body) == {"status": "ok"}
+    sync_to_async.assert_not_called()
+
+
+def test_views_match_the_server():
+    """Test ASGI requests get the async views, WSGI requests the sync ones."""
+    from myproject.urls import urlpatterns
+    from myproject.urls_async import urlpatterns as async_urlpatterns
+
+    views = {pattern.name: pattern.callback for pattern in urlpatterns[:6]}
+    async_views = {pattern.name: pattern.callback for pattern in async_urlpatterns[:6]}
+
+    assert views["search"] is search and views["health_check"] is health_check
+    assert async_views["search"] is search_async
+    assert async_views["health_check"] is health_check_async
+    assert not any(iscoroutinefunction(view) for view in views.values())
+    assert all(iscoroutinefunction(view) for view in async_views.values())
+
+
+@patch("search.views._perform_search")
+def test_async_search_evaluates_results_before_rendering(mock_search, site):
+    """Test the results page is evaluated in the search thread, not while rendering."""
+    mock_search.return_value = Page.objects.live().order_by("pk")
+    request = RequestFactory().get("/search/?query=welcome")
+
+    response = async_to_sync(search_async)(request)
+
+    results = response.context_data["search_results"]
+    assert isinstance(results.object_list, list)
+    assert results.object_list[0].title == "Root"
+
+
+def test_page_cache_middleware_supports_async():
+    """Test the page cache middleware does not force async views into a thread."""
+
+    async def get_response(request):
+        return HttpResponse("served")
+
+    middleware = PageCacheMiddleware(get_response)
+
+    assert iscoroutinefunction(middleware)
+    response = async_to_sync(middleware)(RequestFactory().get("/"))
+    assert response.content == b"served"
@@ -0,0 +1,61 @@
+"""
+Tests for the site_settings context processor.
+"""
+import pytest
+from django.test import RequestFactory
+
+from home.models import SEOSettings
+from myproject.context_processors import site_settings
+
+pytestmark = pytest.mark.django_db
+
+
+def test_site_settings_values(seo_settings):
+    """Test the context exposes the SEO settings values."""
+    context = site_settings(RequestFactory().get("/"))
+
+    assert context["site_name"] == "Test Site"
+    assert context["site_description"] == "Test description for SEO"
+
+
+def test_site_settings_defaults_without_snippet():
+    """Test empty defaults are used when no SEO settings exist."""
+    context = site_settings(RequestFactory().get("/"))
+
+    assert context["site_name"] == ""
+    assert context["site_description"] == ""
+
+
+def test_site_settings_is_lazy(django_assert_num_queries):
+    """Test no query runs unless a template reads the values."""
+    with django_assert_num_queries(0):
+        site_settings(RequestFactory().get("/"))
+
+
+def test_site_settings_warm_cache_is_query_free(seo_settings, django_assert_num_queries):
+    """Test a warm worker serves the values without touching the database."""
+    str(site_settings(RequestFactory().get("/"))["site_name"])
+
+    with django_assert_num_queries(0):
+        context = site_settings(RequestFactory().get("/"))
+        assert str(context["site_name"]) == "Test Site"
+        assert str(context["site_description"]) == "Test description for SEO"
+
+
+def test_site_settings_refreshed_on_save(seo_settings):
+    """Test saving the snippet refreshes the cached values."""
+    str(site_settings(RequestFactory().get("/"))["site_name"])
+
+    seo_settings.site_name = "Updated Site"
+    seo_settings.save()
+
+    assert site_settings(RequestFactory().get("/"))["site_name"] == "Updated Site"
+
+
+def test_site_settings_refreshed_on_delete(seo_settings):
+    """Test deleting the snippet falls back to empty defaults."""
+    str(site_settings(RequestFactory().get("/"))["site_name"])
+
+    SEOSettings.objects.all().delete()
+
+    assert site_settings(RequestFactory().get("/"))["site_name"] == ""
@@ -0,0 +1,205 @@
+"""
+Tests for the database connection pool.
+"""
+import os
+import threading
+
+import pytest
+from django.db import connections
+from django.test import override_settings
+from django.urls import reverse
+
+from myproject.db import pool as pool_module
+from myproject.db.pool import ConnectionPool, PoolTimeout, get_pool, pool_stats
+
+
+class FakeConnection:
+    def __init__(self, broken=False):
+        self.closed = False
+        self.broken = broken
+        self.rollbacks = 0
+
+    def cursor(self):
+        connection = self
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc_info):
+                return False
+
+            def execute(self, sql):
+                if connection.broken:
+                    raise OSError("server closed the connection")
+
+        return Cursor()
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def make_pool():
+    def make(**config):
+        return ConnectionPool("default", config)
+
+    return make
+
+
+def test_connections_are_reused(make_pool):
+    """Test a returned connection is handed out again instead of a new one."""
+    pool = make_pool()
+    connection = pool.getconn(FakeConnection)
+    pool.putconn(connection)
+
+    assert pool.getconn(FakeConnection) is connection
+    stats = pool.stats()
+    assert stats["connections_opened"] == 1
+    assert stats["connections_reused"] == 1
+    assert stats["in_use"] == 1
+
+
+def test_returned_connection_rolled_back(make_pool):
+    """Test no transaction is left open on a pooled connection."""
+    pool = make_pool()
+    connection = pool.getconn(FakeConnection)
+
+    pool.putconn(connection)
+
+    assert connection.rollbacks == 1
+
+
+def test_broken_idle_connection_replaced(make_pool):
+    """Test an idle connection failing its check is closed and replaced."""
+    pool = make_pool(CHECK_IDLE_AFTER=0)
+    broken = pool.getconn(lambda: FakeConnection(broken=True))
+    pool.putconn(broken)
+
+    connection = pool.getconn(FakeConnection)
+
+    assert connection is not broken
+    assert broken.closed
+    assert pool.stats()["checks_failed"] == 1
+    assert pool.stats()["size"] == 1
+
+
+def test_old_connections_replaced(make_pool):
+    """Test connections past their lifetime are not reused."""
+    pool = make_pool(MAX_LIFETIME=0)
+    old = pool.getconn(FakeConnection)
+    pool.putconn(old)
+
+    assert pool.getconn(FakeConnection) is not old
+    assert old.closed
+
+
+def test_idle_connections_above_min_size_closed(make_pool):
+    """Test the pool shrinks back to its minimum size once idle."""
+    pool = make_pool(MIN_SIZE=1, MAX_IDLE=0)
+    first, second = pool.getconn(FakeConnection), pool.getconn(FakeConnection)
+
+    pool.putconn(first)
+    pool.putconn(second)
+
+    assert first.closed
+    assert not second.closed
+    assert pool.stats()["idle"] == 1
+
+
+def test_full_pool_waits_then_times_out(make_pool):
+    """Test callers wait for a connection and give up after the timeout."""
+    pool = make_pool(MAX_SIZE=1, TIMEOUT=0.05)
+    connection = pool.getconn(FakeConnection)
+
+    with pytest.raises(PoolTimeout):
+        pool.getconn(FakeConnection)
+
+    threading.Timer(0.01, pool.putconn, [connection]).start()
+    pool.timeout = 5
+    assert pool.getconn(FakeConnection) is connection
+    assert pool.stats()["waits"] == 2
+
+
+def test_failed_connect_frees_its_slot(make_pool):
+    """Test a connection that could not be opened does not use up the pool."""
+    pool = make_pool(MAX_SIZE=1)
+
+    def refuse():
+        raise OSError("connection refused")
+
+    with pytest.raises(OSError):
+        pool.getconn(refuse)
+
+    assert pool.getconn(FakeConnection) is not None
+
+
+def test_inherited_pools_never_touched(monkeypatch):
+    """Test a forked worker gets its own pool and leaves the parent's alone."""
+    monkeypatch.setattr(pool_module, "_pools", {})
+    monkeypatch.setattr(pool_module, "_inherited", [])
+    parent_pool = get_pool("default")
+    inherited = parent_pool.getconn(FakeConnection)
+    parent_pool.putconn(inherited)
+
+    monkeypatch.setattr(os, "getpid", lambda: parent_pool.pid + 1)
+    child_pool = get_pool("default")
+
+    assert child_pool is not parent_pool
+    assert child_pool.getconn(FakeConnection) is not inherited
+    assert not inherited.closed
+    assert parent_pool in pool_module._inherited
+    assert list(pool_stats()) == ["default"]
+
+
+@pytest.mark.django_db
+def test_health_check_reports_pool_stats(client, monkeypatch):
+    """Test the health check includes this worker's pool statistics."""
+    monkeypatch.setattr(pool_module, "_pools", {})
+    get_pool("default").getconn(FakeConnection)
+
+    data = client.get(reverse("health_check")).json()
+
+    assert data["db_pools"]["default"]["in_use"] == 1
+    assert data["db_pools"]["default"]["pid"] == os.getpid()
+
+
+@pytest.mark.skipif(
+    not os.getenv("TEST_POSTGRES_HOST"),
+    reason="set TEST_POSTGRES_HOST (and TEST_POSTGRES_USER/PASSWORD/NAME) to run",
+)
+def test_pooled_backend_against_postgresql(django_db_blocker):
+    """Test Django reuses pooled connections across connect/close cycles."""
+    pytest.importorskip("psycopg2")
+    databases = {
+        "default": connections.settings["default"],
+        "pooled": {
+            "ENGINE": "myproject.db.postgresql_pool",
+            "HOST": os.environ["TEST_POSTGRES_HOST"],
+            "PORT": os.getenv("TEST_POSTGRES_PORT", "5432"),
+            "NAME": os.getenv("TEST_POSTGRES_NAME", "postgres"),
+            "USER": os.getenv("TEST_POSTGRES_USER", "postgres"),
+            "PASSWORD": os.getenv("TEST_POSTGRES_PASSWORD", ""),
+            "POOL": {"MAX_SIZE": 2},
+        },
+    }
+    # A connection of its own, outside the test database.
+    with override_settings(DATABASES=databases), django_db_blocker.unblock():
+        connections.settings = connections.configure_settings(databases)
+        connection = connections.create_connection("pooled")
+        try:
+            backend_pids = set()
+            for _ in range(3):
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT pg_backend_pid()")
+                    backend_pids.add(cursor.fetchone()[0])
+                connection.close()
+        finally:
+            get_pool("pooled").close()
+            connections.settings = connections.configure_settings(None)
+
+    assert len(backend_pids) == 1
+    assert get_pool("pooled").stats()["connections_reused"] == 2
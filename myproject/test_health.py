@@ -4,7 +4,9 @@ Tests for health check endpoint.
 from unittest.mock import patch
 
 import pytest
+from django.db.migrations.executor import MigrationExecutor
 from django.db.utils import OperationalError
+from django.test import override_settings
 from django.urls import reverse
 
 pytestmark = pytest.mark.django_db
@@ -45,3 +47,201 @@ def test_health_check_post_method(client):
     assert response.status_code == 200
     data = response.json()
     assert data["status"] == "ok"
+
+
+@pytest.fixture
+def probe():
+    from myproject.health import probe
+
+    probe.result = None
+    yield probe
+    probe.result = None
+
+
+def test_liveness_does_no_io(client, django_assert_num_queries):
+    """Test liveness answers without touching the database."""
+    with django_assert_num_queries(0):
+        response = client.get(reverse("health_live"))
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+
+
+@override_settings(HEALTH_PROBE_ASYNC=False)
+def test_readiness_ok(client, probe):
+    """Test readiness reports the database and cache as reachable."""
+    response = client.get(reverse("health_ready"))
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "ok"
+    assert data["database"] == "ok"
+    assert data["cache"] == "ok"
+
+
+@override_settings(HEALTH_PROBE_ASYNC=False)
+@patch("myproject.health.check_database")
+def test_readiness_fails_without_db(mock_check_database, client, probe):
+    """Test readiness responds 503 when the database is unreachable."""
+    mock_check_database.return_value = {"status": "not_available", "error": "down"}
+
+    response = client.get(reverse("health_ready"))
+
+    assert response.status_code == 503
+    assert response.json()["database"] == "not_available"
+
+
+def test_readiness_uses_probe_result(client, probe, django_assert_num_queries):
+    """Test readiness replays the background probe's result without queries."""
+    probe.refresh()
+
+    with patch.object(probe, "start") as start, django_assert_num_queries(0):
+        response = client.get(reverse("health_ready"))
+
+    start.assert_called_once()
+    assert response.status_code == 200
+
+
+@override_settings(HEALTH_PROBE_INTERVAL=10)
+def test_readiness_fails_when_probe_stale(client, probe):
+    """Test a probe that stopped reporting makes the worker not ready."""
+    probe.refresh()
+    probe.result["checked_at"] -= 60
+
+    with patch.object(probe, "start"):
+        response = client.get(reverse("health_ready"))
+
+    assert response.status_code == 503
+    assert response.json()["status"] == "stale"
+
+
+def test_probe_thread_restarted_after_fork(probe):
+    """Test each process runs its own probe thread, started once."""
+    with patch.object(probe, "_run"):
+        probe.start()
+        thread = probe._thread
+        thread.join()
+        # A finished thread is replaced, as one inherited across a fork is.
+        probe.start()
+        assert probe._thread is not thread
+        probe._thread.join()
+
+
+@pytest.fixture
+def deep_token(settings):
+    settings.HEALTH_DEEP_TOKEN = "s3cret"
+    return {"HTTP_AUTHORIZATION": "Bearer s3cret"}
+
+
+@pytest.fixture
+def migrations():
+    from myproject.health import _migrations
+
+    _migrations.update(result=None, checked_at=0.0)
+    yield
+    _migrations.update(result=None, checked_at=0.0)
+
+
+def test_deep_health_check(client, deep_token, migrations):
+    """Test the deep check reports latency, cache, migrations and uptime."""
+    response = client.get(reverse("health_deep"), **deep_token)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["database"]["status"] == "ok"
+    assert data["database"]["latency_ms"] >= 0
+    assert data["cache"]["status"] == "ok"
+    assert data["migrations"] == {"status": "ok", "pending": []}
+    assert data["worker"]["uptime_seconds"] >= 0
+    assert "pid" not in data["worker"]
+    assert "no-store" in response["Cache-Control"]
+
+
+@pytest.mark.parametrize("authorization", [None, "Bearer wrong", "s3cret"])
+def test_deep_health_check_requires_token(client, deep_token, authorization):
+    """Test the deep check refuses requests without the token."""
+    headers = {"HTTP_AUTHORIZATION": authorization} if authorization else {}
+
+    response = client.get(reverse("health_deep"), **headers)
+
+    assert response.status_code == 403
+    assert response.json() == {"status": "forbidden"}
+
+
+def test_deep_health_check_off_without_token(client, settings):
+    """Test the deep check is off when no token is configured."""
+    settings.HEALTH_DEEP_TOKEN = ""
+
+    response = client.get(reverse("health_deep"), HTTP_AUTHORIZATION="Bearer ")
+
+    assert response.status_code == 403
+
+
+def test_deep_health_check_checks_host(client, deep_token, settings):
+    """Test the deep check goes through the middleware, host check included."""
+    settings.ALLOWED_HOSTS = ["example.com"]
+
+    response = client.get(reverse("health_deep"), HTTP_HOST="evil.test", **deep_token)
+
+    assert response.status_code == 400
+
+
+@patch("myproject.health.connections")
+def test_deep_health_check_hides_errors(mock_connections, client, deep_token):
+    """Test a failing check is reported without its error message."""
+    mock_connections.__getitem__.return_value.cursor.side_effect = OperationalError(
+        'could not connect to server at "db.internal" (10.0.3.7)'
+    )
+
+    with patch("myproject.health.check_migrations", return_value={"status": "ok"}):
+        response = client.get(reverse("health_deep"), **deep_token)
+
+    assert response.status_code == 503
+    assert response.json()["database"] == {"status": "not_available"}
+    assert "10.0.3.7" not in response.content.decode()
+
+
+@patch("myproject.health.check_migrations")
+def test_deep_health_check_reports_pending_migrations(
+    mock_check_migrations, client, deep_token
+):
+    """Test unapplied migrations are listed."""
+    mock_check_migrations.return_value = {
+        "status": "pending",
+        "pending": ["home.0099_example"],
+    }
+
+    data = client.get(reverse("health_deep"), **deep_token).json()
+
+    assert data["migrations"]["pending"] == ["home.0099_example"]
+
+
+def test_migration_check_cached(migrations):
+    """Test the migration graph is loaded once, while nothing is pending."""
+    from myproject.health import check_migrations
+
+    with patch(
+        "myproject.health.MigrationExecutor", wraps=MigrationExecutor
+    ) as executor:
+        assert check_migrations() == check_migrations() == {
+            "status": "ok",
+            "pending": [],
+        }
+
+    executor.assert_called_once()
+
+
+def test_health_requests_skip_middleware(client):
+    """Test health checks bypass the session, CSRF and other middleware."""
+    response = client.get(reverse("health_live"), HTTP_HOST="10.0.1.23")
+
+    assert response.status_code == 200
+    assert "X-Frame-Options" not in response
+    assert "Vary" not in response
+
+
+def test_other_requests_use_middleware(client):
+    """Test only the health endpoints bypass the middleware."""
+    response = client.get(reverse("search"))
+
+    assert "X-Frame-Options" in response
@@ -0,0 +1,45 @@
+"""
+Tests for the pre-fork warmup.
+"""
+import gc
+
+import pytest
+
+from myproject import warmup
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def fresh_warmup(monkeypatch):
+    monkeypatch.setattr(warmup, "_warmed_up", False)
+    yield
+    gc.unfreeze()
+
+
+def test_project_templates_found():
+    """Test the project's public templates are found, and not Wagtail's."""
+    names = warmup.project_template_names()
+
+    assert "base.html" in names
+    assert "home/landing_page.html" in names
+    assert "search/search.html" in names
+    assert not any(name.startswith("wagtailadmin/") for name in names)
+
+
+def test_warm_up_runs_no_queries_and_freezes(fresh_warmup, django_assert_num_queries):
+    """Test warming up compiles templates without queries and freezes the heap."""
+    with django_assert_num_queries(0):
+        warmup.warm_up()
+
+    assert gc.get_freeze_count() > 0
+
+
+def test_warm_up_runs_once(fresh_warmup, monkeypatch):
+    """Test a second call (from wsgi.py and the gunicorn hook) does nothing."""
+    warmup.warm_up()
+    monkeypatch.setattr(
+        warmup, "compile_templates", lambda: pytest.fail("warmed up twice")
+    )
+
+    warmup.warm_up()
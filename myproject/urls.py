@@ -5,15 +5,38 @@ from wagtail import urls as wagtail_urls
 from wagtail.admin import urls as wagtailadmin_urls
 from wagtail.documents import urls as wagtaildocs_urls
 
-from myproject.health import health_check
-from search.views import search
+from myproject import health
+from search import views as search_views
+
+# Views doing I/O, with their async variants for ASGI: under WSGI, Django
+# would run an async view in an event loop of its own for each request.
+IO_VIEWS = [
+    ("search/", "search", search_views.search, search_views.search_async),
+    (
+        "search/autocomplete/",
+        "search_autocomplete",
+        search_views.autocomplete,
+        search_views.autocomplete_async,
+    ),
+    ("health/", "health_check", health.health_check, health.health_check_async),
+    ("health/live/", "health_live", health.liveness, health.liveness_async),
+    ("health/ready/", "health_ready", health.readiness, health.readiness_async),
+    ("health/deep/", "health_deep", health.deep, health.deep_async),
+]
+
+
+def io_urlpatterns(async_views=False):
+    """The search and health URLs, for WSGI or, with ``async_views``, ASGI."""
+    return [
+        path(route, async_view if async_views else sync_view, name=name)
+        for route, name, sync_view, async_view in IO_VIEWS
+    ]
+
 
 urlpatterns = [
     path("django-admin/", admin.site.urls),
     path("admin/", include(wagtailadmin_urls)),
     path("documents/", include(wagtaildocs_urls)),
-    path("search/", search, name="search"),
-    path("health/", health_check, name="health_check"),
 ]
 
 
@@ -25,7 +48,8 @@ if settings.DEBUG:
     urlpatterns += staticfiles_urlpatterns()
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
-urlpatterns = urlpatterns + [
+# Everything but the search and health URLs, which come first.
+base_urlpatterns = urlpatterns + [
     # For anything not caught by a more specific rule above, hand over to
     # Wagtail's page serving mechanism. This should be the last pattern in
     # the list:
@@ -34,3 +58,5 @@ urlpatterns = urlpatterns + [
     # of your site, rather than the site root:
     #    path("pages/", include(wagtail_urls)),
 ]
+
+urlpatterns = io_urlpatterns() + base_urlpatterns
@@ -0,0 +1,7 @@
+"""
+URLconf of requests served over ASGI (see ``myproject.middleware``): the
+search and health URLs are served by the async variants of their views.
+"""
+from myproject.urls import base_urlpatterns, io_urlpatterns
+
+urlpatterns = io_urlpatterns(async_views=True) + base_urlpatterns
@@ -0,0 +1,113 @@
+"""
+Warm up a preloaded application before the server forks its workers.
+
+Without it every gunicorn worker compiles the templates, builds the URL
+resolver and looks up static URLs on its first requests, so the first
+requests after a deploy or a worker recycle are slow. ``warm_up()`` does
+that work once in the master (and maps the typeahead snapshot, so that the
+workers share it), then freezes the garbage collector so that the
+objects it created stay in pages the workers share copy-on-write instead of
+being touched (and copied) by each worker's collections.
+
+It is called from ``gunicorn.conf.py`` once the preloaded application is
+ready, and from ``wsgi.py`` when ``DJANGO_WARMUP`` is set, for servers that
+have no such hook. No database queries are made, and connections are closed
+before returning so that no worker inherits a socket.
+"""
+import gc
+import logging
+import os
+import time
+
+from django.db import connections
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+from django.templatetags.static import static
+from django.urls import get_resolver, reverse
+
+from myproject.db.pool import close_pools
+from search.typeahead import typeahead
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_EXTENSIONS = (".html", ".txt", ".xml")
+
+_warmed_up = False
+
+
+def project_template_names():
+    """Return the names of the templates in the project's template dirs."""
+    from home.renditions import project_template_dirs
+
+    names = set()
+    for directory in project_template_dirs():
+        for dirpath, _dirnames, filenames in os.walk(directory):
+            for filename in filenames:
+                if filename.endswith(TEMPLATE_EXTENSIONS):
+                    path = os.path.relpath(os.path.join(dirpath, filename), directory)
+                    names.add(path.replace(os.sep, "/"))
+    return sorted(names)
+
+
+def compile_templates():
+    """Compile the project's templates into the cached loaders. Returns the count."""
+    compiled = 0
+    for engine in engines.all():
+        for name in project_template_names():
+            try:
+                engine.get_template(name)
+            except TemplateDoesNotExist:
+                continue
+            except TemplateSyntaxError:
+                logger.exception("Template %s does not compile", name)
+                continue
+            compiled += 1
+    return compiled
+
+
+def resolve_urls():
+    """Build the URL resolver's lookup tables."""
+    resolver = get_resolver()
+    resolver.resolve("/")
+    reverse("search")
+
+
+def prime_static_urls():
+    """Load the static manifests and compute the URLs every page links to."""
+    from home.renditions import picture_formats
+    from home.tailwind import load_manifest
+
+    manifest = load_manifest()
+    if manifest is not None:
+        static(manifest["stylesheet"])
+    static("js/myproject.js")
+    picture_formats()
+
+
+def warm_up():
+    """
+    Do the per-process work of the first requests now, then freeze the heap.
+
+    Safe to call more than once; only the first call does anything.
+    """
+    global _warmed_up
+    if _warmed_up:
+        return
+    _warmed_up = True
+
+    start = time.perf_counter()
+    templates = compile_templates()
+    resolve_urls()
+    prime_static_urls()
+    typeahead.load()
+    connections.close_all()
+    close_pools()
+
+    # Collect first so that garbage is not frozen along with the heap.
+    gc.collect()
+    gc.freeze()
+    logger.info(
+        "Warmed up in %.0f ms: %d templates compiled, %d objects frozen",
+        (time.perf_counter() - start) * 1000,
+        templates,
+        gc.get_freeze_count(),
+    )
@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "myproject.settings.dev")
 
 application = get_wsgi_application()
+
+# Servers without a pre-fork hook can warm up here instead (see warmup.py).
+if os.getenv("DJANGO_WARMUP", "False") == "True":
+    from myproject.warmup import warm_up
+
+    warm_up()
@@ -0,0 +1,17 @@
+"""
+Search backend selector for ``WAGTAILSEARCH_BACKENDS``.
+
+Uses the tuned PostgreSQL backend in ``search.postgres`` when the default
+database is PostgreSQL, and Wagtail's database backend (SQLite FTS5 in
+development and tests) otherwise.
+"""
+from django.db import connection
+from wagtail.search.backends import database
+
+
+def SearchBackend(params):
+    if connection.vendor == "postgresql":
+        from search.postgres import PostgresSearchBackend
+
+        return PostgresSearchBackend(params)
+    return database.SearchBackend(params)
@@ -0,0 +1,197 @@
+"""
+Version stamp for the search index, and the search result cache.
+
+The token changes whenever a page enters, leaves or changes in the index, so
+anything derived from search results (validators, cached result sets) can
+embed it and go stale automatically.
+
+Result sets are cached as ranked page ids, so every page of results for a
+query is served from one search. The key is built from the normalised query,
+the page types searched and the index version. When an entry is missing,
+only one request computes it: others asking for the same key, in the same
+process or not, wait for its result instead of running the same search.
+"""
+import hashlib
+import re
+import threading
+import time
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import QuerySet
+
+from home.cache import (
+    SEO_SETTINGS_VERSION_KEY,
+    bump_versions,
+    get_page_cache,
+    get_version,
+    get_versions,
+)
+from search.results import load_results
+
+SEARCH_INDEX_VERSION_KEY = "search:index:version"
+SEARCH_RESULTS_PREFIX = "search:results"
+
+# Words PostgreSQL's english configuration drops from queries (a subset of its
+# stop word list), so that "the solar panels" and "solar panels" share an entry.
+STOP_WORDS = {
+    "english": frozenset(
+        "a an and are as at be but by for if in into is it no not of on or such "
+        "that the their then there these they this to was will with".split()
+    ),
+}
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def get_index_version():
+    return get_version(SEARCH_INDEX_VERSION_KEY)
+
+
+def invalidate_index():
+    bump_versions([SEARCH_INDEX_VERSION_KEY])
+
+
+def search_etag(request):
+    """
+    Return a validator for a search results page.
+
+    Results only change with the index, and the surrounding layout only with
+    the SEO settings, so the validator is built from those two versions and
+    the query string (which carries the query and page number).
+    """
+    versions = get_versions([SEARCH_INDEX_VERSION_KEY, SEO_SETTINGS_VERSION_KEY])
+    parts = [
+        getattr(settings, "CONDITIONAL_GET_SALT", ""),
+        versions[SEARCH_INDEX_VERSION_KEY],
+        versions[SEO_SETTINGS_VERSION_KEY],
+        request.META.get("QUERY_STRING", ""),
+    ]
+    return '"%s"' % hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+# Search results
+
+
+def normalise_query(query):
+    """
+    Return the form of ``query`` that identifies its results.
+
+    Case and whitespace never change the results. Stop words are only
+    dropped on PostgreSQL, whose text search configuration ignores them;
+    a query made only of stop words is kept as it is.
+    """
+    words = WHITESPACE_RE.split(query.strip().casefold())
+    stop_words = frozenset()
+    if connection.vendor == "postgresql":
+        stop_words = STOP_WORDS.get(settings.SEARCH_LANGUAGE, frozenset())
+    return " ".join([word for word in words if word not in stop_words] or words)
+
+
+def results_key(query, page_types=()):
+    labels = sorted(model._meta.label_lower for model in page_types)
+    parts = [normalise_query(query), ",".join(labels), get_index_version()]
+    digest = hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+    return f"{SEARCH_RESULTS_PREFIX}:{digest}"
+
+
+class CachedResults(Sequence):
+    """
+    Ranked search results for the paginator.
+
+    The pages are loaded per slice from the ranked ids (see
+    ``search.results.load_results()``), unless the search just ran in this
+    request and they were loaded already.
+    """
+
+    def __init__(self, ids, pages=None):
+        self.ids = ids
+        self.pages = pages
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if self.pages is not None:
+            return self.pages[index]
+        if not isinstance(index, slice):
+            return self[index : index + 1][0]
+        return load_results(self.ids[index])
+
+
+_computing = {}
+_computing_lock = threading.Lock()
+
+
+def cached_search(query, search, page_types=()):
+    """
+    Return ``CachedResults`` for ``query``, calling ``search()`` on a miss.
+
+    ``search`` returns the ranked results; at most ``SEARCH_CACHE_MAX_RESULTS``
+    of them are kept.
+    """
+    cache = get_page_cache()
+    key = results_key(query, page_types)
+    ids = cache.get(key)
+    if ids is not None:
+        return CachedResults(ids)
+
+    # Single flight: within the process, wait for the thread computing the
+    # same key; across processes, for whoever holds the lock key.
+    with _computing_lock:
+        event = _computing.get(key)
+        owner = event is None
+        if owner:
+            event = _computing[key] = threading.Event()
+    if not owner:
+        event.wait(settings.SEARCH_CACHE_LOCK_TIMEOUT)
+        ids = cache.get(key)
+        if ids is not None:
+            return CachedResults(ids)
+        return _search(cache, key, search)
+
+    locked = False
+    try:
+        locked = cache.add(f"{key}:lock", 1, settings.SEARCH_CACHE_LOCK_TIMEOUT)
+        if not locked:
+            ids = _wait_for(cache, key)
+            if ids is not None:
+                return CachedResults(ids)
+        return _search(cache, key, search)
+    finally:
+        if locked:
+            cache.delete(f"{key}:lock")
+        with _computing_lock:
+            del _computing[key]
+        event.set()
+
+
+def _wait_for(cache, key):
+    deadline = time.monotonic() + settings.SEARCH_CACHE_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        ids = cache.get(key)
+        if ids is not None:
+            return ids
+    return None
+
+
+def _search(cache, key, search):
+    results = search()
+    limit = settings.SEARCH_CACHE_MAX_RESULTS
+    queryset = None
+    if isinstance(results, QuerySet):
+        queryset = results
+    elif hasattr(results, "get_queryset"):
+        queryset = results.get_queryset(for_count=True)
+    if queryset is not None:
+        # Database backends and querysets: read the ranked ids without
+        # loading the pages; each page of results loads its own.
+        pages = None
+        ids = list(queryset.values_list("pk", flat=True)[:limit])
+    else:
+        pages = list(results[:limit])
+        ids = [page.pk for page in pages]
+    cache.set(key, ids, settings.SEARCH_CACHE_TIMEOUT)
+    return CachedResults(ids, pages)
@@ -0,0 +1,192 @@
+"""
+Facets for the search results page: page type, Schema.org type and year of
+publication.
+
+Facet counts cover every result of the query, so each value shows what
+selecting it would give. They come from one grouped query over the ranked
+ids of the results (``LandingPage`` joined for its ``schema_org_type`` and
+``publish_date``), cached with the results until the index changes. Browsing
+without a query uses the same aggregate over every live page.
+
+Selecting values filters the ranked ids in SQL, on the page's content type
+and the indexed ``LandingPage`` columns, keeping the rank order. The
+filtered ids are cached too, so paging through them costs nothing extra.
+"""
+import hashlib
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Count
+from django.db.models.functions import ExtractYear
+from django.utils.http import urlencode
+from wagtail.models import Page, get_page_models
+
+from home.models import LandingPage
+from search.cache import get_page_cache
+
+SEARCH_FACETS_PREFIX = "search:facets"
+
+# Query string parameter -> heading, in display order.
+FACETS = {
+    "type": "Page type",
+    "schema": "Content type",
+    "year": "Year",
+}
+
+SCHEMA_FIELD = "landingpage__schema_org_type"
+PUBLISH_DATE_FIELD = "landingpage__publish_date"
+SCHEMA_MAX_LENGTH = LandingPage._meta.get_field("schema_org_type").max_length
+
+
+def page_types():
+    """Return ``{model_name: model}`` for the page types visitors can filter on."""
+    return {
+        model._meta.model_name: model
+        for model in get_page_models()
+        if model is not Page
+    }
+
+
+def browse_pages():
+    """Every live page of a filterable type, newest first, for browsing by facet."""
+    return (
+        Page.objects.live()
+        .type(*page_types().values())
+        .order_by("-first_published_at", "-pk")
+    )
+
+
+def parse_filters(params):
+    """Return the valid facet values selected in ``params`` (a ``QueryDict``)."""
+    filters = {}
+    page_type = params.get("type")
+    if page_type in page_types():
+        filters["type"] = page_type
+    schema = params.get("schema", "").strip()
+    if schema and len(schema) <= SCHEMA_MAX_LENGTH:
+        filters["schema"] = schema
+    year = params.get("year", "")
+    if year.isdigit() and 1 <= int(year) <= 9999:
+        filters["year"] = int(year)
+    return filters
+
+
+def _key(results_key, *parts):
+    digest = hashlib.sha256("|".join([results_key, *parts]).encode("utf-8"))
+    return f"{SEARCH_FACETS_PREFIX}:{digest.hexdigest()}"
+
+
+def facet_counts(results_key, ids):
+    """
+    Return ``{"type": Counter, "schema": Counter, "year": Counter}`` for the
+    results with ``ids``, from the cache or a single grouped query.
+    """
+    cache = get_page_cache()
+    key = _key(results_key, "counts")
+    counts = cache.get(key)
+    if counts is not None:
+        return counts
+
+    counts = {name: Counter() for name in FACETS}
+    if ids:
+        rows = (
+            Page.objects.filter(pk__in=ids)
+            .order_by()
+            .values_list(
+                "content_type_id", SCHEMA_FIELD, ExtractYear(PUBLISH_DATE_FIELD)
+            )
+            .annotate(count=Count("pk"))
+        )
+        model_names = {
+            ContentType.objects.get_for_model(model).pk: name
+            for name, model in page_types().items()
+        }
+        for content_type_id, schema, year, count in rows:
+            if content_type_id in model_names:
+                counts["type"][model_names[content_type_id]] += count
+            if schema:
+                counts["schema"][schema] += count
+            if year:
+                counts["year"][year] += count
+    cache.set(key, counts, settings.SEARCH_CACHE_TIMEOUT)
+    return counts
+
+
+def filter_ids(results_key, ids, filters):
+    """
+    Return the ``ids`` matching every selected facet value, in rank order.
+
+    The facets are matched in SQL and the rank order restored in Python, from
+    the set of matching pks. That set is never larger than ``ids``, which
+    ``cached_search()`` caps at ``SEARCH_CACHE_MAX_RESULTS`` (10,000 by
+    default), so it takes well under a megabyte; raising the cap far beyond
+    that would call for ordering in SQL instead.
+    """
+    if not filters or not ids:
+        return ids
+    cache = get_page_cache()
+    key = _key(results_key, urlencode(sorted(filters.items())))
+    filtered = cache.get(key)
+    if filtered is not None:
+        return filtered
+
+    queryset = Page.objects.filter(pk__in=ids)
+    if "type" in filters:
+        model = page_types()[filters["type"]]
+        queryset = queryset.filter(
+            content_type=ContentType.objects.get_for_model(model)
+        )
+    if "schema" in filters:
+        queryset = queryset.filter(**{SCHEMA_FIELD: filters["schema"]})
+    if "year" in filters:
+        # A range on the indexed date column, not a function of it.
+        queryset = queryset.filter(
+            **{f"{PUBLISH_DATE_FIELD}__year": filters["year"]}
+        )
+    matching = set(queryset.values_list("pk", flat=True))
+    filtered = [pk for pk in ids if pk in matching]
+    cache.set(key, filtered, settings.SEARCH_CACHE_TIMEOUT)
+    return filtered
+
+
+def facet_options(counts, filters, params):
+    """
+    Return the facets to display: ``[(heading, [option, ...]), ...]``.
+
+    Each option is a dict with ``label``, ``count``, ``selected`` and ``url``,
+    the query string that selects it (or clears it when selected), starting
+    again from the first page of results.
+    """
+    labels = {
+        "type": {
+            name: model._meta.verbose_name for name, model in page_types().items()
+        },
+    }
+    facets = []
+    for name, heading in FACETS.items():
+        if name == "year":
+            values = sorted(counts[name], reverse=True)
+        else:
+            values = [value for value, _count in counts[name].most_common()]
+        options = []
+        for value in values:
+            selected = filters.get(name) == value
+            query = params.copy()
+            for param in ("page", "after", "before"):
+                query.pop(param, None)
+            if selected:
+                query.pop(name, None)
+            else:
+                query[name] = str(value)
+            options.append(
+                {
+                    "label": labels.get(name, {}).get(value, value),
+                    "count": counts[name][value],
+                    "selected": selected,
+                    "url": "?" + query.urlencode(),
+                }
+            )
+        if options:
+            facets.append((heading, options))
+    return facets
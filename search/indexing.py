@@ -0,0 +1,171 @@
+"""
+Search indexing off the request path.
+
+Wagtail indexes a page synchronously on every save, drafts included, so
+the editor's publish request waits for the page's text to be extracted and
+written to the index, and that time grows with the size of the body. Pages
+using ``QueuedIndexMixin`` opt out of that; instead ``search.signals``
+queues them here when they are published, unpublished, moved or deleted, and
+when a page that is not live is saved (the admin searches drafts too). They
+are indexed after the transaction commits, in a background thread when
+``SEARCH_INDEX_ASYNC`` is set.
+
+Queued pages are ``PendingIndexUpdate`` rows, written in the transaction
+that changed the page, so a worker that is recycled or killed before the
+background thread runs loses nothing: the next flush, in any process,
+indexes them. Workers also flush when they exit.
+
+A page queued several times within ``SEARCH_INDEX_DELAY`` seconds is indexed
+once. Pages are indexed in bulk per model, and the search index version is
+bumped afterwards so that cached results pick up the change. Their typeahead
+suggestions are updated too (see ``search.typeahead``).
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections, transaction
+from wagtail.search.backends import get_search_backends
+
+from search.cache import invalidate_index
+from search.models import PendingIndexUpdate
+from search.typeahead import record_changes
+
+logger = logging.getLogger(__name__)
+
+INDEX = "index"
+DELETE = "delete"
+
+# Queued pages read per query when flushing.
+FLUSH_BATCH_SIZE = 500
+
+
+class QueuedIndexMixin:
+    """Index the page through ``index_queue`` instead of on every save."""
+
+    search_auto_update = False
+
+
+def queued_model(page):
+    """Return the specific model of ``page`` if it is indexed through the queue."""
+    model = getattr(page, "specific_class", None) or type(page)
+    return model if issubclass(model, QueuedIndexMixin) else None
+
+
+class IndexQueue:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._scheduled = False
+        self._exit_registered = False
+
+    def queue(self, model, pk, action=INDEX):
+        PendingIndexUpdate.objects.create(
+            content_type=ContentType.objects.get_for_model(model),
+            object_id=pk,
+            action=action,
+        )
+        # As in PurgeDispatcher.queue(): one callback per call. A transaction
+        # that rolls back takes its rows with it.
+        transaction.on_commit(self._flush_on_commit)
+
+    def _flush_on_commit(self):
+        if not settings.SEARCH_INDEX_ASYNC:
+            self.flush()
+            return
+        with self._lock:
+            if self._scheduled:
+                return
+            self._scheduled = True
+            if not self._exit_registered:
+                self._exit_registered = True
+                atexit.register(self._flush_safely)
+        threading.Thread(target=self._flush_later, daemon=True).start()
+
+    def _flush_later(self):
+        # Wait so that pages published again meanwhile are indexed only once.
+        time.sleep(settings.SEARCH_INDEX_DELAY)
+        with self._lock:
+            self._scheduled = False
+        try:
+            self._flush_safely()
+        finally:
+            for connection in connections.all(initialized_only=True):
+                connection.close()
+
+    def _flush_safely(self):
+        try:
+            self.flush()
+        except Exception:
+            # The rows stay queued for the next flush.
+            logger.exception("Flushing the search index queue failed")
+
+    def flush(self):
+        """Index or remove every queued page. Returns the number processed."""
+        processed = 0
+        while True:
+            rows = list(
+                PendingIndexUpdate.objects.order_by("pk").values_list(
+                    "pk", "content_type_id", "object_id", "action"
+                )[:FLUSH_BATCH_SIZE]
+            )
+            if not rows:
+                return processed
+            processed += self._process(rows)
+            # Only the rows read: pages queued meanwhile wait for the next batch.
+            PendingIndexUpdate.objects.filter(pk__in=[row[0] for row in rows]).delete()
+
+    def _process(self, rows):
+        # (content type, pk) -> INDEX or DELETE; the last action queued wins.
+        pending = {}
+        for _pk, content_type_id, object_id, action in rows:
+            pending[(content_type_id, object_id)] = action
+
+        by_model = {}
+        for (content_type_id, pk), action in pending.items():
+            model = ContentType.objects.get_for_id(content_type_id).model_class()
+            by_model.setdefault(model, {INDEX: set(), DELETE: set()})[action].add(pk)
+
+        backends = list(get_search_backends(with_auto_update=True))
+        processed = 0
+        for model, actions in by_model.items():
+            try:
+                processed += self._update_model(backends, model, actions)
+            except Exception:
+                logger.exception(
+                    "Search indexing of %s %s failed; run update_index to repair",
+                    model.__name__,
+                    sorted(actions[INDEX] | actions[DELETE]),
+                )
+        invalidate_index()
+        try:
+            record_changes(pk for _content_type_id, pk in pending)
+        except Exception:
+            logger.exception("Recording typeahead changes failed")
+        return processed
+
+    def _update_model(self, backends, model, actions):
+        objects = list(model.get_indexed_objects().filter(pk__in=actions[INDEX]))
+        # Pages deleted since they were queued are removed instead.
+        deleted = actions[DELETE] | (actions[INDEX] - {obj.pk for obj in objects})
+        for backend in backends:
+            if objects:
+                backend.add_bulk(model, objects)
+            for pk in deleted:
+                backend.delete(model(pk=pk))
+        return len(objects) + len(deleted)
+
+    def _forget(self):
+        # A forked worker has no flush scheduled; the rows are in the database.
+        self._lock = threading.Lock()
+        self._scheduled = False
+        self._exit_registered = False
+
+
+index_queue = IndexQueue()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=index_queue._forget)
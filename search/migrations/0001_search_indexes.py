@@ -0,0 +1,52 @@
+"""
+Indexes for full-text search on PostgreSQL (a no-op on other databases).
+
+Wagtail's PostgreSQL backend matches ``title || body @@ query``, but its
+migrations only index ``title`` and ``body`` separately, which cannot serve
+that expression, so every search scans the whole index. It then joins the
+matching entries to pages on ``object_id = page.id::varchar(50)``, which the
+page primary key cannot serve either.
+
+The indexes are built concurrently so that existing tables stay writable.
+"""
+from django.db import migrations
+
+INDEXES = [
+    (
+        "search_indexentry_title_body_gin",
+        "wagtailsearch_indexentry USING gin ((title || body))",
+    ),
+    (
+        "search_page_id_text",
+        "wagtailcore_page ((id::varchar(50)))",
+    ),
+]
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, definition in INDEXES:
+        schema_editor.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}"
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, _definition in INDEXES:
+        schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("wagtailcore", "0094_alter_page_locale"),
+        ("wagtailsearch", "0008_remove_query_and_querydailyhits_models"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes, elidable=False),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.20 on 2026-10-18 06:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("search", "0001_search_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyQueryHits",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("query_string", models.CharField(max_length=255)),
+                ("hits", models.PositiveIntegerField(default=0)),
+                ("zero_result_hits", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Daily query hits",
+                "verbose_name_plural": "Daily query hits",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="dailyqueryhits",
+            constraint=models.UniqueConstraint(
+                fields=("date", "query_string"), name="search_daily_query_hits_unique"
+            ),
+        ),
+    ]
@@ -0,0 +1,79 @@
+import datetime
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.db.models import Sum
+from django.utils import timezone
+
+
+class DailyQueryHitsQuerySet(models.QuerySet):
+    def since(self, days):
+        """Rows for the last ``days`` days, today included."""
+        return self.filter(date__gt=timezone.localdate() - datetime.timedelta(days=days))
+
+    def totals(self):
+        """Hits per query over the rows, most searched first."""
+        return (
+            self.values("query_string")
+            .annotate(
+                total_hits=Sum("hits"), total_zero_result_hits=Sum("zero_result_hits")
+            )
+            .order_by("-total_hits", "query_string")
+        )
+
+    def top(self, days=7, limit=20):
+        return self.since(days).totals()[:limit]
+
+    def zero_results(self, days=7, limit=20):
+        """Queries that found nothing, the most searched first."""
+        return self.since(days).filter(zero_result_hits__gt=0).totals()[:limit]
+
+
+class DailyQueryHits(models.Model):
+    """
+    How often a normalised query was searched on a day, and how many of
+    those searches found nothing. Written in batches by ``search.querylog``.
+    """
+
+    date = models.DateField()
+    query_string = models.CharField(max_length=255)
+    hits = models.PositiveIntegerField(default=0)
+    zero_result_hits = models.PositiveIntegerField(default=0)
+
+    objects = DailyQueryHitsQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Daily query hits"
+        verbose_name_plural = "Daily query hits"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "query_string"], name="search_daily_query_hits_unique"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.query_string} ({self.date}: {self.hits})"
+
+
+class PendingIndexUpdate(models.Model):
+    """
+    A page to index, or to remove from the search index, once the change is
+    committed. Written in the transaction that changed the page and deleted
+    once ``search.indexing.index_queue`` has processed it, so that a worker
+    that exits first loses nothing: the next flush, by any process, picks
+    its rows up.
+    """
+
+    content_type = models.ForeignKey(
+        ContentType, on_delete=models.CASCADE, related_name="+"
+    )
+    # Not a foreign key: deleted pages are queued for removal.
+    object_id = models.PositiveIntegerField()
+    action = models.CharField(max_length=6)
+    queued_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Pending index update"
+
+    def __str__(self):
+        return f"{self.action} {self.object_id}"
@@ -0,0 +1,135 @@
+"""
+Pagination of ranked search results.
+
+Results come from ``search.cache.cached_search()`` as a ranked list of page
+ids, so the total is the length of that list rather than a COUNT query, and
+any page, however deep, costs one lookup of its own pages by id. The list
+holds at most ``SEARCH_CACHE_MAX_RESULTS`` ids; when it is full the total is
+shown as a lower bound ("10000+ results"), with a note that the results
+ranked lower can't be shown.
+
+Previous and next links carry keyset cursors instead of page numbers: the
+rank and id of the last (or first) result shown. When the index changes
+between two requests the ranking is recomputed, and the cursor continues
+after that page wherever it now ranks, so no result is repeated or skipped
+the way it would be with a page number.
+"""
+from django.conf import settings
+from django.core.paginator import Page, Paginator
+from django.utils.functional import cached_property
+
+RESULTS_PER_PAGE = 10
+
+
+def make_cursor(position, pk):
+    return f"{position}-{pk}"
+
+
+def parse_cursor(cursor):
+    """Return ``(position, page id)``, or ``None`` for a malformed cursor."""
+    try:
+        position, pk = (int(part) for part in cursor.split("-", 1))
+    except (AttributeError, ValueError):
+        return None
+    if position < 0:
+        return None
+    return position, pk
+
+
+class SearchResultsPage(Page):
+    """A page of results starting at any rank, with cursors for its neighbours."""
+
+    def __init__(self, object_list, number, paginator, start):
+        super().__init__(object_list, number, paginator)
+        self.start = start
+
+    def has_next(self):
+        return self.start + len(self.object_list) < self.paginator.count
+
+    def has_previous(self):
+        return self.start > 0
+
+    def start_index(self):
+        return self.start + 1 if self.paginator.count else 0
+
+    def end_index(self):
+        return self.start + len(self.object_list)
+
+    @property
+    def next_cursor(self):
+        if self.has_next() and self.object_list:
+            return make_cursor(self.end_index() - 1, self.object_list[-1].pk)
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous() and self.object_list:
+            return make_cursor(self.start, self.object_list[0].pk)
+        return None
+
+    @property
+    def elided_page_range(self):
+        return self.paginator.get_elided_page_range(
+            self.number, on_each_side=2, on_ends=1
+        )
+
+
+class SearchPaginator(Paginator):
+    """Paginator for ``search.cache.CachedResults``, by page number or cursor."""
+
+    def __init__(self, results, per_page=RESULTS_PER_PAGE):
+        super().__init__(results, per_page)
+
+    @cached_property
+    def count(self):
+        return len(self.object_list)
+
+    @cached_property
+    def capped(self):
+        """Whether there are more results than were kept."""
+        return self.count >= settings.SEARCH_CACHE_MAX_RESULTS
+
+    def _get_page(self, object_list, number, paginator):
+        return SearchResultsPage(
+            object_list, number, paginator, (number - 1) * self.per_page
+        )
+
+    def _page_at(self, start):
+        if start >= self.count:
+            start = (self.num_pages - 1) * self.per_page
+        start = max(0, start)
+        return SearchResultsPage(
+            self.object_list[start : start + self.per_page],
+            start // self.per_page + 1,
+            self,
+            start,
+        )
+
+    def _position(self, cursor):
+        """Return the current rank of the page a cursor points at, or ``None``."""
+        parsed = parse_cursor(cursor)
+        if parsed is None:
+            return None
+        position, pk = parsed
+        ids = self.object_list.ids
+        if position < len(ids) and ids[position] == pk:
+            return position
+        try:
+            return ids.index(pk)
+        except ValueError:
+            # The page has left the results: continue from its old rank.
+            return position
+
+    def page_after(self, cursor):
+        """Return the page of results ranked after the cursor's result."""
+        position = self._position(cursor)
+        if position is None:
+            return None
+        return self._page_at(position + 1)
+
+    def page_before(self, cursor):
+        """Return the page of results ranked before the cursor's result."""
+        position = self._position(cursor)
+        if position is None:
+            return None
+        return self._page_at(max(0, min(position, self.count) - self.per_page))
@@ -0,0 +1,311 @@
+"""
+PostgreSQL search backend tuned for large page trees.
+
+It is Wagtail's PostgreSQL backend (tsvector columns on
+``wagtailsearch_indexentry``, matched with ``@@``), with three changes:
+
+- Field weights come from the tiers in ``search.ranking`` instead of being
+  spread over every boost in the project.
+- Indexing a page no longer scans the whole index. Wagtail recomputes the
+  average title length and rewrites every row whose ``title_norm`` is still
+  1.0 on each save; here the average is cached for ``TITLE_NORM_TTL``
+  seconds and only the rows just written are updated. A rebuild still
+  normalises every row.
+- ``SEARCH_CONFIG`` (the text search configuration, i.e. the language used
+  for stemming and stop words) defaults to ``english`` rather than the
+  server's ``default_text_search_config``, which is ``simple`` in the
+  official Docker image.
+
+The GIN index that matching relies on (on ``title || body``, the expression
+the query uses) and the index that joins entries back to pages are created
+by ``search/migrations/0001_search_indexes.py``.
+
+``create_shadow_table()`` and ``swap_shadow_table()`` let ``reindex_search
+--shadow`` rebuild the index into a copy while searches use the live one.
+
+Importing this module requires psycopg; use ``search.backends`` as the
+``BACKEND``, which picks this backend on PostgreSQL only.
+"""
+import re
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, F
+from django.db.models.functions import Length
+from django.db.models.sql.subqueries import InsertQuery
+from wagtail.models import Page
+from wagtail.search.backends.database.postgres import postgres
+from wagtail.search.index import SearchField
+from wagtail.search.models import IndexEntry
+from wagtail.search.utils import get_content_type_pk
+
+from search.ranking import boost_weight, sql_weights
+
+TITLE_LENGTH_CACHE_KEY = "search:postgres:title_length_avg"
+
+
+class ObjectIndexer(postgres.ObjectIndexer):
+    def prepare_field(self, obj, field):
+        if isinstance(field, SearchField):
+            yield (
+                field,
+                boost_weight(field.boost),
+                self.prepare_value(field.get_value(obj)),
+            )
+        else:
+            yield from super().prepare_field(obj, field)
+
+
+class Index(postgres.Index):
+    """
+    Wagtail's index, writing to ``table``: the live index table by default,
+    or a shadow table being rebuilt (see ``create_shadow_table()``), whose
+    titles are normalised once at the end instead of after every batch.
+    """
+
+    def __init__(self, backend, table=None):
+        super().__init__(backend)
+        self.table = table or IndexEntry._meta.db_table
+
+    @property
+    def is_live(self):
+        return self.table == IndexEntry._meta.db_table
+
+    def add_items(self, model, objs):
+        # As Wagtail's Index.add_items(), with the weighted indexer and a
+        # title_norm update limited to the rows written.
+        search_fields = model.get_search_fields()
+        if not search_fields or not objs:
+            return
+
+        indexers = [ObjectIndexer(obj, self.backend) for obj in objs]
+        content_type_pk = get_content_type_pk(model)
+        compiler = InsertQuery(IndexEntry).get_compiler(
+            connection=self.write_connection
+        )
+        rows_sql = []
+        params = []
+        for indexer in indexers:
+            params.extend((content_type_pk, indexer.id))
+            columns_sql = []
+            for column in ("title", "autocomplete", "body"):
+                value = compiler.prepare_value(
+                    IndexEntry._meta.get_field(column), getattr(indexer, column)
+                )
+                sql, column_params = value.as_sql(compiler, self.write_connection)
+                columns_sql.append(sql)
+                params.extend(column_params)
+            rows_sql.append("(%%s, %%s, %s, %s, %s, 1.0)" % tuple(columns_sql))
+
+        with self.write_connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO %s (content_type_id, object_id, title, autocomplete, body, title_norm)
+                (VALUES %s)
+                ON CONFLICT (content_type_id, object_id)
+                DO UPDATE SET title = EXCLUDED.title,
+                              title_norm = 1.0,
+                              autocomplete = EXCLUDED.autocomplete,
+                              body = EXCLUDED.body
+                """
+                % (self.table, ", ".join(rows_sql)),
+                params,
+            )
+
+        if self.is_live:
+            self._normalise_titles(
+                self.entries.filter(
+                    content_type_id=content_type_pk,
+                    object_id__in=[indexer.id for indexer in indexers],
+                )
+            )
+
+    def average_title_length(self, refresh=False):
+        average = None if refresh else cache.get(TITLE_LENGTH_CACHE_KEY)
+        if average is None:
+            average = (
+                self.entries.annotate(title_length=Length("title"))
+                .filter(title_length__gt=0)
+                .aggregate(Avg("title_length"))["title_length__avg"]
+            )
+            if average is not None:
+                cache.set(
+                    TITLE_LENGTH_CACHE_KEY, average, self.backend.title_norm_ttl
+                )
+        return average
+
+    def _normalise_titles(self, entries, refresh=False):
+        average = self.average_title_length(refresh=refresh)
+        if average is None:
+            return
+        entries.annotate(title_length=Length("title")).filter(
+            title_length__gt=0
+        ).update(title_norm=average / F("title_length"))
+
+    def _refresh_title_norms(self, full=False):
+        if not self.is_live:
+            normalise_table_titles(self.table, self.write_connection)
+        elif full:
+            self._normalise_titles(self.entries, refresh=True)
+        else:
+            self._normalise_titles(self.entries.filter(title_norm=1.0))
+
+
+# Shadow rebuilds: the reindex_search command fills a copy of the index table
+# while searches keep using the live one, then swaps the two.
+
+SHADOW_TABLE = f"{IndexEntry._meta.db_table}_shadow"
+
+
+def create_shadow_table(connection):
+    """Create an empty copy of the index table, with its indexes."""
+    table = IndexEntry._meta.db_table
+    content_types = ContentType._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {SHADOW_TABLE}")
+        cursor.execute(f"CREATE TABLE {SHADOW_TABLE} (LIKE {table} INCLUDING ALL)")
+        cursor.execute(
+            f"ALTER TABLE {SHADOW_TABLE} ADD CONSTRAINT {SHADOW_TABLE}_content_type_fk "
+            f"FOREIGN KEY (content_type_id) REFERENCES {content_types} (id) "
+            "DEFERRABLE INITIALLY DEFERRED"
+        )
+
+
+def normalise_table_titles(table, connection, new_only=False):
+    """
+    Set every title_norm of ``table`` from its average title length, or with
+    ``new_only`` those of the rows written since (still 1.0).
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {table}
+            SET title_norm = average.length / length(title)
+            FROM (
+                SELECT avg(length(title)) AS length FROM {table}
+                WHERE length(title) > 0
+            ) AS average
+            WHERE length(title) > 0{" AND title_norm = 1.0" if new_only else ""}
+            """
+        )
+    cache.delete(TITLE_LENGTH_CACHE_KEY)
+
+
+def swap_shadow_table(connection, page_content_type_ids, replay):
+    """
+    Make the shadow table the live index, atomically.
+
+    Entries of other models (images, documents) are carried over from the
+    live table. ``replay()`` is called once the live table is locked, to index
+    into the shadow table the pages changed since it was last called; entries
+    of pages deleted during the rebuild are then dropped.
+    """
+    table = IndexEntry._meta.db_table
+    columns = "content_type_id, object_id, title, autocomplete, body, title_norm"
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        # Tables with deferred foreign key checks pending can't be renamed or
+        # dropped; run the checks now.
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        cursor.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(
+            f"""
+            INSERT INTO {SHADOW_TABLE} ({columns})
+            SELECT {columns} FROM {table}
+            WHERE NOT (content_type_id = ANY(%s))
+            ON CONFLICT (content_type_id, object_id) DO NOTHING
+            """,
+            [list(page_content_type_ids)],
+        )
+        if replay():
+            normalise_table_titles(SHADOW_TABLE, connection, new_only=True)
+        cursor.execute(
+            f"""
+            DELETE FROM {SHADOW_TABLE} AS entry
+            WHERE entry.content_type_id = ANY(%s) AND NOT EXISTS (
+                SELECT FROM {Page._meta.db_table} AS page
+                WHERE entry.object_id = page.id::varchar(50)
+            )
+            """,
+            [list(page_content_type_ids)],
+        )
+        # A serial id column's sequence belongs to the old table; hand it
+        # over so that dropping the old table keeps it.
+        cursor.execute(
+            "SELECT pg_get_serial_sequence(%s, 'id'), pg_get_serial_sequence(%s, 'id')",
+            [table, SHADOW_TABLE],
+        )
+        sequence, shadow_sequence = cursor.fetchone()
+        if sequence and not shadow_sequence:
+            cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY {SHADOW_TABLE}.id")
+        indexes = _index_names(cursor, table)
+        shadow_indexes = _index_names(cursor, SHADOW_TABLE)
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass "
+            "AND contype = 'f'",
+            [table],
+        )
+        foreign_keys = [row[0] for row in cursor.fetchall()]
+        cursor.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+        cursor.execute(f"ALTER TABLE {SHADOW_TABLE} RENAME TO {table}")
+        cursor.execute(f"DROP TABLE {table}_old")
+        # Keep the names the migrations gave the indexes and constraints.
+        for definition, name in indexes.items():
+            shadow_name = shadow_indexes.get(definition)
+            if shadow_name and shadow_name != name:
+                cursor.execute(f"ALTER INDEX {shadow_name} RENAME TO {name}")
+        if len(foreign_keys) == 1:
+            cursor.execute(
+                f"ALTER TABLE {table} RENAME CONSTRAINT "
+                f"{SHADOW_TABLE}_content_type_fk TO {foreign_keys[0]}"
+            )
+    cache.delete(TITLE_LENGTH_CACHE_KEY)
+
+
+def _index_names(cursor, table):
+    """Return ``{definition: name}`` for the indexes of ``table``."""
+    cursor.execute(
+        "SELECT indexname, indexdef FROM pg_indexes "
+        "WHERE schemaname = current_schema() AND tablename = %s",
+        [table],
+    )
+    # Definitions without the index and table names, to match the indexes
+    # of a copy of the table to the original's.
+    return {
+        re.sub(r"INDEX \S+ ON \S+", "INDEX ON", definition, count=1): name
+        for name, definition in cursor.fetchall()
+    }
+
+
+class WeightedRankMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sql_weights = sql_weights()
+
+
+class PostgresSearchQueryCompiler(
+    WeightedRankMixin, postgres.PostgresSearchQueryCompiler
+):
+    pass
+
+
+class PostgresAutocompleteQueryCompiler(
+    WeightedRankMixin, postgres.PostgresAutocompleteQueryCompiler
+):
+    pass
+
+
+class PostgresSearchBackend(postgres.PostgresSearchBackend):
+    query_compiler_class = PostgresSearchQueryCompiler
+    autocomplete_query_compiler_class = PostgresAutocompleteQueryCompiler
+
+    def __init__(self, params):
+        params = {"SEARCH_CONFIG": "english", **params}
+        super().__init__(params)
+        self.title_norm_ttl = params.get("TITLE_NORM_TTL", 3600)
+
+    def get_index_for_model(self, model):
+        return Index(self)
+
+
+SearchBackend = PostgresSearchBackend
@@ -0,0 +1,151 @@
+"""
+Search query logging off the request path.
+
+Logging a query with a write per search would add a database round trip to
+every search. Instead ``query_log.record()`` only counts the hit in memory,
+per day and normalised query (see ``search.cache.normalise_query()``), and
+the counts are written to ``DailyQueryHits`` in batched upserts: from a
+background thread ``SEARCH_QUERY_LOG_INTERVAL`` seconds after the first hit
+of a batch, or straight away once ``SEARCH_QUERY_LOG_MAX_PENDING`` distinct
+queries are waiting, and when the process exits.
+
+The buffer is the price: hits not yet written are lost if the process is
+killed, or if their upsert fails (it is not retried). That is at most
+``SEARCH_QUERY_LOG_INTERVAL`` seconds of searches, capped at roughly
+``SEARCH_QUERY_LOG_MAX_PENDING`` distinct queries, per process. Failed
+upserts are logged with the number of searches lost, and ``lost_hits``
+counts them for the life of the process.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from search.cache import normalise_query
+from search.models import DailyQueryHits
+
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT statement.
+BATCH_SIZE = 500
+
+QUERY_MAX_LENGTH = DailyQueryHits._meta.get_field("query_string").max_length
+
+
+def upsert_hits(counts):
+    """
+    Add ``{(date, query_string): [hits, zero_result_hits]}`` to the stored
+    counts, a batch of rows per statement.
+    """
+    table = connection.ops.quote_name(DailyQueryHits._meta.db_table)
+    rows = [(date, query, hits, zero) for (date, query), (hits, zero) in counts.items()]
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), BATCH_SIZE):
+                batch = rows[start : start + BATCH_SIZE]
+                values = ", ".join(["(%s, %s, %s, %s)"] * len(batch))
+                cursor.execute(
+                    f"INSERT INTO {table} (date, query_string, hits, zero_result_hits) "
+                    f"VALUES {values} "
+                    "ON CONFLICT (date, query_string) DO UPDATE SET "
+                    f"hits = {table}.hits + EXCLUDED.hits, "
+                    f"zero_result_hits = {table}.zero_result_hits"
+                    " + EXCLUDED.zero_result_hits",
+                    [value for row in batch for value in row],
+                )
+
+
+class QueryLog:
+    def __init__(self):
+        # (date, normalised query) -> [hits, zero-result hits]
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._scheduled = False
+        self._flushing_soon = False
+        self._exit_registered = False
+        # Searches whose counts could not be written.
+        self.lost_hits = 0
+
+    def record(self, query, result_count):
+        """Count a search for ``query`` that found ``result_count`` results."""
+        if not settings.SEARCH_QUERY_LOG:
+            return
+        query = normalise_query(query)[:QUERY_MAX_LENGTH]
+        if not query:
+            return
+        key = (timezone.localdate(), query)
+        with self._lock:
+            counts = self._pending.setdefault(key, [0, 0])
+            counts[0] += 1
+            if not result_count:
+                counts[1] += 1
+            if (
+                len(self._pending) >= settings.SEARCH_QUERY_LOG_MAX_PENDING
+                and not self._flushing_soon
+            ):
+                self._flushing_soon = True
+                flag, delay = "_flushing_soon", 0
+            elif not self._scheduled:
+                self._scheduled = True
+                flag, delay = "_scheduled", settings.SEARCH_QUERY_LOG_INTERVAL
+            else:
+                return
+        self._schedule(flag, delay)
+
+    def _schedule(self, flag, delay):
+        if not self._exit_registered:
+            self._exit_registered = True
+            atexit.register(self.flush)
+        threading.Thread(
+            target=self._flush_later, args=(flag, delay), daemon=True
+        ).start()
+
+    def _flush_later(self, flag, delay):
+        # Hits recorded meanwhile join this batch.
+        time.sleep(delay)
+        with self._lock:
+            setattr(self, flag, False)
+        try:
+            self.flush()
+        finally:
+            for conn in connections.all(initialized_only=True):
+                conn.close()
+
+    def flush(self):
+        """Write the pending counts. Returns the number of rows upserted."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        try:
+            upsert_hits(pending)
+        except Exception:
+            hits = sum(counts[0] for counts in pending.values())
+            with self._lock:
+                self.lost_hits += hits
+            logger.exception(
+                "Writing %d search query counts failed, %d searches were not logged",
+                len(pending),
+                hits,
+            )
+            return 0
+        return len(pending)
+
+    def _forget(self):
+        # A forked worker starts with its own, empty buffer.
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._scheduled = False
+        self._flushing_soon = False
+        self.lost_hits = 0
+
+
+query_log = QueryLog()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=query_log._forget)
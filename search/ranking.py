@@ -0,0 +1,41 @@
+"""
+Ranking tiers for page search fields.
+
+Pages declare ``search_fields`` with one of these boosts. On PostgreSQL,
+``search.postgres`` stores each tier under its own tsvector weight and ranks
+matches with ``WEIGHT_VALUES``, so a match in the title outranks one in a
+hero or Open Graph title, which outranks one in the body text.
+
+Wagtail would otherwise derive the weights by spreading every boost in the
+project (including the boost of 10 on image and document titles) over the
+four weights, which puts all page fields in the lowest one.
+"""
+
+TITLE_BOOST = 2  # Page.search_fields boosts the title by 2
+SECONDARY_TITLE_BOOST = 1.5
+BODY_BOOST = 1
+
+# (minimum boost, tsvector weight), highest first. Fields without a boost, or
+# below the last tier, get weight "D".
+BOOST_WEIGHTS = [
+    (TITLE_BOOST, "A"),
+    (SECONDARY_TITLE_BOOST, "B"),
+    (BODY_BOOST, "C"),
+]
+
+# Rank multiplier for each weight, as passed to ts_rank.
+WEIGHT_VALUES = {"A": 1.0, "B": 0.5, "C": 0.25, "D": 0.1}
+
+
+def boost_weight(boost):
+    """Return the tsvector weight for a search field boost."""
+    if boost is not None:
+        for minimum, weight in BOOST_WEIGHTS:
+            if boost >= minimum:
+                return weight
+    return "D"
+
+
+def sql_weights():
+    """Return ``WEIGHT_VALUES`` as the array literal ts_rank expects ({D,C,B,A})."""
+    return "{%s}" % ",".join(str(WEIGHT_VALUES[weight]) for weight in "DCBA")
@@ -0,0 +1,117 @@
+"""
+Chunked rebuild of the page search index, for the ``reindex_search`` command.
+
+Pages are split into chunks of consecutive ids. Drafts are included, as in
+Wagtail's own indexing, since the admin searches them. Each chunk is loaded
+with one ``specific()`` query per page type and indexed in bulk, so a worker
+holds at most one chunk of pages in memory, and a chunk that completed never
+needs indexing again when an interrupted rebuild is resumed.
+
+Pages changed while a shadow rebuild runs may already have been indexed
+into the shadow table in their old state; ``replay_changes()`` indexes them
+again before the swap.
+
+The functions here run in worker processes started with ``spawn``, set up
+by ``search.workers.setup_worker()`` before this module is imported.
+"""
+import json
+import os
+
+from django.db import connection
+from django.db.models import Q
+from wagtail.models import Page, PageLogEntry
+from wagtail.search.backends import get_search_backend
+
+
+def page_chunks(chunk_size):
+    """Return ``(first id, last id, page count)`` for each chunk of pages."""
+    ids = list(Page.objects.order_by("id").values_list("id", flat=True))
+    return [
+        (chunk[0], chunk[-1], len(chunk))
+        for chunk in (
+            ids[offset : offset + chunk_size]
+            for offset in range(0, len(ids), chunk_size)
+        )
+    ]
+
+
+def index_pages(pages, table=None, backend_name="default"):
+    """
+    Index ``pages``, a ``Page`` queryset, in bulk per page type.
+
+    ``table`` is a shadow table to write to instead of the live index
+    (PostgreSQL only). Returns the number of pages indexed.
+    """
+    backend = get_search_backend(backend_name)
+    by_model = {}
+    for page in pages.specific():
+        by_model.setdefault(type(page), []).append(page)
+
+    if table:
+        from search.postgres import Index
+
+        index = Index(backend, table=table)
+    for model, objs in by_model.items():
+        if table:
+            index.add_items(model, objs)
+        else:
+            backend.add_bulk(model, objs)
+    return sum(len(objs) for objs in by_model.values())
+
+
+def index_chunk(first_id, last_id, table=None, backend_name="default"):
+    """Index the pages with ids from ``first_id`` to ``last_id``."""
+    return index_pages(
+        Page.objects.filter(id__range=(first_id, last_id)), table, backend_name
+    )
+
+
+def changed_page_ids(since):
+    """
+    Return the ids of the pages saved, published, unpublished or moved since
+    ``since``, from their timestamps and the page history. Ids of pages
+    deleted since are included too.
+    """
+    changed = Page.objects.filter(
+        Q(last_published_at__gte=since) | Q(latest_revision_created_at__gte=since)
+    ).values_list("id", flat=True)
+    logged = PageLogEntry.objects.filter(timestamp__gte=since).values_list(
+        "page_id", flat=True
+    )
+    return set(changed) | set(logged)
+
+
+def replay_changes(since, table, backend_name="default"):
+    """
+    Index into ``table`` again the pages changed since ``since``. Returns the
+    number of pages indexed.
+    """
+    ids = changed_page_ids(since)
+    if not ids:
+        return 0
+    return index_pages(Page.objects.filter(id__in=ids), table, backend_name)
+
+
+def finish_in_place(backend_name="default"):
+    """Normalise every title of the live index once all chunks are indexed."""
+    if connection.vendor == "postgresql":
+        backend = get_search_backend(backend_name)
+        backend.get_index_for_model(Page)._refresh_title_norms(full=True)
+
+
+# Progress of a rebuild, so that an interrupted one can be resumed.
+
+
+def read_state(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_state(path, state):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
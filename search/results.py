@@ -0,0 +1,61 @@
+"""
+Loading a page of search results for display.
+
+The ranked ids of a page of results are loaded as their specific page types
+with one query per type, StreamFields deferred (results only show a title,
+description and thumbnail) and hero images joined in. Thumbnail renditions
+are then fetched in one query and each result's URL is resolved up front, so
+the queries for a page of results do not grow with the number of results:
+two, plus one per page type among them.
+"""
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import FieldDoesNotExist
+from wagtail.models import Page
+
+from home.images import prefetch_renditions
+
+# Must match the {% image %} tag in search/search.html.
+THUMBNAIL_FILTER_SPEC = "fill-160x120"
+
+
+def _has_hero_image(model):
+    try:
+        model._meta.get_field("hero_image")
+    except FieldDoesNotExist:
+        return False
+    return True
+
+
+def load_results(ids):
+    """Return the live pages for ``ids`` as their specific types, in order."""
+    by_type = defaultdict(list)
+    for pk, content_type_id in Page.objects.live().filter(pk__in=ids).values_list(
+        "pk", "content_type_id"
+    ):
+        by_type[content_type_id].append(pk)
+
+    pages = {}
+    for content_type_id, pks in by_type.items():
+        # A page whose model was removed stays a plain Page.
+        model = ContentType.objects.get_for_id(content_type_id).model_class() or Page
+        queryset = model.objects.filter(pk__in=pks).defer_streamfields()
+        if _has_hero_image(model):
+            queryset = queryset.select_related("hero_image")
+        pages.update(queryset.in_bulk())
+    # Pages unpublished since the search ran are skipped.
+    return [pages[pk] for pk in ids if pk in pages]
+
+
+def prepare_results(pages, request=None):
+    """
+    Attach what the results template reads to each page: ``search_url``, and
+    the thumbnail renditions of hero images.
+    """
+    prefetch_renditions(
+        [page.hero_image for page in pages if getattr(page, "hero_image_id", None)],
+        [THUMBNAIL_FILTER_SPEC],
+    )
+    for page in pages:
+        page.search_url = page.get_url(request)
@@ -0,0 +1,48 @@
+from django.db.models.signals import post_delete, post_save
+from wagtail.models import Page
+from wagtail.signals import page_published, page_unpublished, post_page_move
+
+from search.cache import invalidate_index
+from search.indexing import DELETE, index_queue, queued_model
+
+
+def invalidate_search_index(sender, instance, **kwargs):
+    invalidate_index()
+
+
+def invalidate_search_index_on_delete(sender, instance, **kwargs):
+    if isinstance(instance, Page):
+        invalidate_index()
+
+
+def queue_page_indexing(sender, instance, **kwargs):
+    model = queued_model(instance)
+    if model is not None:
+        index_queue.queue(model, instance.pk)
+
+
+def queue_draft_indexing(sender, instance, **kwargs):
+    # Publishing indexes live pages; pages that are not live are indexed as
+    # they are saved, for the admin's search.
+    if isinstance(instance, Page) and not instance.live:
+        queue_page_indexing(sender, instance)
+
+
+def queue_page_removal(sender, instance, **kwargs):
+    if isinstance(instance, Page):
+        model = queued_model(instance)
+        if model is not None:
+            index_queue.queue(model, instance.pk, DELETE)
+
+
+def register_signal_handlers():
+    page_published.connect(invalidate_search_index)
+    page_unpublished.connect(invalidate_search_index)
+    post_page_move.connect(invalidate_search_index)
+    post_delete.connect(invalidate_search_index_on_delete)
+
+    page_published.connect(queue_page_indexing)
+    page_unpublished.connect(queue_page_indexing)
+    post_page_move.connect(queue_page_indexing)
+    post_save.connect(queue_draft_indexing)
+    post_delete.connect(queue_page_removal)
@@ -0,0 +1,76 @@
+"""
+Tests for the search backend selection and ranking tiers.
+"""
+import io
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from wagtail.search.backends import get_search_backend
+from wagtail.search.index import SearchField
+
+from home.models import HomePage, LandingPage
+from search.ranking import boost_weight, sql_weights
+
+pytestmark = pytest.mark.django_db
+
+
+def field_weights(model):
+    return {
+        field.field_name: boost_weight(field.boost)
+        for field in model.get_search_fields()
+        if isinstance(field, SearchField)
+    }
+
+
+def test_weight_tiers():
+    """Test titles outrank hero/Open Graph titles, which outrank body text."""
+    assert field_weights(LandingPage) == {
+        "title": "A",
+        "hero_title": "B",
+        "og_title": "B",
+        "intro": "C",
+        "body_text": "C",
+    }
+    assert field_weights(HomePage) == {
+        "title": "A",
+        "hero_title": "B",
+        "body_text": "C",
+    }
+    assert boost_weight(None) == "D"
+    assert boost_weight(10) == "A"
+
+
+def test_sql_weights_ordered_for_ts_rank():
+    """Test the weights array is in ts_rank's {D,C,B,A} order."""
+    assert sql_weights() == "{0.1,0.25,0.5,1.0}"
+
+
+@pytest.mark.skipif(connection.vendor == "postgresql", reason="uses the tuned backend")
+def test_backend_falls_back_outside_postgresql():
+    """Test SQLite uses Wagtail's database backend unchanged."""
+    backend = get_search_backend("default")
+
+    assert type(backend).__module__.startswith("wagtail.search.backends.database")
+
+
+def test_benchmark_search_command(root_page):
+    """Test the benchmark runs on a small corpus and rolls it back."""
+    out = io.StringIO()
+
+    call_command("benchmark_search", pages=5, incremental=2, repeat=1, stdout=out)
+
+    assert "Generated 5 pages" in out.getvalue()
+    assert "bulk index" in out.getvalue()
+    assert not LandingPage.objects.filter(slug="search-benchmark").exists()
+
+
+@pytest.mark.skipif(connection.vendor != "postgresql", reason="requires PostgreSQL")
+def test_postgresql_backend_selected():
+    """Test PostgreSQL uses the tuned backend with the configured language."""
+    from search.postgres import PostgresSearchBackend
+
+    backend = get_search_backend("default")
+
+    assert isinstance(backend, PostgresSearchBackend)
+    assert backend.config == "english"
@@ -0,0 +1,157 @@
+"""
+Tests for the search result cache.
+"""
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+import pytest
+from django.db import connection
+from django.urls import reverse
+from wagtail.models import Page
+
+from home.models import HomePage, LandingPage
+from search.cache import cached_search, invalidate_index, normalise_query
+
+pytestmark = pytest.mark.django_db
+
+
+def fake_results(*ids):
+    return [SimpleNamespace(pk=pk) for pk in ids]
+
+
+def test_normalise_query_case_and_whitespace():
+    """Test case and spacing do not change the cache key."""
+    assert normalise_query("  Solar   PANELS\t") == "solar panels"
+
+
+@pytest.mark.skipif(connection.vendor == "postgresql", reason="drops stop words")
+def test_normalise_query_keeps_stop_words_without_postgresql():
+    """Test stop words are kept where the backend does not drop them."""
+    assert normalise_query("The solar panels") == "the solar panels"
+
+
+def test_normalise_query_drops_stop_words_on_postgresql():
+    """Test stop words PostgreSQL ignores do not change the cache key."""
+    with patch("search.cache.connection", SimpleNamespace(vendor="postgresql")):
+        assert normalise_query("The solar panels") == "solar panels"
+        assert normalise_query("to be or not to be") == "to be or not to be"
+
+
+def test_cached_search_reuses_results():
+    """Test equivalent queries share one search."""
+    search = Mock(return_value=fake_results(3, 1, 2))
+
+    first = cached_search("Solar panels", search)
+    second = cached_search("solar  panels", search)
+
+    search.assert_called_once()
+    assert list(first) == search.return_value
+    assert second.ids == [3, 1, 2]
+
+
+def test_cached_search_keyed_by_page_types():
+    """Test a search restricted to some page types is cached separately."""
+    search = Mock(return_value=fake_results(1))
+
+    cached_search("solar", search)
+    cached_search("solar", search, page_types=[LandingPage])
+    cached_search("solar", search, page_types=[LandingPage])
+
+    assert search.call_count == 2
+
+
+def test_cached_search_expires_with_index():
+    """Test cached results are dropped when the index changes."""
+    search = Mock(return_value=fake_results(1))
+
+    cached_search("solar", search)
+    invalidate_index()
+    cached_search("solar", search)
+
+    assert search.call_count == 2
+
+
+def test_cached_search_limits_results(settings):
+    """Test only the top results are kept."""
+    settings.SEARCH_CACHE_MAX_RESULTS = 2
+
+    results = cached_search("solar", lambda: fake_results(1, 2, 3))
+
+    assert results.ids == [1, 2]
+
+
+def test_concurrent_misses_search_once():
+    """Test identical searches arriving together wait for the first one."""
+    calls = []
+
+    def search():
+        calls.append(1)
+        time.sleep(0.2)
+        return fake_results(5, 4)
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cached_search("solar", search)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert [result.ids for result in results] == [[5, 4]] * 5
+
+
+def test_cached_results_load_pages_by_rank(home_page, landing_page):
+    """Test a cache hit loads the live pages of the requested slice, in rank order."""
+    cached_search("welcome", lambda: [landing_page, home_page])
+
+    results = cached_search("welcome", Mock())
+
+    assert [page.pk for page in results[0:2]] == [landing_page.pk, home_page.pk]
+    assert results[1].pk == home_page.pk
+
+
+def test_search_pages_share_one_search(client, home_page, site):
+    """Test paging through results runs the search once."""
+    pages = [
+        home_page.add_child(instance=LandingPage(title=f"Solar {i}", slug=f"solar-{i}"))
+        for i in range(12)
+    ]
+
+    with patch("search.views._perform_search", return_value=pages) as search:
+        first = client.get(reverse("search") + "?query=solar")
+        second = client.get(reverse("search") + "?query=Solar&page=2")
+
+    search.assert_called_once_with("solar")
+    assert len(first.context["search_results"]) == 10
+    assert [page.pk for page in second.context["search_results"]] == [
+        page.pk for page in pages[10:]
+    ]
+
+
+def test_unpublished_page_dropped_from_cached_results(home_page, landing_page):
+    """Test a page unpublished after the search ran is not shown."""
+    cached_search("welcome", lambda: [landing_page, home_page])
+    HomePage.objects.filter(pk=home_page.pk).update(live=False)
+
+    results = cached_search("welcome", Mock())
+
+    assert [page.pk for page in results[0:2]] == [landing_page.pk]
+
+
+def test_database_results_cached_as_ids(home_page, landing_page):
+    """Test database backends' results are read as ids, without loading pages."""
+    results = Mock(spec=["get_queryset"])
+    results.get_queryset.return_value = Page.objects.filter(
+        pk__in=[home_page.pk, landing_page.pk]
+    ).order_by("-pk")
+
+    cached = cached_search("welcome", lambda: results)
+
+    results.get_queryset.assert_called_once_with(for_count=True)
+    assert cached.ids == [landing_page.pk, home_page.pk]
+    assert cached.pages is None
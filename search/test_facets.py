@@ -0,0 +1,159 @@
+"""
+Tests for search facets: counts, filtering and the facet links.
+"""
+import datetime
+from unittest.mock import patch
+
+import pytest
+from django.db import connection
+from django.http import QueryDict
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from home.models import HomePage, LandingPage
+from search.cache import results_key
+from search.facets import facet_counts, facet_options, filter_ids, parse_filters
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def results(home_page):
+    """Ranked results: two articles of 2023 and 2024, a product, a home page."""
+    pages = [
+        home_page.add_child(
+            instance=LandingPage(
+                title=title,
+                slug=title.lower().replace(" ", "-"),
+                schema_org_type=schema,
+                publish_date=publish_date,
+            )
+        )
+        for title, schema, publish_date in [
+            ("Solar news", "Article", datetime.date(2024, 5, 1)),
+            ("Solar kit", "Product", None),
+            ("Solar history", "Article", datetime.date(2023, 1, 9)),
+        ]
+    ]
+    pages.insert(
+        2, home_page.add_child(instance=HomePage(title="Solar home", slug="solar-home"))
+    )
+    return pages
+
+
+def ids(pages):
+    return [page.pk for page in pages]
+
+
+def search(client, query_string, pages):
+    with patch("search.views._perform_search", return_value=pages):
+        return client.get(reverse("search") + query_string)
+
+
+def test_parse_filters():
+    """Test only known page types and plausible values are kept."""
+    params = QueryDict("type=landingpage&schema=Article&year=2024&page=2")
+
+    assert parse_filters(params) == {
+        "type": "landingpage",
+        "schema": "Article",
+        "year": 2024,
+    }
+    assert parse_filters(QueryDict("type=user&year=20x&schema=")) == {}
+
+
+def test_counts_from_one_grouped_query(results, django_assert_num_queries):
+    """Test every facet is counted by one query, then served from the cache."""
+    # Content types are cached per process after their first lookup.
+    facet_counts(results_key("warm up"), ids(results))
+
+    with django_assert_num_queries(1):
+        counts = facet_counts(results_key("solar"), ids(results))
+    with django_assert_num_queries(0):
+        assert facet_counts(results_key("solar"), ids(results)) == counts
+
+    assert counts["type"] == {"landingpage": 3, "homepage": 1}
+    assert counts["schema"] == {"Article": 2, "Product": 1}
+    assert counts["year"] == {2024: 1, 2023: 1}
+
+
+def test_filter_ids_keeps_rank_order(results):
+    """Test filtering combines facets and keeps the ranking."""
+    key = results_key("solar")
+
+    assert filter_ids(key, ids(results), {"schema": "Article"}) == [
+        results[0].pk,
+        results[3].pk,
+    ]
+    assert filter_ids(key, ids(results), {"type": "homepage"}) == [results[2].pk]
+    assert filter_ids(key, ids(results), {"schema": "Article", "year": 2023}) == [
+        results[3].pk
+    ]
+
+
+def test_facet_options_toggle_values():
+    """Test each option links to its selection, or to clearing it."""
+    counts = facet_counts(results_key("nothing"), [])
+    counts["year"].update({2023: 1, 2024: 2})
+    params = QueryDict("query=solar&year=2024&page=3")
+
+    [(heading, options)] = facet_options(counts, {"year": 2024}, params)
+
+    assert heading == "Year"
+    assert [(o["label"], o["count"], o["selected"]) for o in options] == [
+        (2024, 2, True),
+        (2023, 1, False),
+    ]
+    assert options[0]["url"] == "?query=solar"
+    assert options[1]["url"] == "?query=solar&year=2023"
+
+
+def test_view_filters_results(client, site, results):
+    """Test selecting a facet filters the results, and counts stay per query."""
+    response = search(client, "?query=solar&schema=Article", results)
+
+    assert [page.pk for page in response.context["search_results"]] == [
+        results[0].pk,
+        results[3].pk,
+    ]
+    facets = dict(response.context["facets"])
+    assert [(o["label"], o["count"]) for o in facets["Page type"]] == [
+        ("Landing Page", 3),
+        ("Home Page", 1),
+    ]
+    assert "Found 2 results" in response.content.decode()
+
+
+def test_pagination_links_keep_filters(client, site, home_page):
+    """Test previous/next links stay within the selected facets."""
+    pages = [
+        home_page.add_child(instance=LandingPage(title=f"Solar {i}", slug=f"solar-{i}"))
+        for i in range(12)
+    ]
+
+    response = search(client, "?query=solar&type=landingpage", pages)
+
+    assert "&type=landingpage&after=" in response.content.decode()
+
+
+def test_browse_by_facet_without_query(client, site, results):
+    """Test a facet can be selected without a query, over every live page."""
+    response = search(client, "?year=2024", [])
+
+    assert [page.pk for page in response.context["search_results"]] == [
+        results[0].pk
+    ]
+    assert dict(response.context["facets"])["Year"][0]["count"] == 1
+
+
+def test_facets_add_no_queries_once_cached(client, site, results):
+    """Test a repeated filtered search costs what an unfiltered one does."""
+    queries = {}
+    for query_string in ("?query=solar", "?query=solar&schema=Article"):
+        search(client, query_string, results)
+        with CaptureQueriesContext(connection) as captured:
+            search(client, query_string, results)
+        queries[query_string] = len(captured)
+
+    # Only the page types of the shown results differ: two types against one.
+    assert queries["?query=solar&schema=Article"] == queries["?query=solar"] - 1
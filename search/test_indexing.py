@@ -0,0 +1,187 @@
+"""
+Tests for search text extraction and the indexing queue.
+"""
+from unittest.mock import patch
+
+import pytest
+from django.test import override_settings
+from wagtail.search.backends import get_search_backend
+from wagtail.search.models import IndexEntry
+
+from home.models import LandingPage
+from search.indexing import DELETE, INDEX, IndexQueue, index_queue
+from search.models import PendingIndexUpdate
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def queue():
+    return index_queue
+
+
+def queued():
+    return list(PendingIndexUpdate.objects.values_list("object_id", "action"))
+
+
+def backend_class():
+    return type(get_search_backend())
+
+
+def index_entry_exists(page):
+    return IndexEntry.objects.filter(object_id=str(page.pk)).exists()
+
+
+def test_landing_page_body_text(landing_page):
+    """Test body blocks contribute their text, and only their text."""
+    landing_page.body = [
+        ("heading", "Solar panels"),
+        ("paragraph", "<p>Cheap &amp; <b>clean</b> energy</p>"),
+        ("image", None),
+        ("testimonial", {"quote": "Great service", "author": "Sam", "role": ""}),
+        (
+            "cta",
+            {
+                "title": "Get a quote",
+                "text": "<p>Today</p>",
+                "button_text": "Contact us",
+                "button_link": "https://example.com/contact",
+            },
+        ),
+    ]
+    landing_page.save()
+    page = LandingPage.objects.get(pk=landing_page.pk)
+
+    text = page.body_text()
+
+    assert text.splitlines() == [
+        "Test Hero Subtitle",
+        "Solar panels",
+        "Cheap & clean energy",
+        "Great service",
+        "Sam",
+        "Get a quote",
+        "Today",
+        "Contact us",
+    ]
+
+
+def test_home_page_body_text(home_page):
+    """Test the home page sections are searchable."""
+    home_page.features_title = "Why us"
+    home_page.features = [("feature", {"icon": None, "title": "Fast", "text": "Quick"})]
+    home_page.save()
+
+    text = home_page.body_text()
+
+    assert "Discover our services" in text
+    assert "Why us\nFast\nQuick" in text
+
+
+@override_settings(SEARCH_INDEX_ASYNC=False)
+def test_publish_indexes_page(landing_page, queue, django_capture_on_commit_callbacks):
+    """Test a page is indexed once its publish commits."""
+    assert not index_entry_exists(landing_page)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        landing_page.save_revision().publish()
+
+    assert index_entry_exists(landing_page)
+
+
+def test_draft_save_does_not_index(landing_page, queue):
+    """Test saving a draft no longer indexes the page."""
+    with patch("wagtail.search.index.insert_or_update_object") as index_object:
+        landing_page.title = "Draft title"
+        landing_page.save_revision()
+
+    index_object.assert_not_called()
+    assert not index_entry_exists(landing_page)
+
+
+def test_publish_does_not_index_inline(
+    landing_page, queue, django_capture_on_commit_callbacks
+):
+    """Test publishing leaves the indexing to a background thread."""
+    with patch("search.indexing.threading.Thread") as thread:
+        with django_capture_on_commit_callbacks(execute=True):
+            landing_page.save_revision().publish()
+
+    thread.assert_called_once()
+    assert not index_entry_exists(landing_page)
+    assert queue.flush() == 1
+    assert index_entry_exists(landing_page)
+
+
+def test_repeated_publishes_coalesced(landing_page, queue):
+    """Test a page published several times is indexed once."""
+    with patch("search.indexing.threading.Thread"):
+        for _ in range(3):
+            landing_page.save_revision().publish()
+
+    with patch.object(backend_class(), "add_bulk") as add_bulk:
+        assert queue.flush() == 1
+
+    add_bulk.assert_called_once()
+    model, objects = add_bulk.call_args.args
+    assert model is LandingPage
+    assert [page.pk for page in objects] == [landing_page.pk]
+
+
+def test_deleted_page_removed(landing_page, queue):
+    """Test deleting a page removes it from the index."""
+    pk = landing_page.pk
+
+    with patch("search.indexing.threading.Thread"):
+        landing_page.delete()
+
+    # Deleting unpublishes the page first; the last action queued wins.
+    assert queued()[-1] == (pk, DELETE)
+    with patch.object(backend_class(), "delete") as delete:
+        assert queue.flush() == 1
+    assert delete.call_args.args[0].pk == pk
+
+
+def test_flush_bumps_index_version(landing_page, queue):
+    """Test cached search results go stale once the index changes."""
+    from search.cache import get_index_version
+
+    version = get_index_version()
+    queue.queue(LandingPage, landing_page.pk)
+
+    queue.flush()
+
+    assert get_index_version() != version
+
+
+def test_draft_pages_indexed_for_admin_search(home_page, queue):
+    """Test a page that was never published is indexed as it is saved."""
+    with patch("search.indexing.threading.Thread"):
+        draft = home_page.add_child(
+            instance=LandingPage(title="Draft", slug="draft", live=False)
+        )
+
+    assert queued() == [(draft.pk, INDEX)]
+    assert queue.flush() == 1
+    assert index_entry_exists(draft)
+
+
+def test_queued_pages_survive_the_process(landing_page, queue):
+    """Test pages queued by a worker that died are indexed by another."""
+    with patch("search.indexing.threading.Thread"):
+        landing_page.save_revision().publish()
+
+    assert IndexQueue().flush() == 1
+    assert index_entry_exists(landing_page)
+    assert queued() == []
+
+
+def test_rolled_back_change_not_queued(landing_page, queue):
+    """Test a change that rolls back leaves nothing to index."""
+    from django.db import transaction
+
+    with pytest.raises(RuntimeError), transaction.atomic():
+        queue.queue(LandingPage, landing_page.pk)
+        raise RuntimeError
+
+    assert queued() == []
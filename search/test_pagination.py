@@ -0,0 +1,137 @@
+"""
+Tests for search result pagination.
+"""
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from django.urls import reverse
+
+from home.models import LandingPage
+from search.cache import CachedResults
+from search.pagination import SearchPaginator, make_cursor, parse_cursor
+
+pytestmark = pytest.mark.django_db
+
+
+def paginator(ids):
+    return SearchPaginator(
+        CachedResults(ids, [SimpleNamespace(pk=pk) for pk in ids])
+    )
+
+
+def pks(page):
+    return [obj.pk for obj in page.object_list]
+
+
+@pytest.fixture
+def results_pages(home_page):
+    return [
+        home_page.add_child(instance=LandingPage(title=f"Solar {i}", slug=f"solar-{i}"))
+        for i in range(25)
+    ]
+
+
+def test_parse_cursor():
+    """Test cursors round-trip and malformed ones are rejected."""
+    assert parse_cursor(make_cursor(9, 42)) == (9, 42)
+    assert parse_cursor("abc") is None
+    assert parse_cursor("-1-4") is None
+    assert parse_cursor(None) is None
+
+
+def test_count_needs_no_query(django_assert_num_queries):
+    """Test the total comes from the ranked ids."""
+    with django_assert_num_queries(0):
+        assert paginator(list(range(1, 26))).count == 25
+
+
+def test_count_capped(settings):
+    """Test a full result list is reported as a lower bound."""
+    settings.SEARCH_CACHE_MAX_RESULTS = 20
+
+    assert paginator(list(range(1, 21))).capped
+    assert not paginator(list(range(1, 20))).capped
+
+
+def test_next_and_previous_cursors():
+    """Test cursors walk the ranking a page at a time."""
+    results = paginator(list(range(101, 126)))
+
+    first = results.page(1)
+    second = results.page_after(first.next_cursor)
+    third = results.page_after(second.next_cursor)
+
+    assert pks(second) == list(range(111, 121))
+    assert pks(third) == list(range(121, 126))
+    assert third.next_cursor is None
+    assert pks(results.page_before(third.previous_cursor)) == pks(second)
+    assert first.previous_cursor is None
+
+
+def test_cursor_follows_changed_ranking():
+    """Test a cursor continues after its result when the ranking changed."""
+    cursor = paginator(list(range(101, 126))).page(1).next_cursor
+
+    # Two new results now rank first.
+    reranked = paginator([201, 202] + list(range(101, 126)))
+
+    assert pks(reranked.page_after(cursor)) == list(range(111, 121))
+
+
+def test_cursor_for_removed_result_continues_from_its_rank():
+    """Test a cursor whose result left the ranking continues at its old rank."""
+    cursor = make_cursor(9, 999)
+
+    assert pks(paginator(list(range(101, 126))).page_after(cursor))[0] == 111
+
+
+def test_cursor_past_the_end_shows_last_page():
+    """Test a cursor after the last result shows the last page."""
+    results = paginator(list(range(101, 126)))
+
+    assert pks(results.page_after(make_cursor(24, 125))) == list(range(121, 126))
+
+
+def test_deep_page_loads_only_its_results(results_pages, django_assert_num_queries):
+    """Test any page of cached results costs the same queries as the first."""
+    results = SearchPaginator(CachedResults([page.pk for page in results_pages]))
+
+    # The page types of the results, then the landing pages.
+    with django_assert_num_queries(2):
+        page = results.page(3)
+        assert pks(page) == [p.pk for p in results_pages[20:]]
+
+
+def test_view_follows_cursor_links(client, site, results_pages):
+    """Test the next and previous links of the results page."""
+    with patch("search.views._perform_search", return_value=results_pages):
+        first = client.get(reverse("search") + "?query=solar")
+        cursor = first.context["search_results"].next_cursor
+        second = client.get(reverse("search") + f"?query=solar&after={cursor}")
+        previous = second.context["search_results"].previous_cursor
+        back = client.get(reverse("search") + f"?query=solar&before={previous}")
+
+    assert f"after={cursor}" in first.content.decode()
+    assert pks(second.context["search_results"]) == [p.pk for p in results_pages[10:20]]
+    assert pks(back.context["search_results"]) == [p.pk for p in results_pages[:10]]
+
+
+def test_view_ignores_malformed_cursor(client, site, results_pages):
+    """Test a malformed cursor falls back to the page number."""
+    with patch("search.views._perform_search", return_value=results_pages):
+        response = client.get(reverse("search") + "?query=solar&after=x&page=2")
+
+    assert response.context["search_results"].number == 2
+
+
+def test_view_states_the_result_limit(client, site, results_pages, settings):
+    """Test a full result list says how many results can be shown."""
+    settings.SEARCH_CACHE_MAX_RESULTS = 20
+
+    with patch("search.views._perform_search", return_value=results_pages):
+        response = client.get(reverse("search") + "?query=solar")
+
+    content = response.content.decode()
+    assert "Found 20+ results" in content
+    assert "Only the first 20 results can be shown" in content
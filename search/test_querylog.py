@@ -0,0 +1,185 @@
+"""
+Tests for buffered search query logging and the daily query counts.
+"""
+import datetime
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from home.models import LandingPage
+from search.models import DailyQueryHits
+from search.querylog import QueryLog, upsert_hits
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def log(settings):
+    settings.SEARCH_QUERY_LOG = True
+    instance = QueryLog()
+    with patch.object(instance, "_schedule") as schedule:
+        instance.schedule = schedule
+        yield instance
+
+
+def stored():
+    return {
+        row.query_string: (row.hits, row.zero_result_hits)
+        for row in DailyQueryHits.objects.all()
+    }
+
+
+def test_hits_aggregated_per_normalised_query(log, django_assert_num_queries):
+    """Test hits are counted in memory and written together."""
+    with django_assert_num_queries(0):
+        log.record("Solar panels", 12)
+        log.record("solar  PANELS", 12)
+        log.record("wind", 0)
+
+    assert log.flush() == 2
+    assert stored() == {"solar panels": (2, 0), "wind": (1, 1)}
+
+
+def test_flush_adds_to_stored_counts(log):
+    """Test a later batch adds to the day's counts instead of replacing them."""
+    log.record("solar", 3)
+    log.flush()
+    log.record("solar", 0)
+    log.record("solar", 3)
+    log.flush()
+
+    assert stored() == {"solar": (3, 1)}
+
+
+def test_upsert_batches_rows(django_assert_num_queries):
+    """Test rows are written a batch per statement."""
+    today = timezone.localdate()
+    counts = {(today, f"query {i}"): [1, 0] for i in range(1200)}
+
+    # Savepoint, three INSERTs of at most 500 rows, release.
+    with django_assert_num_queries(5):
+        upsert_hits(counts)
+
+    assert DailyQueryHits.objects.count() == 1200
+
+
+def test_first_hit_schedules_timed_flush(log, settings):
+    """Test a batch is flushed SEARCH_QUERY_LOG_INTERVAL seconds after it starts."""
+    settings.SEARCH_QUERY_LOG_INTERVAL = 30
+
+    log.record("solar", 1)
+    log.record("wind", 1)
+
+    log.schedule.assert_called_once_with("_scheduled", 30)
+
+
+def test_full_buffer_flushed_straight_away(log, settings):
+    """Test reaching SEARCH_QUERY_LOG_MAX_PENDING queries flushes without waiting."""
+    settings.SEARCH_QUERY_LOG_MAX_PENDING = 3
+
+    for query in ("a1", "b2", "c3", "d4"):
+        log.record(query, 1)
+
+    assert [call.args for call in log.schedule.call_args_list] == [
+        ("_scheduled", settings.SEARCH_QUERY_LOG_INTERVAL),
+        ("_flushing_soon", 0),
+    ]
+
+
+def test_failed_flush_reports_lost_hits(log, caplog):
+    """Test a failed upsert is logged and counted, not dropped silently."""
+    log.record("solar", 1)
+    log.record("solar", 0)
+    log.record("wind", 1)
+
+    with patch("search.querylog.upsert_hits", side_effect=RuntimeError("down")):
+        assert log.flush() == 0
+
+    assert log.lost_hits == 3
+    assert "2 search query counts failed, 3 searches were not logged" in caplog.text
+    assert log.flush() == 0
+
+
+def test_flush_later_writes_batch(log):
+    """Test the background flush writes what was recorded meanwhile."""
+    log._scheduled = True
+    log.record("solar", 1)
+
+    with patch("search.querylog.connections.all", return_value=[]):
+        log._flush_later("_scheduled", 0)
+
+    assert not log._scheduled
+    assert stored() == {"solar": (1, 0)}
+
+
+def test_disabled_log_records_nothing(log, settings):
+    """Test nothing is buffered when SEARCH_QUERY_LOG is off."""
+    settings.SEARCH_QUERY_LOG = False
+
+    log.record("solar", 1)
+
+    assert log.flush() == 0
+    log.schedule.assert_not_called()
+
+
+def test_search_view_records_first_page_only(client, site, home_page):
+    """Test a search is counted once, with its result count, not per page."""
+    pages = [
+        home_page.add_child(instance=LandingPage(title=f"Solar {i}", slug=f"solar-{i}"))
+        for i in range(12)
+    ]
+
+    with patch("search.views._perform_search", return_value=pages), patch(
+        "search.views.query_log"
+    ) as query_log:
+        first = client.get(reverse("search") + "?query=solar")
+        cursor = first.context["search_results"].next_cursor
+        client.get(reverse("search") + f"?query=solar&after={cursor}")
+        client.get(reverse("search") + "?query=solar&page=2")
+        client.get(reverse("search"))
+
+    query_log.record.assert_called_once_with("solar", 12)
+
+
+def test_top_and_zero_result_queries():
+    """Test the rollups sum recent days and rank by hits."""
+    today = timezone.localdate()
+    DailyQueryHits.objects.bulk_create(
+        [
+            DailyQueryHits(date=today, query_string="solar", hits=5),
+            DailyQueryHits(
+                date=today - datetime.timedelta(days=1), query_string="solar", hits=4
+            ),
+            DailyQueryHits(date=today, query_string="wind", hits=6, zero_result_hits=6),
+            DailyQueryHits(
+                date=today - datetime.timedelta(days=30),
+                query_string="tidal",
+                hits=50,
+                zero_result_hits=50,
+            ),
+        ]
+    )
+
+    top = [
+        (row["query_string"], row["total_hits"]) for row in DailyQueryHits.objects.top()
+    ]
+    zero = [row["query_string"] for row in DailyQueryHits.objects.zero_results()]
+
+    assert top == [("solar", 9), ("wind", 6)]
+    assert zero == ["wind"]
+
+
+def test_search_query_report_command():
+    """Test the report lists both tables."""
+    DailyQueryHits.objects.create(
+        date=timezone.localdate(), query_string="wind", hits=2, zero_result_hits=2
+    )
+    out = StringIO()
+
+    call_command("search_query_report", "--days", "1", stdout=out)
+
+    assert out.getvalue().count("wind") == 2
@@ -0,0 +1,126 @@
+"""
+Tests for the chunked reindex_search command.
+"""
+import io
+import json
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from wagtail.models import Page
+from wagtail.search.models import IndexEntry
+
+from home.models import LandingPage
+from search.reindex import page_chunks, write_state
+
+pytestmark = pytest.mark.django_db
+
+COMMAND = "home.management.commands.reindex_search"
+
+
+@pytest.fixture
+def state_file(tmp_path):
+    return str(tmp_path / "reindex.json")
+
+
+def test_page_chunks(landing_page):
+    """Test pages are split into id ranges with their page counts."""
+    ids = list(Page.objects.order_by("id").values_list("id", flat=True))
+
+    chunks = page_chunks(2)
+
+    assert [count for _first, _last, count in chunks] == [
+        len(ids[offset : offset + 2]) for offset in range(0, len(ids), 2)
+    ]
+    assert chunks[0][0] == ids[0]
+    assert chunks[-1][1] == ids[-1]
+
+
+def test_reindex_in_place(landing_page, state_file):
+    """Test every page is indexed, drafts too, with progress reported."""
+    draft = landing_page.add_child(
+        instance=LandingPage(title="Draft", slug="draft", live=False)
+    )
+    IndexEntry.objects.all().delete()
+    out = io.StringIO()
+
+    call_command(
+        "reindex_search", workers=1, chunk_size=1, state_file=state_file, stdout=out
+    )
+
+    indexed = set(IndexEntry.objects.values_list("object_id", flat=True))
+    assert {str(landing_page.pk), str(draft.pk)} <= indexed
+    assert "pages/s, ETA" in out.getvalue()
+    assert f"Indexed {Page.objects.count()} pages" in out.getvalue()
+
+
+def test_state_file_removed_on_success(landing_page, state_file, tmp_path):
+    """Test a completed rebuild leaves nothing to resume."""
+    call_command(
+        "reindex_search", workers=1, state_file=state_file, stdout=io.StringIO()
+    )
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_resume_skips_completed_chunks(state_file):
+    """Test a resumed rebuild only indexes the chunks not yet done."""
+    write_state(
+        state_file,
+        {
+            "shadow": False,
+            "started_at": "2026-01-01T00:00:00+00:00",
+            "chunks": [[1, 10, 10], [11, 20, 10], [21, 30, 10]],
+            "done": [0, 2],
+        },
+    )
+    out = io.StringIO()
+
+    with patch(f"{COMMAND}.index_chunk", return_value=10) as index_chunk:
+        call_command(
+            "reindex_search", workers=1, resume=True, state_file=state_file, stdout=out
+        )
+
+    index_chunk.assert_called_once_with(11, 20, None)
+    assert "1 of 3 chunks, 10 pages to index" in out.getvalue()
+
+
+def test_interrupted_rebuild_records_progress(state_file):
+    """Test chunks completed before a failure are recorded for --resume."""
+    write_state(
+        state_file,
+        {
+            "shadow": False,
+            "started_at": "2026-01-01T00:00:00+00:00",
+            "chunks": [[1, 10, 10], [11, 20, 10]],
+            "done": [],
+        },
+    )
+
+    with patch(f"{COMMAND}.index_chunk", side_effect=[10, RuntimeError]):
+        with pytest.raises(RuntimeError):
+            call_command(
+                "reindex_search",
+                workers=1,
+                resume=True,
+                state_file=state_file,
+                stdout=io.StringIO(),
+            )
+
+    with open(state_file) as f:
+        assert json.load(f)["done"] == [0]
+
+
+def test_resume_without_state(state_file):
+    """Test --resume fails when there is no rebuild to continue."""
+    with pytest.raises(CommandError):
+        call_command("reindex_search", resume=True, state_file=state_file)
+
+
+@pytest.mark.skipif(connection.vendor == "postgresql", reason="shadow works here")
+def test_shadow_requires_postgresql(state_file):
+    """Test --shadow is refused on databases without shadow support."""
+    with pytest.raises(CommandError):
+        call_command("reindex_search", shadow=True, state_file=state_file)
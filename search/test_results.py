@@ -0,0 +1,96 @@
+"""
+Tests for loading search results for display.
+"""
+from unittest.mock import patch
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from home.models import HomePage, LandingPage
+from search.results import load_results, prepare_results
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def make_results(home_page, image):
+    def make_results(prefix, count):
+        pages = []
+        for i in range(count):
+            model = LandingPage if i % 2 else HomePage
+            pages.append(
+                home_page.add_child(
+                    instance=model(
+                        title=f"{prefix} {i}",
+                        slug=f"{prefix}-{i}",
+                        search_description=f"About {prefix} {i}",
+                        hero_image=image,
+                    )
+                )
+            )
+        return pages
+
+    return make_results
+
+
+def _search_queries(client, query, pages):
+    # The first request runs the search and creates the thumbnails; the
+    # second is served from the result cache.
+    with patch("search.views._perform_search", return_value=pages):
+        client.get(reverse("search") + f"?query={query}")
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse("search") + f"?query={query}")
+    assert response.status_code == 200
+    assert len(response.context["search_results"]) == len(pages)
+    return len(queries)
+
+
+def test_load_results_specific_in_rank_order(landing_page, home_page):
+    """Test results are loaded as their specific types, without StreamFields."""
+    results = load_results([landing_page.pk, home_page.pk])
+
+    assert [type(page) for page in results] == [LandingPage, HomePage]
+    assert [page.pk for page in results] == [landing_page.pk, home_page.pk]
+    assert "body" in results[0].get_deferred_fields()
+    assert "features" in results[1].get_deferred_fields()
+
+
+def test_load_results_skips_unpublished_pages(landing_page, home_page):
+    """Test a page unpublished since the search ran is dropped."""
+    LandingPage.objects.filter(pk=landing_page.pk).update(live=False)
+
+    assert load_results([landing_page.pk, home_page.pk]) == [home_page]
+
+
+def test_prepare_results(rf, site, make_results, django_assert_num_queries):
+    """Test URLs and thumbnails are resolved for all results at once."""
+    pages = load_results([page.pk for page in make_results("solar", 4)])
+    request = rf.get("/search/")
+
+    prepare_results(pages, request)
+
+    assert pages[0].search_url == "/solar-0/"
+    with django_assert_num_queries(0):
+        for page in pages:
+            assert page.hero_image.prefetched_renditions == []
+
+
+def test_query_count_independent_of_results(client, site, make_results):
+    """Test 10 results of mixed types cost no more queries than 2."""
+    few = _search_queries(client, "solar", make_results("solar", 2))
+    many = _search_queries(client, "wind", make_results("wind", 10))
+
+    assert many == few
+
+
+def test_results_page_renders_thumbnails_and_urls(client, site, make_results):
+    """Test each result links to its page and shows its hero image."""
+    pages = make_results("solar", 2)
+
+    with patch("search.views._perform_search", return_value=pages):
+        content = client.get(reverse("search") + "?query=solar").content.decode()
+
+    assert 'href="/solar-1/"' in content
+    assert content.count("fill-160x120") == 2
@@ -0,0 +1,269 @@
+"""
+Tests for typeahead suggestions and the autocomplete endpoint.
+"""
+import json
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+from django.urls import reverse
+
+from home.cache import get_page_cache
+from home.models import LandingPage
+from search.indexing import index_queue
+from search.typeahead import (
+    CHANGES_KEY,
+    MAX_SCAN,
+    TOP_SUGGESTIONS,
+    Snapshot,
+    Typeahead,
+    page_texts,
+    record_changes,
+    text_keys,
+    write_snapshot,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def snapshot_path(settings, tmp_path):
+    settings.TYPEAHEAD_SNAPSHOT = str(tmp_path / "typeahead.snapshot")
+    return settings.TYPEAHEAD_SNAPSHOT
+
+
+@pytest.fixture
+def typeahead(snapshot_path):
+    instance = Typeahead()
+    with patch("search.views.typeahead", instance):
+        yield instance
+
+
+def loaded(path, texts):
+    write_snapshot(path, texts)
+    instance = Typeahead()
+    instance.load()
+    return instance
+
+
+def test_text_keys():
+    """Test a text is found from the start of each of its words."""
+    assert text_keys("Solar Panels, Cheap!") == {
+        "solar panels cheap",
+        "panels cheap",
+        "cheap",
+    }
+
+
+def test_snapshot_prefix_matches(snapshot_path):
+    """Test texts are found by a prefix of any of their words."""
+    typeahead = loaded(
+        snapshot_path,
+        [(1, "Solar panels", 3), (2, "Heat pumps", 3), (3, "Panel heaters", 1)],
+    )
+
+    assert typeahead.suggest("pan", 10) == ["Solar panels", "Panel heaters"]
+    assert typeahead.suggest("HEAT", 10) == ["Heat pumps", "Panel heaters"]
+    assert typeahead.suggest("solar pa", 10) == ["Solar panels"]
+    assert typeahead.suggest("wind", 10) == []
+
+
+def test_snapshot_ranks_by_popularity(snapshot_path):
+    """Test a text used by several pages outranks one used once."""
+    typeahead = loaded(
+        snapshot_path,
+        [(1, "Solar grants", 3), (2, "solar energy", 2), (3, "Solar energy", 2)],
+    )
+
+    assert typeahead.suggest("sol", 10) == ["solar energy", "Solar grants"]
+    assert typeahead.suggest("sol", 1) == ["solar energy"]
+
+
+def test_short_queries_not_answered(snapshot_path):
+    """Test queries below the minimum length get no suggestions."""
+    typeahead = loaded(snapshot_path, [(1, "Solar panels", 3)])
+
+    assert typeahead.suggest("s", 10) == []
+
+
+def test_snapshot_round_trip(snapshot_path):
+    """Test the snapshot file holds each suggestion with its pages."""
+    write_snapshot(
+        snapshot_path, [(7, "Héat pümps", 2), (8, "héat PÜMPS", 1)], built_at=1000.0
+    )
+
+    snapshot = Snapshot(snapshot_path)
+
+    assert snapshot.built_at == 1000.0
+    assert snapshot.suggestion(0) == ("Héat pümps", 3.0)
+    assert list(snapshot.pages(0)) == [(7, 2.0), (8, 1.0)]
+    assert snapshot.matches("pü") == [0]
+
+
+def test_common_prefixes_precomputed(snapshot_path):
+    """Test a prefix with many keys reads its best suggestions, not every key."""
+    texts = [(pk, f"Solar {pk}", 1) for pk in range(1, MAX_SCAN + 10)]
+    texts.append((999, "Solar 1", 5))
+    write_snapshot(snapshot_path, texts)
+    snapshot = Snapshot(snapshot_path)
+
+    with patch.object(Snapshot, "key", side_effect=AssertionError):
+        numbers = snapshot.matches("sol")
+
+    assert len(numbers) == TOP_SUGGESTIONS
+    assert snapshot.suggestion(numbers[0]) == ("Solar 1", 6.0)
+
+
+def test_page_texts(landing_page):
+    """Test titles, hero titles and each meta keyword of live pages are used."""
+    texts = {(text, weight) for pk, text, weight in page_texts([landing_page.pk])}
+
+    assert texts == {
+        (landing_page.title, 3),
+        (landing_page.hero_title, 2),
+        ("test", 1),
+        ("landing", 1),
+        ("page", 1),
+        ("seo", 1),
+    }
+
+
+def test_refresh_builds_missing_snapshot(typeahead, landing_page):
+    """Test a process without a snapshot builds one, off the request path."""
+    with patch.object(typeahead, "rebuild_later") as rebuild_later:
+        typeahead.refresh()
+
+    rebuild_later.assert_called_once()
+    assert typeahead.suggest(landing_page.title[:4], 10) == []
+
+    typeahead.rebuild()
+    typeahead.refresh()
+
+    assert typeahead.suggest(landing_page.title[:4], 10)[0] == landing_page.title
+
+
+def test_failed_rebuild_answers_nothing(client, typeahead, snapshot_path):
+    """Test a snapshot that could not be built gives no suggestions, not a 500."""
+    with patch.object(typeahead, "rebuild", side_effect=RuntimeError):
+        typeahead._rebuild()
+    with patch.object(typeahead, "rebuild_later"):
+        response = client.get(reverse("search_autocomplete") + "?q=sol")
+
+    assert response.status_code == 200
+    assert json.loads(response.content)["suggestions"] == []
+
+
+@pytest.mark.parametrize(
+    "content",
+    [b"", b"TYPEAHD2", b"TYPEAHD1" + bytes(64)],
+    ids=["empty", "truncated", "old-format"],
+)
+def test_unreadable_snapshot_rebuilt(client, typeahead, snapshot_path, content, caplog):
+    """Test a corrupt snapshot is logged and rebuilt, not answered with a 500."""
+    with open(snapshot_path, "wb") as f:
+        f.write(content)
+
+    with patch.object(typeahead, "rebuild_later") as rebuild_later:
+        response = client.get(reverse("search_autocomplete") + "?q=sol")
+
+    assert response.status_code == 200
+    assert json.loads(response.content)["suggestions"] == []
+    rebuild_later.assert_called_once()
+    assert "Cannot read typeahead snapshot" in caplog.text
+
+
+def test_refresh_applies_recorded_changes(typeahead, landing_page):
+    """Test pages changed since the snapshot was built replace its entries."""
+    typeahead.rebuild()
+    typeahead.refresh()
+    LandingPage.objects.filter(pk=landing_page.pk).update(title="Wind turbines")
+
+    record_changes([landing_page.pk])
+    typeahead.refresh()
+
+    assert typeahead.suggest("wind", 10) == ["Wind turbines"]
+    assert landing_page.title not in typeahead.suggest(landing_page.title[:4], 10)
+
+
+def test_refresh_drops_unpublished_pages(typeahead, landing_page):
+    """Test an unpublished page's texts are no longer suggested."""
+    typeahead.rebuild()
+    typeahead.refresh()
+    landing_page.unpublish()
+
+    record_changes([landing_page.pk])
+    typeahead.refresh()
+
+    assert typeahead.suggest(landing_page.title[:4], 10) == []
+
+
+def test_concurrent_changes_all_recorded(landing_page):
+    """Test changes recorded at the same time by two processes are both kept."""
+    cache = get_page_cache()
+    get = type(cache).get
+
+    def slow_get(self, key, *args):
+        value = get(self, key, *args)
+        time.sleep(0.1)
+        return value
+
+    with patch("search.typeahead.page_texts", return_value=[]), patch.object(
+        type(cache), "get", slow_get
+    ):
+        threads = [
+            threading.Thread(target=record_changes, args=([pk],)) for pk in (1, 2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert set(cache.get(CHANGES_KEY)) >= {1, 2}
+
+
+def test_stale_snapshot_rebuilt(typeahead, snapshot_path, settings):
+    """Test an old snapshot is rebuilt in the background."""
+    write_snapshot(snapshot_path, [], built_at=time.time() - 7200)
+    settings.TYPEAHEAD_REBUILD_AFTER = 3600
+
+    with patch.object(typeahead, "rebuild_later") as rebuild_later:
+        typeahead.refresh()
+
+    rebuild_later.assert_called_once()
+
+
+def test_index_queue_records_changes(landing_page, settings):
+    """Test pages indexed after a publish update the typeahead too."""
+    index_queue.queue(LandingPage, landing_page.pk)
+
+    with patch("search.indexing.record_changes") as record:
+        index_queue.flush()
+
+    assert list(record.call_args.args[0]) == [landing_page.pk]
+
+
+def test_autocomplete_endpoint(client, typeahead, snapshot_path):
+    """Test suggestions are returned as compact, cacheable JSON."""
+    write_snapshot(snapshot_path, [(1, "Solar panels", 3)])
+
+    response = client.get(reverse("search_autocomplete") + "?q=sol")
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/json"
+    assert response["Cache-Control"] == "public, max-age=60"
+    assert response.content == b'{"q":"sol","suggestions":["Solar panels"]}'
+    assert json.loads(response.content)["suggestions"] == ["Solar panels"]
+
+
+def test_autocomplete_answers_without_queries(
+    client, typeahead, snapshot_path, django_assert_num_queries
+):
+    """Test a refreshed process answers without touching the database."""
+    write_snapshot(snapshot_path, [(1, "Solar panels", 3)])
+    typeahead.refresh()
+
+    with django_assert_num_queries(0):
+        response = client.get(reverse("search_autocomplete") + "?q=pan")
+
+    assert json.loads(response.content)["suggestions"] == ["Solar panels"]
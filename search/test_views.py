@@ -344,3 +344,32 @@ def test_search_template_variables_basic(client):
     assert "search_query" in response.context
     assert "search_results" in response.context
     assert response.context["search_query"] == "test"
+
+
+def test_search_conditional_get(client, home_page, site):
+    """Test search responses can be revalidated with a 304."""
+    url = reverse("search") + "?query=test"
+    etag = client.get(url)["ETag"]
+
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 304
+    assert not response.templates
+
+
+def test_search_etag_varies_with_query(client, site):
+    """Test different queries and pages have different validators."""
+    first = client.get(reverse("search") + "?query=test")["ETag"]
+    second = client.get(reverse("search") + "?query=test&page=2")["ETag"]
+
+    assert first != second
+
+
+def test_search_etag_changes_with_index(client, home_page, landing_page, site):
+    """Test publishing a page invalidates search validators."""
+    url = reverse("search") + "?query=test"
+    etag = client.get(url)["ETag"]
+
+    landing_page.save_revision().publish()
+
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
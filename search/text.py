@@ -0,0 +1,51 @@
+"""
+Plain text of StreamField content, for the search index.
+
+Wagtail's own extraction converts every block to its Python value first,
+which fetches the images of image and struct blocks and parses rich text
+twice. ``stream_text()`` reads the stored JSON instead and only looks at the
+block types and struct children listed in ``blocks``, so images, URLs and
+other non-text values are never loaded.
+"""
+import html
+
+from django.utils.html import strip_tags
+
+TEXT = "text"
+RICH_TEXT = "rich_text"
+
+
+def _text(value, kind):
+    if not isinstance(value, str) or not value:
+        return ""
+    if kind == RICH_TEXT:
+        return html.unescape(strip_tags(value))
+    return value
+
+
+def stream_text(stream_value, blocks):
+    """
+    Return the searchable text of a StreamField value.
+
+    ``blocks`` maps block types to ``TEXT`` or ``RICH_TEXT``, or, for struct
+    blocks, to a dict mapping child block names to those.
+    """
+    if not stream_value:
+        return ""
+    parts = []
+    for block in stream_value.raw_data:
+        spec = blocks.get(block["type"])
+        value = block.get("value")
+        if spec is None:
+            continue
+        if isinstance(spec, dict):
+            if isinstance(value, dict):
+                parts.extend(_text(value.get(name), kind) for name, kind in spec.items())
+        else:
+            parts.append(_text(value, spec))
+    return "\n".join(part for part in parts if part)
+
+
+def join_text(*values):
+    """Join the non-empty values, one per line."""
+    return "\n".join(value for value in values if value)
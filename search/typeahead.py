@@ -0,0 +1,530 @@
+"""
+Typeahead suggestions for the search box.
+
+Suggestions are the titles, hero titles and meta keywords of live pages. A
+text used by several pages (a shared keyword, say) scores the sum of its
+field weights on each, so popular texts rank first.
+
+They are served from a snapshot file: a sorted array of keys (every text
+from each of its words on, normalised) pointing into a table of texts, which
+each process memory-maps and binary-searches. Processes forked after
+``warm_up()`` share the mapped pages, and answering never touches the
+database or the cache.
+
+Publishing, unpublishing, moving or deleting a page records the page's new
+texts in the shared cache (``record_changes()``, called from the search
+index queue). Every ``TYPEAHEAD_REFRESH_INTERVAL`` seconds a process picks
+up the changes made since its snapshot was built, and uses them in place of
+the snapshot's entries for those pages. Once the snapshot is older than
+``TYPEAHEAD_REBUILD_AFTER`` seconds, or ``TYPEAHEAD_MAX_CHANGES`` pages have
+changed, one process per host rebuilds it in a background thread and the
+others map the new file. A process that finds no snapshot suggests nothing
+until its background build is done.
+"""
+import heapq
+import itertools
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from wagtail.models import get_page_models
+
+from home.cache import get_page_cache
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+CHANGES_KEY = "search:typeahead:changes"
+# Writers of CHANGES_KEY take turns, holding this key for at most this long.
+CHANGES_LOCK_KEY = f"{CHANGES_KEY}:lock"
+CHANGES_LOCK_TIMEOUT = 10
+
+# Weight of a text by the field it comes from.
+FIELD_WEIGHTS = {"title": 3, "hero_title": 2, "meta_keywords": 1}
+# Fields holding comma-separated texts.
+LIST_FIELDS = {"meta_keywords"}
+# Keys start at each of the first MAX_KEY_WORDS words of a text.
+MAX_KEY_WORDS = 8
+
+# Prefixes matching more than MAX_SCAN keys have their TOP_SUGGESTIONS best
+# suggestions precomputed, so that no lookup reads more than MAX_SCAN keys.
+MAX_SCAN = 256
+TOP_SUGGESTIONS = 32
+
+MAGIC = b"TYPEAHD2"
+# magic, built at (epoch seconds), and the number of suggestions, pages,
+# keys, precomputed prefixes and precomputed suggestions
+HEADER = struct.Struct("<8sdIIIII")
+# text offset and length in the blob, score, first page and number of pages
+SUGGESTION = struct.Struct("<IHfII")
+# page id, weight
+PAGE = struct.Struct("<If")
+# key offset and length in the blob, suggestion number
+KEY = struct.Struct("<IHI")
+# prefix offset and length in the blob, first suggestion and number of them
+TOP = struct.Struct("<IHII")
+# suggestion number
+TOP_SUGGESTION = struct.Struct("<I")
+
+WORD_RE = re.compile(r"\w+")
+
+
+def normalise(text):
+    return " ".join(WORD_RE.findall(text.casefold()))
+
+
+def text_keys(text):
+    """Return the keys a text is found under: itself from each word on."""
+    words = normalise(text).split(" ")
+    return {
+        " ".join(words[i:])
+        for i in range(min(len(words), MAX_KEY_WORDS))
+        if words[i]
+    }
+
+
+def page_texts(page_ids=None):
+    """Yield ``(page id, text, weight)`` for live pages, or those of ``page_ids``."""
+    for model in get_page_models():
+        local_fields = {field.name for field in model._meta.local_fields}
+        fields = [name for name in FIELD_WEIGHTS if name in local_fields]
+        if not fields:
+            continue
+        pages = model.objects.live()
+        if page_ids is not None:
+            pages = pages.filter(pk__in=page_ids)
+        for pk, *values in pages.values_list("pk", *fields).iterator():
+            for name, value in zip(fields, values):
+                texts = value.split(",") if name in LIST_FIELDS and value else [value]
+                for text in texts:
+                    text = (text or "").strip()
+                    if text:
+                        yield pk, text, FIELD_WEIGHTS[name]
+
+
+def _top_suggestions(keys, scores):
+    """
+    Return ``(prefix, suggestion numbers)`` for every prefix of more than
+    ``MAX_SCAN`` keys, best suggestions first, sorted by prefix.
+    """
+    tops = []
+    ranges = [(1, 0, len(keys))]
+    while ranges:
+        length, low, high = ranges.pop()
+        start = low
+        while start < high:
+            prefix = keys[start][0][:length]
+            end = start + 1
+            while end < high and keys[end][0][:length] == prefix:
+                end += 1
+            # A prefix shorter than ``length`` is a key that its range's own
+            # prefix already covers.
+            if end - start > MAX_SCAN and len(prefix) == length:
+                numbers = {number for _key, number in keys[start:end]}
+                best = heapq.nlargest(
+                    TOP_SUGGESTIONS, numbers, key=scores.__getitem__
+                )
+                tops.append((prefix, best))
+                ranges.append((length + 1, start, end))
+            start = end
+    tops.sort()
+    return tops
+
+
+def write_snapshot(path, texts, built_at=None):
+    """Write the snapshot of ``texts`` (as from ``page_texts()``) atomically."""
+    # Changes recorded while the texts are read are newer than the snapshot.
+    built_at = time.time() if built_at is None else built_at
+
+    # Texts that only differ in case or punctuation are one suggestion.
+    suggestions = {}
+    for pk, text, weight in texts:
+        suggestion = suggestions.setdefault(normalise(text), [text, 0, []])
+        suggestion[1] += weight
+        suggestion[2].append((pk, weight))
+
+    blob = bytearray()
+    suggestion_table = bytearray()
+    page_table = bytearray()
+    page_count = 0
+    keys = []
+    scores = []
+    for number, (normalised, suggestion) in enumerate(suggestions.items()):
+        text, score, pages = suggestion
+        encoded = text.encode("utf-8")[:65535]
+        suggestion_table += SUGGESTION.pack(
+            len(blob), len(encoded), score, page_count, len(pages)
+        )
+        blob += encoded
+        for pk, weight in pages:
+            page_table += PAGE.pack(pk, weight)
+        page_count += len(pages)
+        keys.extend(
+            (key.encode("utf-8")[:65535], number) for key in text_keys(normalised)
+        )
+        scores.append(score)
+    keys.sort()
+
+    key_table = bytearray()
+    for key, number in keys:
+        key_table += KEY.pack(len(blob), len(key), number)
+        blob += key
+
+    top_table = bytearray()
+    top_suggestion_table = bytearray()
+    top_suggestion_count = 0
+    tops = _top_suggestions(keys, scores)
+    for prefix, numbers in tops:
+        top_table += TOP.pack(
+            len(blob), len(prefix), top_suggestion_count, len(numbers)
+        )
+        blob += prefix
+        for number in numbers:
+            top_suggestion_table += TOP_SUGGESTION.pack(number)
+        top_suggestion_count += len(numbers)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(
+            HEADER.pack(
+                MAGIC,
+                built_at,
+                len(suggestions),
+                page_count,
+                len(keys),
+                len(tops),
+                top_suggestion_count,
+            )
+        )
+        for table in (
+            suggestion_table,
+            page_table,
+            key_table,
+            top_table,
+            top_suggestion_table,
+            blob,
+        ):
+            f.write(table)
+    os.replace(tmp_path, path)
+
+
+def _lock(lock):
+    """
+    Lock the open file ``lock`` exclusively. Return False if another process
+    held it, once it has been released.
+    """
+    if fcntl is None:
+        try:
+            msvcrt.locking(lock.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            # Retries for ten seconds, then raises.
+            msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+            return False
+        return True
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        return False
+    return True
+
+
+class Snapshot:
+    """A memory-mapped snapshot file."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.stat = os.fstat(f.fileno())
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            (
+                magic,
+                self.built_at,
+                self.suggestion_count,
+                page_count,
+                self.key_count,
+                self.top_count,
+                top_suggestion_count,
+            ) = HEADER.unpack_from(self.map)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a typeahead snapshot")
+        except (ValueError, struct.error):
+            self.map.close()
+            raise
+        self.suggestions_start = HEADER.size
+        self.pages_start = (
+            self.suggestions_start + self.suggestion_count * SUGGESTION.size
+        )
+        self.keys_start = self.pages_start + page_count * PAGE.size
+        self.tops_start = self.keys_start + self.key_count * KEY.size
+        self.top_suggestions_start = self.tops_start + self.top_count * TOP.size
+        self.blob_start = (
+            self.top_suggestions_start + top_suggestion_count * TOP_SUGGESTION.size
+        )
+
+    def _bytes(self, offset, length):
+        start = self.blob_start + offset
+        return self.map[start : start + length]
+
+    def key(self, number):
+        offset, length, suggestion = KEY.unpack_from(
+            self.map, self.keys_start + number * KEY.size
+        )
+        return self._bytes(offset, length), suggestion
+
+    def suggestion(self, number):
+        """Return ``(text, score)``."""
+        offset, length, score, _first, _count = SUGGESTION.unpack_from(
+            self.map, self.suggestions_start + number * SUGGESTION.size
+        )
+        return self._bytes(offset, length).decode("utf-8"), score
+
+    def pages(self, number):
+        """Yield ``(page id, weight)`` for the pages using a suggestion."""
+        _offset, _length, _score, first, count = SUGGESTION.unpack_from(
+            self.map, self.suggestions_start + number * SUGGESTION.size
+        )
+        for page in range(first, first + count):
+            yield PAGE.unpack_from(self.map, self.pages_start + page * PAGE.size)
+
+    def _top(self, prefix):
+        low, high = 0, self.top_count
+        while low < high:
+            middle = (low + high) // 2
+            offset, length, first, count = TOP.unpack_from(
+                self.map, self.tops_start + middle * TOP.size
+            )
+            top_prefix = self._bytes(offset, length)
+            if top_prefix == prefix:
+                return [
+                    TOP_SUGGESTION.unpack_from(
+                        self.map,
+                        self.top_suggestions_start + number * TOP_SUGGESTION.size,
+                    )[0]
+                    for number in range(first, first + count)
+                ]
+            if top_prefix < prefix:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def matches(self, prefix):
+        """
+        Return the numbers of the suggestions with a key starting with
+        ``prefix``, or of the best of them for a prefix with many keys.
+        """
+        prefix = prefix.encode("utf-8")
+        top = self._top(prefix)
+        if top is not None:
+            return top
+        low, high = 0, self.key_count
+        while low < high:
+            middle = (low + high) // 2
+            if self.key(middle)[0] < prefix:
+                low = middle + 1
+            else:
+                high = middle
+        numbers = {}
+        for number in range(low, self.key_count):
+            key, suggestion = self.key(number)
+            if not key.startswith(prefix):
+                break
+            numbers[suggestion] = None
+        return list(numbers)
+
+
+class Typeahead:
+    """This process's snapshot, the changes made since, and cached answers."""
+
+    def __init__(self):
+        self.snapshot = None
+        self.changes = {}
+        self._answers = {}
+        self._checked = None
+        self._lock = threading.Lock()
+        self._rebuilding = False
+
+    @property
+    def path(self):
+        return settings.TYPEAHEAD_SNAPSHOT
+
+    def load(self):
+        """Map the snapshot file, if there is a usable one. Makes no queries."""
+        try:
+            self.snapshot = Snapshot(self.path)
+        except FileNotFoundError:
+            self.snapshot = None
+        except (OSError, ValueError, struct.error):
+            # Empty, truncated or of an older format: refresh() rebuilds it.
+            logger.warning(
+                "Cannot read typeahead snapshot %s", self.path, exc_info=True
+            )
+            self.snapshot = None
+        self._answers = {}
+
+    def needs_refresh(self):
+        return (
+            self._checked is None
+            or time.monotonic() - self._checked
+            >= settings.TYPEAHEAD_REFRESH_INTERVAL
+        )
+
+    def refresh(self):
+        """Map a newer snapshot and pick up the pages changed since it was built."""
+        with self._lock:
+            self._checked = time.monotonic()
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                stat = None
+            if stat is not None and (
+                self.snapshot is None
+                or (stat.st_ino, stat.st_mtime_ns)
+                != (self.snapshot.stat.st_ino, self.snapshot.stat.st_mtime_ns)
+            ):
+                self.load()
+            if self.snapshot is None:
+                # Never build on the request path: answer nothing meanwhile.
+                self.changes = {}
+                self._answers = {}
+                self.rebuild_later()
+                return
+
+            built_at = self.snapshot.built_at
+            changes = get_page_cache().get(CHANGES_KEY) or {}
+            self.changes = {
+                pk: texts
+                for pk, (changed_at, texts) in changes.items()
+                if changed_at >= built_at
+            }
+            self._answers = {}
+
+            stale = time.time() - built_at >= settings.TYPEAHEAD_REBUILD_AFTER
+            # A deleted file is rebuilt; this process keeps the old mapping.
+            if (
+                stat is None
+                or stale
+                or len(self.changes) >= settings.TYPEAHEAD_MAX_CHANGES
+            ):
+                self.rebuild_later()
+
+    def rebuild(self):
+        """Rebuild the snapshot file, unless another process on this host is."""
+        with open(f"{self.path}.lock", "w") as lock:
+            if not _lock(lock):
+                # The other process has just finished.
+                return
+            write_snapshot(self.path, page_texts())
+
+    def rebuild_later(self):
+        if self._rebuilding:
+            return
+        self._rebuilding = True
+        threading.Thread(target=self._rebuild, name="typeahead", daemon=True).start()
+
+    def _rebuild(self):
+        try:
+            self.rebuild()
+        except Exception:
+            # Tried again after TYPEAHEAD_REFRESH_INTERVAL.
+            logger.exception("Rebuilding the typeahead snapshot failed")
+        else:
+            self._checked = None
+        finally:
+            self._rebuilding = False
+            for connection in connections.all(initialized_only=True):
+                connection.close_if_unusable_or_obsolete()
+
+    def _snapshot_matches(self, prefix):
+        """Yield ``(text, score)`` for the snapshot's texts matching ``prefix``."""
+        if self.snapshot is None:
+            return
+        for number in self.snapshot.matches(prefix):
+            text, score = self.snapshot.suggestion(number)
+            if self.changes:
+                # Pages changed since the snapshot count as they are now.
+                score -= sum(
+                    weight
+                    for pk, weight in self.snapshot.pages(number)
+                    if pk in self.changes
+                )
+            if score > 0:
+                yield text, score
+
+    def _changed_matches(self, prefix):
+        """Yield ``(text, weight)`` for the changed pages' texts matching ``prefix``."""
+        for texts in self.changes.values():
+            for text, weight in texts:
+                if any(key.startswith(prefix) for key in text_keys(text)):
+                    yield text, weight
+
+    def suggest(self, query, limit):
+        """Return up to ``limit`` texts with a word starting with ``query``."""
+        prefix = normalise(query)
+        if len(prefix) < settings.TYPEAHEAD_MIN_LENGTH:
+            return []
+        answer = self._answers.get((prefix, limit))
+        if answer is not None:
+            return answer
+
+        scores = {}
+        display = {}
+        for text, weight in itertools.chain(
+            self._snapshot_matches(prefix), self._changed_matches(prefix)
+        ):
+            key = normalise(text)
+            scores[key] = scores.get(key, 0) + weight
+            display.setdefault(key, text)
+
+        best = heapq.nsmallest(limit, scores, key=lambda key: (-scores[key], key))
+        answer = [display[key] for key in best]
+        if len(self._answers) >= 10000:
+            self._answers = {}
+        self._answers[(prefix, limit)] = answer
+        return answer
+
+
+def record_changes(page_ids):
+    """Record the current texts of the given pages, for every process to pick up."""
+    page_ids = set(page_ids)
+    texts = {pk: [] for pk in page_ids}
+    for pk, text, weight in page_texts(page_ids):
+        texts[pk].append((text, weight))
+
+    cache = get_page_cache()
+    # Concurrent writers would otherwise overwrite each other's changes. A
+    # lock left by a killed process expires after CHANGES_LOCK_TIMEOUT.
+    deadline = time.monotonic() + 2 * CHANGES_LOCK_TIMEOUT
+    while not (locked := cache.add(CHANGES_LOCK_KEY, 1, CHANGES_LOCK_TIMEOUT)):
+        if time.monotonic() >= deadline:
+            logger.warning("Recording typeahead changes without the lock")
+            break
+        time.sleep(0.05)
+    try:
+        now = time.time()
+        changes = {
+            pk: change
+            for pk, change in (cache.get(CHANGES_KEY) or {}).items()
+            # Every snapshot is rebuilt within TYPEAHEAD_REBUILD_AFTER.
+            if change[0] >= now - 2 * settings.TYPEAHEAD_REBUILD_AFTER
+        }
+        changes.update({pk: (now, entries) for pk, entries in texts.items()})
+        cache.set(CHANGES_KEY, changes, None)
+    finally:
+        if locked:
+            cache.delete(CHANGES_LOCK_KEY)
+
+
+typeahead = Typeahead()
@@ -1,13 +1,24 @@
-from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.paginator import EmptyPage, PageNotAnInteger
+from django.http import JsonResponse
 from django.template.response import TemplateResponse
+from django.utils.http import urlencode
 from wagtail.models import Page
 
-# To enable logging of search queries for use with the "Promoted search results" module
-# <https://docs.wagtail.org/en/stable/reference/contrib/searchpromotions.html>
-# uncomment the following line and the lines indicated in the search function
-# (after adding wagtail.contrib.search_promotions to INSTALLED_APPS):
-
-# from wagtail.contrib.search_promotions.models import Query
+from home.cache import conditional_response, is_anonymous_request
+from search.cache import CachedResults, cached_search, results_key, search_etag
+from search.facets import (
+    browse_pages,
+    facet_counts,
+    facet_options,
+    filter_ids,
+    parse_filters,
+)
+from search.pagination import SearchPaginator
+from search.querylog import query_log
+from search.results import prepare_results
+from search.typeahead import typeahead
 
 
 def _perform_search(search_query):
@@ -17,32 +28,159 @@ def _perform_search(search_query):
     return Page.objects.none()
 
 
-def search(request):
-    search_query = request.GET.get("query", "")
-    page = request.GET.get("page", 1)
+def _ranked_results(search_query, filters):
+    """Return the cached ranked results of the query, or of browsing by facet."""
+    if search_query:
+        return cached_search(search_query, lambda: _perform_search(search_query))
+    if filters:
+        # Browsing by facet, without a query
+        return cached_search("", browse_pages)
+    return CachedResults([])
+
 
-    # Search
-    search_results = _perform_search(search_query)
+def _facet_results(request, search_query, filters, search_results):
+    """Return the results matching the selected facets, and the facets to show."""
+    if not (search_query or filters):
+        return search_results, []
+    key = results_key(search_query)
+    counts = facet_counts(key, search_results.ids)
+    facets = facet_options(counts, filters, request.GET)
+    if filters:
+        search_results = CachedResults(filter_ids(key, search_results.ids, filters))
+    return search_results, facets
 
-    # To log this query for use with the "Promoted search results" module:
-    # if search_query:
-    #     query = Query.get(search_query)
-    #     query.add_hit()
 
-    # Pagination
-    paginator = Paginator(search_results, 10)
+def _results_page(search_results, page, after, before):
+    """Return a page of results: by cursor for previous/next links, else by number."""
+    paginator = SearchPaginator(search_results)
+    results_page = None
+    if after:
+        results_page = paginator.page_after(after)
+    elif before:
+        results_page = paginator.page_before(before)
+    if results_page is not None:
+        return results_page
     try:
-        search_results = paginator.page(page)
+        return paginator.page(page)
     except PageNotAnInteger:
-        search_results = paginator.page(1)
+        return paginator.page(1)
     except EmptyPage:
-        search_results = paginator.page(paginator.num_pages)
+        return paginator.page(paginator.num_pages)
 
-    return TemplateResponse(
+
+def _search_page(request, search_query, page, filters, after=None, before=None):
+    """
+    Run the search and return the requested page of results, ready to render,
+    with the facets of the search.
+    """
+    search_results = _ranked_results(search_query, filters)
+
+    # Count each search once, not again for each page or filter of its results
+    if search_query and not (after or before or filters) and page in (1, "1"):
+        query_log.record(search_query, len(search_results))
+
+    search_results, facets = _facet_results(
+        request, search_query, filters, search_results
+    )
+    search_results = _results_page(search_results, page, after, before)
+
+    # Run the result queries here, off the event loop, not lazily while rendering
+    search_results.object_list = list(search_results.object_list)
+    prepare_results(search_results.object_list, request)
+    return search_results, facets
+
+
+def _search_args(request):
+    return (
+        request.GET.get("query", ""),
+        request.GET.get("page", 1),
+        parse_filters(request.GET),
+        request.GET.get("after"),
+        request.GET.get("before"),
+    )
+
+
+def _search_response(request, args, search_results, facets, etag):
+    search_query, _page, filters, _after, _before = args
+    response = TemplateResponse(
         request,
         "search/search.html",
         {
             "search_query": search_query,
             "search_results": search_results,
+            "facets": facets,
+            "filters": filters,
+            "filter_params": urlencode(filters),
         },
     )
+    if etag:
+        response["ETag"] = etag
+    return response
+
+
+def search(request):
+    """Search results page."""
+    # Answer revalidation requests without searching or rendering
+    etag = None
+    if is_anonymous_request(request):
+        etag = search_etag(request)
+        not_modified = conditional_response(request, etag)
+        if not_modified is not None:
+            return not_modified
+
+    args = _search_args(request)
+    search_results, facets = _search_page(request, *args)
+    return _search_response(request, args, search_results, facets, etag)
+
+
+async def search_async(request):
+    """
+    ``search()`` for ASGI.
+
+    A slow search only holds a thread of its own, not a worker: the search
+    backend and the cache are synchronous, so that work runs via
+    ``sync_to_async``, and Django renders the template response off the event
+    loop too.
+    """
+    etag = None
+    if is_anonymous_request(request):
+        etag = await sync_to_async(search_etag)(request)
+        not_modified = conditional_response(request, etag)
+        if not_modified is not None:
+            return not_modified
+
+    args = _search_args(request)
+    search_results, facets = await sync_to_async(_search_page)(request, *args)
+    return _search_response(request, args, search_results, facets, etag)
+
+
+def _autocomplete_response(request):
+    query = request.GET.get("q", "")[:100]
+    suggestions = typeahead.suggest(query, settings.TYPEAHEAD_LIMIT)
+    response = JsonResponse(
+        {"q": query, "suggestions": suggestions},
+        json_dumps_params={"separators": (",", ":")},
+    )
+    response["Cache-Control"] = f"public, max-age={settings.TYPEAHEAD_CACHE_MAX_AGE}"
+    return response
+
+
+def autocomplete(request):
+    """
+    Typeahead suggestions for ``q``, as ``{"q": ..., "suggestions": [...]}``.
+
+    Answered from this process's snapshot, refreshed periodically.
+    """
+    if typeahead.needs_refresh():
+        typeahead.refresh()
+    return _autocomplete_response(request)
+
+
+async def autocomplete_async(request):
+    """
+    ``autocomplete()`` for ASGI: answered on the event loop, only the
+    periodic refresh of the snapshot runs in a thread.
+    """
+    if typeahead.needs_refresh():
+        await sync_to_async(typeahead.refresh)()
+    return _autocomplete_response(request)
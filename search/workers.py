@@ -0,0 +1,17 @@
+"""
+Set-up of the ``reindex_search`` worker processes.
+
+Workers are started with ``spawn``, so they import this module before Django
+is set up; it must not import models.
+"""
+import django
+from django.conf import settings
+
+
+def setup_worker(database_name):
+    """
+    Set Django up, on the database the command runs against: the configured
+    one, or the test database when run by the test suite.
+    """
+    settings.DATABASES["default"]["NAME"] = database_name
+    django.setup()